@@ -0,0 +1,93 @@
+"""
+Benchmark of the membership filter backends used by the generic variants.
+
+Every Bloom Filter backend is sized for the same number of elements and the same 1% false positive
+rate, and static backends use their smallest configuration. Each filter is filled with random
+32-byte keys in batches, and then probed with keys that were never inserted. The
+report shows the size of each filter, the time taken to build and query it, and the measured false
+positive rate.
+
+Usage:
+    python -m benchmarks.filter_benchmark -n 1000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from src.bloom_filter import KEY_BYTES
+from src.filters import FILTER_BACKENDS, create_filter, finish_filter
+
+BATCH_SIZE: int = 65536
+
+
+def random_keys(count: int) -> np.ndarray:
+    """
+    Generate random fixed-width keys.
+
+    Args:
+        count (int): The number of keys.
+
+    Returns:
+        np.ndarray: A (count, 32) array of uint8 keys.
+    """
+    return np.frombuffer(os.urandom(count * KEY_BYTES), dtype=np.uint8).reshape(-1, KEY_BYTES)
+
+
+def benchmark(backend: str, keys: np.ndarray, probes: np.ndarray) -> None:
+    """
+    Build a filter of the given backend from the keys and report its size, speed and accuracy.
+
+    Args:
+        backend (str): The name of the backend.
+        keys (np.ndarray): The keys to insert.
+        probes (np.ndarray): Keys that were not inserted, used to measure false positives.
+    """
+    time1: float = time.perf_counter()
+    builder = create_filter(backend, len(keys))
+    for start in range(0, len(keys), BATCH_SIZE):
+        builder.add_many(keys[start:start + BATCH_SIZE])
+    membership_filter = finish_filter(builder)
+    time2: float = time.perf_counter()
+
+    false_positives: int = 0
+    for start in range(0, len(probes), BATCH_SIZE):
+        false_positives += int(membership_filter.check_many(probes[start:start + BATCH_SIZE]).sum())
+    time3: float = time.perf_counter()
+
+    print(f"{backend:>11}: {membership_filter.size / 8 / 2**20:8.2f} MiB, "
+          f"{membership_filter.size / len(keys):5.2f} bits/key, "
+          f"k={membership_filter.hash_count:2d}, "
+          f"build {time2 - time1:7.3f}s, "
+          f"check {(time3 - time2) / len(probes) * 1e9:7.1f}ns/key, "
+          f"false positive rate {false_positives / len(probes):.4%}")
+
+
+def main() -> None:
+    """
+    Parse command-line arguments and benchmark every registered filter backend.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('-n',
+                        type=int,
+                        default=1000000,
+                        help="Set the number of inserted keys (default is 1000000)"
+                        )
+    parser.add_argument('-p',
+                        type=int,
+                        default=1000000,
+                        help="Set the number of probe keys (default is 1000000)"
+                        )
+    args: argparse.Namespace = parser.parse_args()
+
+    keys: np.ndarray = random_keys(args.n)
+    probes: np.ndarray = random_keys(args.p)
+    print(f"Benchmarking filter backends with {args.n} keys and {args.p} probes")
+    for backend in FILTER_BACKENDS:
+        benchmark(backend, keys, probes)
+
+
+if __name__ == "__main__":
+    main()
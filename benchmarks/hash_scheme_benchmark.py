@@ -0,0 +1,143 @@
+"""
+Benchmark of the hash schemes of the standard Bloom Filter on the vote combinations of an election.
+
+A Bloom Filter is built with every hash scheme that takes fixed-width keys, from the XORs of every
+subset of random vote representations that reaches the threshold. The 'double' scheme hashes each
+combination with MurmurHash3, while the 'linear' scheme enumerates the XORs of the members' linear
+hashes instead, so no combination is hashed. Each filter is then probed with random keys and with
+the XORs of random subsets below the threshold, which are the combined votes the Tallier checks and
+share their structure with the inserted combinations. The report shows the time taken to build each
+filter and the false positive rate measured with both kinds of probes.
+
+Usage:
+    python -m benchmarks.hash_scheme_benchmark -n 20 -t 11
+"""
+
+import argparse
+import math
+import random
+import secrets
+import time
+from typing import List
+
+import numpy as np
+
+from benchmarks.filter_benchmark import BATCH_SIZE, random_keys
+from src.bloom_filter import DOUBLE, LINEAR, BloomFilter, linear_hash, to_keys
+from src.filter_planner import count_combinations
+from src.filters import create_filter
+from src.generic_protocols.generic_final_voter import fill_filter
+from src.subset_enumeration import threshold_subset_xors
+
+
+def subset_probes(vote_representations: List[int], threshold: int, count: int) -> np.ndarray:
+    """
+    Generate the XORs of subsets drawn uniformly from those below the threshold.
+
+    These are the combined votes of elections in which every voter votes at random and the
+    threshold is not reached.
+
+    Args:
+        vote_representations (List[int]): The vote representations to combine.
+        threshold (int): The smallest subset size that reaches the threshold.
+        count (int): The number of probes.
+
+    Returns:
+        np.ndarray: A (count, 32) array of uint8 keys.
+    """
+    n: int = len(vote_representations)
+    sizes: List[int] = random.choices(range(threshold),
+                                      weights=[math.comb(n, k) for k in range(threshold)], k=count)
+    probes: List[int] = []
+    for size in sizes:
+        xor: int = 0
+        for vote_rep in random.sample(vote_representations, size):
+            xor ^= vote_rep
+        probes.append(xor)
+    return to_keys(probes)
+
+
+def false_positive_rate(bloom_filter: BloomFilter, probes: np.ndarray) -> float:
+    """
+    Measure the fraction of probes a filter reports as members.
+
+    Args:
+        bloom_filter (BloomFilter): The filter to probe.
+        probes (np.ndarray): Keys that were not inserted.
+
+    Returns:
+        float: The measured false positive rate.
+    """
+    false_positives: int = 0
+    for start in range(0, len(probes), BATCH_SIZE):
+        false_positives += int(bloom_filter.check_many(probes[start:start + BATCH_SIZE]).sum())
+    return false_positives / len(probes)
+
+
+def benchmark(hash_scheme: str, vote_representations: List[int], threshold: int,
+              random_probes: np.ndarray, below_probes: np.ndarray) -> None:
+    """
+    Build a Bloom Filter of the vote combinations with a hash scheme and report its speed and
+    accuracy.
+
+    Args:
+        hash_scheme (str): The hash scheme, 'double' or 'linear'.
+        vote_representations (List[int]): The vote representations of every voter.
+        threshold (int): The threshold of the election.
+        random_probes (np.ndarray): Random keys, used to measure false positives.
+        below_probes (np.ndarray): The XORs of subsets below the threshold, used to measure false
+                                   positives.
+    """
+    elements: int = count_combinations(len(vote_representations), threshold)
+
+    time1: float = time.perf_counter()
+    bloom_filter: BloomFilter = create_filter(BloomFilter.backend, elements,
+                                              hash_scheme=hash_scheme)
+    if hash_scheme == LINEAR:
+        hashes: List[int] = [linear_hash(vote_rep) for vote_rep in vote_representations]
+        fill_filter(bloom_filter, threshold_subset_xors(hashes, threshold), hashed=True)
+    else:
+        fill_filter(bloom_filter, threshold_subset_xors(vote_representations, threshold))
+    time2: float = time.perf_counter()
+
+    print(f"{hash_scheme:>6}: build {time2 - time1:7.3f}s "
+          f"({elements / (time2 - time1):10.0f} combinations/s), "
+          f"false positive rate {false_positive_rate(bloom_filter, random_probes):.4%} on random "
+          f"keys, {false_positive_rate(bloom_filter, below_probes):.4%} on subsets below the "
+          f"threshold")
+
+
+def main() -> None:
+    """
+    Parse command-line arguments and benchmark every hash scheme that takes fixed-width keys.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('-n',
+                        type=int,
+                        default=20,
+                        help="Set the number of voters (default is 20)"
+                        )
+    parser.add_argument('-t',
+                        type=int,
+                        required=False,
+                        help="Set the threshold (default is simple majority)"
+                        )
+    parser.add_argument('-p',
+                        type=int,
+                        default=1000000,
+                        help="Set the number of probes of each kind (default is 1000000)"
+                        )
+    args: argparse.Namespace = parser.parse_args()
+    threshold: int = args.t if args.t else (args.n // 2) + 1
+
+    vote_representations: List[int] = [secrets.randbits(256) for _ in range(args.n)]
+    random_probes: np.ndarray = random_keys(args.p)
+    below_probes: np.ndarray = subset_probes(vote_representations, threshold, args.p)
+    print(f"Benchmarking hash schemes with {args.n} voters, a threshold of {threshold} and "
+          f"{args.p} probes of each kind")
+    for hash_scheme in (DOUBLE, LINEAR):
+        benchmark(hash_scheme, vote_representations, threshold, random_probes, below_probes)
+
+
+if __name__ == "__main__":
+    main()
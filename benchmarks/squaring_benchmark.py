@@ -0,0 +1,71 @@
+"""
+Benchmark of the squaring backends the Tallier unlocks time-locked votes with.
+
+Every backend available on the host squares the same random value modulo the same random modulus
+the same number of times, as in solving a time-lock puzzle. The report shows the time taken and the
+squarings per second each backend achieves, its speedup over squaring in a Python loop, and checks
+that every backend reaches the same result. The report ends with the squarings per second the
+backend the Tallier uses sustains over a longer run, the rate to set in main.py so that a vote stays
+locked for as long as intended.
+
+Usage:
+    python -m benchmarks.squaring_benchmark -s 1000000 --seconds 5
+"""
+
+import argparse
+import secrets
+import time
+
+from src.helpers import generate_modulus
+from src.squaring import (AUTO, PYTHON, available_backends, measure_squarings_per_second,
+                          repeated_squaring, resolve_backend)
+
+
+def main() -> None:
+    """
+    Parse command-line arguments and benchmark every squaring backend available on the host.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('-s',
+                        type=int,
+                        default=1000000,
+                        help="Set the number of squarings (default is 1000000)"
+                        )
+    parser.add_argument('--modulus-bits',
+                        type=int,
+                        default=128,
+                        help="Set the bit length of the modulus (default is 128)"
+                        )
+    parser.add_argument('--seconds',
+                        type=float,
+                        default=2.0,
+                        help="Set the time to measure the rate of the Tallier's backend for "
+                             "(default is 2)"
+                        )
+    args: argparse.Namespace = parser.parse_args()
+
+    n, _ = generate_modulus(args.modulus_bits)
+    a: int = secrets.randbelow(n - 2) + 2
+    print(f"Benchmarking squaring backends with {args.s} squarings modulo a "
+          f"{args.modulus_bits}-bit modulus")
+
+    results: dict[str, int] = {}
+    seconds: dict[str, float] = {}
+    # The Python loop goes first, as the baseline of every speedup
+    for backend in [PYTHON] + [backend for backend in available_backends() if backend != PYTHON]:
+        time1: float = time.perf_counter()
+        results[backend] = repeated_squaring(a, args.s, n, backend)
+        time2: float = time.perf_counter()
+        seconds[backend] = time2 - time1
+        print(f"{backend:>12}: {seconds[backend]:7.3f}s ({args.s / seconds[backend]:10.0f} "
+              f"squarings/s), {seconds[PYTHON] / seconds[backend]:5.1f}x the Python loop")
+
+    print(f"Results identical: {len(set(results.values())) == 1}")
+
+    rate: float = measure_squarings_per_second(AUTO, args.modulus_bits, args.seconds)
+    print(f"Squarings per second of the Tallier's backend, {resolve_backend(AUTO)}, over "
+          f"{args.seconds}s: {rate:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,69 @@ Arguments:
     -g : Run the generic variant with a variable threshold
     -n : Set the number of voters (required)
     -t : Set the threshold (only for generic variants; defaults to simple majority)
+    -w : Set the number of processes used to build the Bloom Filter (only for generic variants)
+    -b : Set the Bloom Filter backend, 'auto', 'bloom', 'blocked', 'binary_fuse' or 'exact' (only
+         for generic variants)
+    -x : Set the largest number of vote combinations stored exactly instead of in a Bloom Filter
+         (only for generic variants)
+    --fp-rate : Set the false positive rate of the Bloom Filter (only for generic variants)
+    --memory-budget : Set the most memory in MiB the Bloom Filter may take to build (only for
+                      generic variants)
+    --time-budget : Set the most time in seconds the Bloom Filter may take to build (only for
+                    generic variants)
+    --filter-file : Build the Bloom Filter in a memory-mapped file at the given path (only for
+                    generic variants)
+    --send-path : Send the Tallier the path of the filter file instead of the filter (requires
+                  --filter-file)
+    --shared-memory : Build the Bloom Filter in shared memory and send the Tallier only the name of
+                      the segment (only for generic variants; not with --filter-file)
+    --codec : Set the codec the Bloom Filter is compressed with on the wire (only for generic
+              variants)
+    --hash-count : Set the number of hash functions of a standard Bloom Filter, fewer giving a
+                   larger filter that compresses better (only for generic variants)
+    --hash-scheme : Set how a standard Bloom Filter derives bit indices, 'double' to hash every
+                    vote combination with MurmurHash3 or 'linear' to enumerate the XORs of the
+                    voters' linear hashes instead (only for generic variants)
+    --prf-mode : Set the PRF every party derives its masking values and votes with, 'compatible'
+                 for SHA-256 over the text of the key and input, or 'hmac' or 'blake2' for a keyed
+                 hash over a binary encoding of the input (only for generic variants)
+    --prf-table : Look the masking values and votes up in a precomputed PRF table in this file,
+                  deriving it first with -w processes if it does not cover the election (only
+                  for generic variants; requires --key-file)
+    --prf-offsets : Set the number of consecutive offsets from 0 the PRF table holds
+    --key-file : Read the shared PRF key from this file, creating it if it does not exist (only for
+                 generic variants)
+    --cache-dir : Load the Bloom Filter from, and store it in, a cache of prebuilt filters in this
+                  directory (only for generic variants; requires --key-file)
+    --cache-size : Set the most MiB the filter cache may take before the least recently used
+                   filters are evicted
+    --layered : Build a Bloom Filter layered by subset size, which the Tallier can query at any
+                threshold from the given lowest layer up, 1 if none is given (only for generic
+                variants)
+    --inverted : Build the Bloom Filter of the vote combinations below the threshold instead, when
+                 there are fewer of them, as with a low threshold (only for generic variants; not
+                 with --layered)
+    --capacity : Size the Bloom Filter for up to this many voters, so that a cached filter can be
+                 grown as voters join instead of being rebuilt (only for generic variants; the
+                 threshold must be given with -t to stay the same as voters join)
+    --counting : Build the Bloom Filter with 4-bit counters, so that a cached filter of more voters
+                 can be shrunk as voters leave, and send the Tallier the standard filter exported
+                 from them (only for generic variants; not with --filter-file)
+    --prebuild : Only build the Bloom Filter and store it in the cache, without running an
+                 election (requires -g, --key-file and --cache-dir)
+    --modulus-bits : Set the bit length of the moduli of the voters' time-lock puzzles (only for
+                     dropout resilient variants)
+    --squaring-backend : Set the backend the Tallier squares with to unlock time-locked votes,
+                         'auto', 'gmpy2' (when installed), 'pycryptodome', 'pow' or 'python'
+                         (only for dropout resilient variants)
+    --checkpoint-file : Keep the Tallier's election in this state file, the votes it receives and
+                        its progress unlocking them, so that a Tallier restarted with the same file
+                        resumes the unfinished election, skipping the votes already unlocked (only
+                        for dropout resilient variants)
+    --checkpoint-interval : Set the number of squarings between checkpoints
+    --prime-pool : Take the primes of the voters' moduli from a pool kept in this file and refilled
+                   by a background process, instead of generating them in every voter (only for
+                   dropout resilient variants)
 
 Usage examples:
     Run original efficient variant:
@@ -20,15 +83,35 @@ Usage examples:
 
     Run dropout resilient generic variant with custom threshold:
         python main.py -dr -g -n 10 -t 7
+
+    Run dropout resilient efficient variant with 256-bit moduli from a prime pool:
+        python main.py -dr -e -n 10 --modulus-bits 256 --prime-pool primes.json
+
+    Prebuild the Bloom Filter of an election, then run it with the prebuilt filter:
+        python main.py -o -g -n 22 --key-file election.key --cache-dir filters --prebuild
+        python main.py -o -g -n 22 --key-file election.key --cache-dir filters
 """
 
 import argparse
+import time
+from typing import Optional
 
+from src.bloom_filter import DEFAULT_FP_RATE, DOUBLE, LINEAR
+from src.filter_cache import DEFAULT_CACHE_BYTES, FilterCache
+from src.filter_planner import AUTO, FilterPlan, FilterPlanError, plan_filter
+from src.filter_transfer import NO_CODEC, available_codecs
+from src.filters import DEFAULT_EXACT_LIMIT, FILTER_BACKENDS
+from src.generic_protocols.generic_prebuild import generic_prebuild
+from src.helpers import COMPATIBLE, PRF_MODES, read_key_file
 from src.new_protocol.efficient.new_efficient import new_efficient
 from src.new_protocol.generic.new_generic import new_generic
 from src.original_protocol.efficient.original_efficient import \
     original_efficient
 from src.original_protocol.generic.original_generic import original_generic
+from src.prf_table import PRFTable, load_prf_table
+from src.prime_pool import PrimePool
+from src.squaring import AUTO as AUTO_SQUARING, available_backends
+from src.unlock_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, unfinished_votes
 
 
 def main() -> None:
@@ -74,21 +157,274 @@ def main() -> None:
                         required=False,
                         help="Set the threshold- only for generic variants (default is simple majority)"
                         )
+    parser.add_argument('-w',
+                        type=int,
+                        default=1,
+                        help="Set the number of processes used to build the Bloom Filter- only for "
+                             "generic variants (default is 1)"
+                        )
+    parser.add_argument('-b',
+                        choices=[AUTO] + sorted(FILTER_BACKENDS),
+                        default=AUTO,
+                        help="Set the Bloom Filter backend- only for generic variants (default is "
+                             "auto, which picks the fastest backend that fits the budgets)"
+                        )
+    parser.add_argument('-x',
+                        type=int,
+                        default=DEFAULT_EXACT_LIMIT,
+                        help="Set the largest number of vote combinations stored exactly instead "
+                             f"of in a Bloom Filter- only for generic variants (default is "
+                             f"{DEFAULT_EXACT_LIMIT}, 0 disables)"
+                        )
+    parser.add_argument('--fp-rate',
+                        type=float,
+                        default=DEFAULT_FP_RATE,
+                        help="Set the false positive rate of the Bloom Filter- only for generic "
+                             f"variants (default is {DEFAULT_FP_RATE})"
+                        )
+    parser.add_argument('--memory-budget',
+                        type=int,
+                        required=False,
+                        help="Set the most memory in MiB the Bloom Filter may take to build- only "
+                             "for generic variants (default is the physical memory)"
+                        )
+    parser.add_argument('--time-budget',
+                        type=float,
+                        required=False,
+                        help="Set the most time in seconds the Bloom Filter may take to build- "
+                             "only for generic variants (default is no limit)"
+                        )
+    parser.add_argument('--filter-file',
+                        required=False,
+                        help="Build the Bloom Filter in a memory-mapped file at this path- only "
+                             "for generic variants (default is in memory)"
+                        )
+    parser.add_argument('--send-path',
+                        action="store_true",
+                        help="Send the Tallier the path of the filter file instead of the filter- "
+                             "requires --filter-file"
+                        )
+    parser.add_argument('--shared-memory',
+                        action="store_true",
+                        help="Build the Bloom Filter in shared memory and send the Tallier only "
+                             "the name of the segment- only for generic variants, not with "
+                             "--filter-file"
+                        )
+    parser.add_argument('--codec',
+                        choices=available_codecs(),
+                        default=NO_CODEC,
+                        help="Set the codec the Bloom Filter is compressed with on the wire- only "
+                             "for generic variants (default is none)"
+                        )
+    parser.add_argument('--hash-count',
+                        type=int,
+                        required=False,
+                        help="Set the number of hash functions of a standard Bloom Filter, fewer "
+                             "giving a larger filter that compresses better- only for generic "
+                             "variants (default is the optimal number)"
+                        )
+    parser.add_argument('--hash-scheme',
+                        choices=[DOUBLE, LINEAR],
+                        default=DOUBLE,
+                        help="Set how a standard Bloom Filter derives bit indices, 'linear' "
+                             "enumerating the XORs of the voters' linear hashes instead of hashing "
+                             "every vote combination- only for generic variants (default is double)"
+                        )
+
+    parser.add_argument('--prf-mode',
+                        choices=PRF_MODES,
+                        default=COMPATIBLE,
+                        help="Set the PRF every party derives its masking values and votes with, "
+                             "'hmac' or 'blake2' keying the hash once over a binary encoding of "
+                             "the input- only for generic variants (default is compatible)"
+                        )
+    parser.add_argument('--prf-table',
+                        required=False,
+                        help="Look the masking values and votes up in a precomputed PRF table in "
+                             "this file, deriving it first if it does not cover the election- "
+                             "only for generic variants, requires --key-file (default is no table)"
+                        )
+    parser.add_argument('--prf-offsets',
+                        type=int,
+                        default=1,
+                        help="Set the number of consecutive offsets from 0 the PRF table holds "
+                             "(default is 1)"
+                        )
+    parser.add_argument('--key-file',
+                        required=False,
+                        help="Read the shared PRF key from this file, creating it if it does not "
+                             "exist- only for generic variants (default is a new random key)"
+                        )
+    parser.add_argument('--cache-dir',
+                        required=False,
+                        help="Load the Bloom Filter from, and store it in, a cache of prebuilt "
+                             "filters in this directory- requires --key-file (default is no cache)"
+                        )
+    parser.add_argument('--cache-size',
+                        type=int,
+                        default=DEFAULT_CACHE_BYTES // 2**20,
+                        help="Set the most MiB the filter cache may take before the least recently "
+                             f"used filters are evicted (default is {DEFAULT_CACHE_BYTES // 2**20})"
+                        )
+    parser.add_argument('--layered',
+                        type=int,
+                        nargs='?',
+                        const=1,
+                        metavar='LOWEST',
+                        help="Build a Bloom Filter layered by subset size, which the Tallier can "
+                             "query at any threshold from LOWEST up- only for generic variants "
+                             "(default is a filter for the threshold only, LOWEST defaults to 1)"
+                        )
+    parser.add_argument('--inverted',
+                        action="store_true",
+                        help="Build the Bloom Filter of the vote combinations below the threshold "
+                             "instead, when there are fewer of them- only for generic variants, "
+                             "not with --layered"
+                        )
+    parser.add_argument('--capacity',
+                        type=int,
+                        required=False,
+                        help="Size the Bloom Filter for up to this many voters, so that a cached "
+                             "filter can be grown as voters join- only for generic variants "
+                             "(default is the number of voters)"
+                        )
+    parser.add_argument('--counting',
+                        action="store_true",
+                        help="Build the Bloom Filter with 4-bit counters, so that a cached filter "
+                             "of more voters can be shrunk as voters leave- only for generic "
+                             "variants, not with --filter-file"
+                        )
+    parser.add_argument('--prebuild',
+                        action="store_true",
+                        help="Only build the Bloom Filter and store it in the cache, without "
+                             "running an election- requires -g, --key-file and --cache-dir"
+                        )
+    parser.add_argument('--modulus-bits',
+                        type=int,
+                        default=128,
+                        help="Set the bit length of the moduli of the voters' time-lock puzzles- "
+                             "only for dropout resilient variants (default is 128)"
+                        )
+    parser.add_argument('--prime-pool',
+                        required=False,
+                        help="Take the primes of the voters' moduli from a pool kept in this file "
+                             "and refilled in the background- only for dropout resilient variants "
+                             "(default is generating them in every voter)"
+                        )
+    parser.add_argument('--squaring-backend',
+                        choices=[AUTO_SQUARING] + available_backends(),
+                        default=AUTO_SQUARING,
+                        help="Set the backend the Tallier squares with to unlock time-locked "
+                             "votes- only for dropout resilient variants (default is auto, the "
+                             "fastest available)"
+                        )
+    parser.add_argument('--checkpoint-file',
+                        required=False,
+                        help="Keep the Tallier's election in this state file, resuming the "
+                             "unfinished election already in it- only for dropout resilient "
+                             "variants (default is no state file)"
+                        )
+    parser.add_argument('--checkpoint-interval',
+                        type=int,
+                        default=DEFAULT_CHECKPOINT_INTERVAL,
+                        help="Set the number of squarings between checkpoints (default is "
+                             f"{DEFAULT_CHECKPOINT_INTERVAL})"
+                        )
 
     args: argparse.Namespace = parser.parse_args()
 
     threshold: int = args.t if args.t else (args.n // 2) + 1
 
-    if args.o and args.e:
-        original_efficient(args.n)
-    elif args.o and args.g:
-        original_generic(args.n, threshold)
-    elif args.dr and args.e:
-        new_efficient(args.n, squarings_per_second)
-    elif args.dr and args.g:
-        new_generic(args.n, threshold, squarings_per_second)
-    else:
-        print("Invalid combination of flags")
+    if args.send_path and not args.filter_file:
+        parser.error("--send-path requires --filter-file")
+    if args.shared_memory and args.filter_file:
+        parser.error("--shared-memory cannot be used with --filter-file")
+    # A prebuilt filter is only stored in the cache, and a run with --shared-memory loads it
+    if args.shared_memory and args.prebuild:
+        parser.error("--shared-memory cannot be used with --prebuild")
+    # A filter built with a random key could never be loaded again
+    if args.cache_dir and not args.key_file:
+        parser.error("--cache-dir requires --key-file")
+    if args.prf_table and not args.key_file:
+        parser.error("--prf-table requires --key-file")
+    if args.prf_offsets < 1:
+        parser.error("--prf-offsets must be at least 1")
+    if args.prebuild and not (args.g and args.cache_dir):
+        parser.error("--prebuild requires -g and --cache-dir")
+    if args.layered is not None and not 1 <= args.layered <= threshold:
+        parser.error(f"--layered must be between 1 and the threshold, {threshold}")
+    if args.inverted and args.layered is not None:
+        parser.error("--inverted cannot be used with --layered")
+    if args.counting and args.filter_file:
+        parser.error("--counting cannot be used with --filter-file")
+    if args.capacity is not None and args.capacity < args.n:
+        parser.error(f"--capacity must be at least the number of voters, {args.n}")
+    if args.modulus_bits < 32 or args.modulus_bits % 2:
+        parser.error("--modulus-bits must be an even number of at least 32")
+    if args.checkpoint_interval < 1:
+        parser.error("--checkpoint-interval must be at least 1")
+    if args.checkpoint_file:
+        # The voters of an unfinished election are gone, so its missing votes can never arrive
+        unfinished: int = unfinished_votes(args.checkpoint_file)
+        if unfinished and unfinished != args.n:
+            parser.error(f"{args.checkpoint_file} holds {unfinished} votes of an unfinished "
+                         f"election that cannot be finished with {args.n} voters; remove it to "
+                         f"start a new one")
+
+    if args.g:
+        # Refuse an election whose Bloom Filter cannot be built before any party is started
+        memory_budget: Optional[int] = args.memory_budget * 2**20 if args.memory_budget else None
+        try:
+            # A layered filter is planned for its lowest layer, covering every threshold above
+            plan: FilterPlan = plan_filter(args.n,
+                                           threshold if args.layered is None else args.layered,
+                                           args.fp_rate, args.b, args.w, args.x, memory_budget,
+                                           args.time_budget, args.filter_file is not None,
+                                           args.hash_count, args.codec, args.layered is not None,
+                                           args.shared_memory, args.inverted, args.hash_scheme,
+                                           args.capacity, args.counting)
+        except FilterPlanError as error:
+            parser.error(str(error))
+        key: Optional[bytes] = read_key_file(args.key_file) if args.key_file else None
+        cache: Optional[FilterCache] = (FilterCache(args.cache_dir, args.cache_size * 2**20)
+                                        if args.cache_dir else None)
+        prf_table: Optional[PRFTable] = None
+        if args.prf_table:
+            time1: float = time.perf_counter()
+            prf_table = load_prf_table(args.prf_table, key, args.prf_mode, args.prf_offsets,
+                                       args.n, args.w)
+            time2: float = time.perf_counter()
+            print(f"Time taken to load PRF table of {prf_table.offsets} offset(s) and "
+                  f"{prf_table.voters} voters: {time2-time1}")
+
+    # Every voter but the FinalVoter takes two primes, and the pool keeps the rest for the next run
+    prime_pool: Optional[PrimePool] = (PrimePool(args.prime_pool, args.modulus_bits // 2,
+                                                 2 * (args.n - 1))
+                                       if args.prime_pool and args.dr else None)
+
+    try:
+        if args.prebuild:
+            generic_prebuild(args.n, threshold, key, cache, args.w, plan, args.filter_file,
+                             args.prf_mode, prf_table)
+        elif args.o and args.e:
+            original_efficient(args.n)
+        elif args.o and args.g:
+            original_generic(args.n, threshold, args.w, plan, args.filter_file, args.send_path, key,
+                             cache, args.prf_mode, prf_table)
+        elif args.dr and args.e:
+            new_efficient(args.n, squarings_per_second, args.modulus_bits, prime_pool,
+                          args.squaring_backend, args.checkpoint_file, args.checkpoint_interval)
+        elif args.dr and args.g:
+            new_generic(args.n, threshold, squarings_per_second, args.w, plan, args.filter_file,
+                        args.send_path, key, cache, args.prf_mode, prf_table, args.modulus_bits,
+                        prime_pool, args.squaring_backend, args.checkpoint_file,
+                        args.checkpoint_interval)
+        else:
+            print("Invalid combination of flags")
+    finally:
+        # The pool keeps its primes for the next run, and never hands out those already taken
+        if prime_pool is not None:
+            prime_pool.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,646 @@
+"""
+Binary Fuse Filter implementation for use in the generic variants of the e-voting protocol.
+
+The set of valid vote combinations is fully known before the FinalVoter sends it and never
+changes, so a static filter can be used instead of a Bloom Filter. A Binary Fuse Filter (Graf and
+Lemire, 2022) stores one small fingerprint per slot in an array of about 1.125 slots per element.
+An element is a member when the XOR of the fingerprints in its three slots equals its own
+fingerprint, so every check costs exactly three memory probes. With 8-bit fingerprints the filter
+takes about 9 bits per element for a false positive rate of 1/256, and with 16-bit fingerprints
+about 18 bits per element for a rate of 1/65536.
+
+Elements are the same fixed-width 32-byte keys used by the Bloom Filters. Each key is folded into a
+64-bit base hash once; building the filter then only ever works with the base hashes, remixing
+them with a fresh seed whenever construction has to be retried.
+
+Classes:
+    BinaryFuseBuilder: Collects the elements of a Binary Fuse Filter before it is built.
+    BinaryFuseFilter: Implements a Binary Fuse Filter with methods to check for elements.
+
+Functions:
+    fingerprint_bits_for(fp_rate: float) -> int:
+        Returns the narrowest fingerprint width that reaches a false positive rate.
+"""
+
+import struct
+from math import floor, log
+import numpy as np
+from src.bloom_filter import KEY_BYTES, Buffer, header_page, parse_header_page, payload_view
+
+_MASK_64: int = 2**64 - 1
+_ARITY: int = 3
+_MAX_SEGMENT_LENGTH: int = 262144
+_MAX_ATTEMPTS: int = 100
+_HEADER: struct.Struct = struct.Struct('<4sBQIII')
+_MAGIC: bytes = b'BFUS'
+
+
+def _mix(value: int) -> int:
+    """
+    Mix a 64-bit value with the MurmurHash3 finalizer.
+
+    Args:
+        value (int): The value to mix.
+
+    Returns:
+        int: The mixed 64-bit value.
+    """
+    value ^= value >> 33
+    value = (value * 0xff51afd7ed558ccd) & _MASK_64
+    value ^= value >> 33
+    value = (value * 0xc4ceb9fe1a85ec53) & _MASK_64
+    value ^= value >> 33
+    return value
+
+
+def _mix_many(values: np.ndarray) -> np.ndarray:
+    """
+    Mix an array of 64-bit values with the MurmurHash3 finalizer.
+
+    Args:
+        values (np.ndarray): The uint64 values to mix.
+
+    Returns:
+        np.ndarray: The mixed uint64 values.
+    """
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xff51afd7ed558ccd)
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xc4ceb9fe1a85ec53)
+    return values ^ (values >> np.uint64(33))
+
+
+def _split_mix(state: int) -> tuple[int, int]:
+    """
+    Advance a SplitMix64 generator, used to draw construction seeds.
+
+    Args:
+        state (int): The current state.
+
+    Returns:
+        tuple[int, int]: The next state and the seed it produced.
+    """
+    state = (state + 0x9e3779b97f4a7c15) & _MASK_64
+    value: int = state
+    value = ((value ^ (value >> 30)) * 0xbf58476d1ce4e5b9) & _MASK_64
+    value = ((value ^ (value >> 27)) * 0x94d049bb133111eb) & _MASK_64
+    return state, value ^ (value >> 31)
+
+
+def base_hashes(keys: np.ndarray) -> np.ndarray:
+    """
+    Fold a batch of fixed-width keys into 64-bit base hashes.
+
+    The four 64-bit words of each key are mixed in one after another, so every bit of the key
+    affects the result.
+
+    Args:
+        keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+
+    Returns:
+        np.ndarray: One uint64 base hash per key.
+    """
+    words: np.ndarray = np.ascontiguousarray(keys, dtype=np.uint8).view('<u8')
+    hashes: np.ndarray = np.zeros(len(words), dtype=np.uint64)
+    for column in range(KEY_BYTES // 8):
+        hashes = _mix_many(hashes ^ words[:, column])
+    return hashes
+
+
+def base_hash(item: int) -> int:
+    """
+    Fold an integer below 2^256 into its 64-bit base hash, matching base_hashes.
+
+    Args:
+        item (int): The item to hash.
+
+    Returns:
+        int: The base hash.
+    """
+    value: int = 0
+    for column in range(KEY_BYTES // 8):
+        value = _mix(value ^ ((item >> (64 * column)) & _MASK_64))
+    return value
+
+
+def fingerprint_bits_for(fp_rate: float) -> int:
+    """
+    Return the narrowest fingerprint width that reaches a false positive rate.
+
+    Args:
+        fp_rate (float): The target false positive rate.
+
+    Returns:
+        int: 8 or 16.
+
+    Raises:
+        ValueError: If even 16-bit fingerprints cannot reach the rate.
+    """
+    for fingerprint_bits in (8, 16):
+        if fp_rate >= 2.0 ** -fingerprint_bits:
+            return fingerprint_bits
+    raise ValueError(f"Binary Fuse Filters cannot reach a false positive rate of {fp_rate}")
+
+
+class BinaryFuseBuilder:
+    """
+    Collects the base hashes of the elements of a Binary Fuse Filter before it is built.
+
+    Offers the same add_many and merge methods as a Bloom Filter, so it can be filled the same way,
+    including by several worker processes whose builders are merged.
+
+    Attributes:
+        fingerprint_bits (int): The width of the fingerprints, 8 or 16 bits.
+        hashes (list[np.ndarray]): The batches of base hashes collected so far.
+
+    Methods:
+        add_many(keys: np.ndarray) -> None:
+            Adds a batch of fixed-width keys to the filter being built.
+
+        merge(other: BinaryFuseBuilder) -> None:
+            Adds the keys collected by another builder.
+
+        build() -> BinaryFuseFilter:
+            Builds the Binary Fuse Filter from the collected keys.
+    """
+
+    def __init__(self, fingerprint_bits: int = 8) -> None:
+        """
+        Initialize an empty Binary Fuse Filter builder.
+
+        Args:
+            fingerprint_bits (int): The width of the fingerprints, 8 or 16 bits.
+
+        Raises:
+            ValueError: If the fingerprint width is not supported.
+        """
+        if fingerprint_bits not in (8, 16):
+            raise ValueError("Binary Fuse Filters support 8 or 16 bit fingerprints")
+        self.fingerprint_bits: int = fingerprint_bits
+        self.hashes: list[np.ndarray] = []
+
+    def add_many(self, keys: np.ndarray) -> None:
+        """
+        Add a batch of fixed-width keys to the filter being built.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+        """
+        self.hashes.append(base_hashes(keys))
+
+    def merge(self, other: 'BinaryFuseBuilder') -> None:
+        """
+        Add the keys collected by another builder.
+
+        Args:
+            other (BinaryFuseBuilder): A builder with the same fingerprint width.
+
+        Raises:
+            ValueError: If the builders use different fingerprint widths.
+        """
+        if self.fingerprint_bits != other.fingerprint_bits:
+            raise ValueError("Binary Fuse builders must use the same fingerprint width to be "
+                             "merged")
+        self.hashes.extend(other.hashes)
+
+    def build(self) -> 'BinaryFuseFilter':
+        """
+        Build the Binary Fuse Filter from the collected keys.
+
+        Returns:
+            BinaryFuseFilter: The built filter.
+        """
+        hashes: np.ndarray = (np.concatenate(self.hashes) if self.hashes
+                              else np.zeros(0, dtype=np.uint64))
+        return BinaryFuseFilter.from_hashes(hashes, self.fingerprint_bits)
+
+
+class BinaryFuseFilter:
+    """
+    Binary Fuse Filter class for checking membership of a static set of elements.
+
+    Attributes:
+        seed (int): The seed mixed into every base hash.
+        segment_length (int): The number of slots per segment, a power of two.
+        segment_count_length (int): The number of slots that the first probe can land in.
+        fingerprint_bits (int): The width of the fingerprints, 8 or 16 bits.
+        fingerprints (np.ndarray): The array of fingerprints.
+        size (int): The size of the fingerprint array in bits.
+        hash_count (int): The number of probes per check, always 3.
+
+    Methods:
+        check(item: int) -> bool:
+            Checks if an item is possibly in the Binary Fuse Filter.
+
+        check_many(keys: np.ndarray) -> np.ndarray:
+            Checks a batch of fixed-width keys against the Binary Fuse Filter.
+
+        layout(size: int) -> tuple[int, int, int]:
+            Computes the segment layout for a number of elements.
+
+        from_hashes(hashes: np.ndarray, fingerprint_bits: int) -> BinaryFuseFilter:
+            Builds a Binary Fuse Filter from the base hashes of its elements.
+
+        header() -> dict:
+            Returns the parameters of the Binary Fuse Filter without its fingerprints.
+
+        buffer() -> memoryview:
+            Returns a view of the bytes of the fingerprint array.
+
+        empty(header: dict) -> BinaryFuseFilter:
+            Creates an empty BinaryFuseFilter instance from the parameters returned by header.
+
+        to_buffer() -> bytes:
+            Converts the BinaryFuseFilter instance into the binary format shared by every backend.
+
+        from_buffer(buffer: Buffer) -> BinaryFuseFilter:
+            Creates a BinaryFuseFilter instance around a buffer made by to_buffer, without copying
+            it.
+
+        to_dict() -> dict:
+            Converts the BinaryFuseFilter instance into a dictionary for serialization.
+
+        from_dict(data_dict: dict) -> BinaryFuseFilter:
+            Creates a BinaryFuseFilter instance from a dictionary.
+
+        to_bytes() -> bytes:
+            Converts the BinaryFuseFilter instance into its compact binary format.
+
+        from_bytes(data: bytes) -> BinaryFuseFilter:
+            Creates a BinaryFuseFilter instance from its compact binary format.
+    """
+
+    backend: str = 'binary_fuse'
+    hash_count: int = _ARITY
+
+    def __init__(self, seed: int, segment_length: int, segment_count_length: int,
+                 fingerprints: np.ndarray) -> None:
+        """
+        Initialize a Binary Fuse Filter from its parameters and fingerprint array.
+
+        Args:
+            seed (int): The seed mixed into every base hash.
+            segment_length (int): The number of slots per segment, a power of two.
+            segment_count_length (int): The number of slots that the first probe can land in.
+            fingerprints (np.ndarray): The uint8 or uint16 array of fingerprints.
+        """
+        self.seed: int = seed
+        self.segment_length: int = segment_length
+        self.segment_count_length: int = segment_count_length
+        self.fingerprints: np.ndarray = fingerprints
+        self.fingerprint_bits: int = fingerprints.dtype.itemsize * 8
+        self.size: int = len(fingerprints) * self.fingerprint_bits
+
+    @staticmethod
+    def layout(size: int) -> tuple[int, int, int]:
+        """
+        Compute the segment layout for a number of elements.
+
+        Args:
+            size (int): The number of elements.
+
+        Returns:
+            tuple[int, int, int]: The segment length, the number of slots the first probe can land
+                                  in, and the total number of slots.
+        """
+        segment_length: int = 1 << floor(log(size) / log(3.33) + 2.25) if size > 0 else 4
+        segment_length = min(segment_length, _MAX_SEGMENT_LENGTH)
+        size_factor: float = max(1.125, 0.875 + 0.25 * log(1e6) / log(size)) if size > 1 else 0
+        capacity: int = round(size * size_factor)
+        segment_count: int = (capacity + segment_length - 1) // segment_length - (_ARITY - 1)
+        array_length: int = (segment_count + _ARITY - 1) * segment_length
+        segment_count = (array_length + segment_length - 1) // segment_length
+        segment_count = 1 if segment_count <= _ARITY - 1 else segment_count - (_ARITY - 1)
+        array_length = (segment_count + _ARITY - 1) * segment_length
+        return segment_length, segment_count * segment_length, array_length
+
+    def _slots(self, hash_value: int) -> tuple[int, int, int]:
+        """
+        Compute the three slots of a mixed hash.
+
+        Args:
+            hash_value (int): The 64-bit hash, already mixed with the seed.
+
+        Returns:
+            tuple[int, int, int]: The three slot indices.
+        """
+        h0: int = (hash_value * self.segment_count_length) >> 64
+        h1: int = (h0 + self.segment_length) ^ ((hash_value >> 18) & (self.segment_length - 1))
+        h2: int = (h0 + 2 * self.segment_length) ^ (hash_value & (self.segment_length - 1))
+        return h0, h1, h2
+
+    def _slots_many(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Compute the three slots of a batch of mixed hashes.
+
+        Args:
+            hashes (np.ndarray): The uint64 hashes, already mixed with the seed.
+
+        Returns:
+            np.ndarray: A (3, number of hashes) array of slot indices.
+        """
+        # The high 64 bits of hash * segment_count_length, split to stay within 64-bit arithmetic
+        high: np.ndarray = (hashes >> np.uint64(32)) * np.uint64(self.segment_count_length)
+        low: np.ndarray = ((hashes & np.uint64(0xffffffff)) * np.uint64(self.segment_count_length)
+                           >> np.uint64(32))
+        h0: np.ndarray = (high + low) >> np.uint64(32)
+        mask: np.uint64 = np.uint64(self.segment_length - 1)
+        h1: np.ndarray = (h0 + np.uint64(self.segment_length)) ^ ((hashes >> np.uint64(18)) & mask)
+        h2: np.ndarray = (h0 + np.uint64(2 * self.segment_length)) ^ (hashes & mask)
+        return np.stack([h0, h1, h2])
+
+    def _fingerprint(self, hash_value: int) -> int:
+        """
+        Compute the fingerprint of a mixed hash.
+
+        Args:
+            hash_value (int): The 64-bit hash, already mixed with the seed.
+
+        Returns:
+            int: The fingerprint.
+        """
+        return (hash_value ^ (hash_value >> 32)) & ((1 << self.fingerprint_bits) - 1)
+
+    def check(self, item: int) -> bool:
+        """
+        Check if an item is possibly in the Binary Fuse Filter.
+
+        Args:
+            item (int): The item to check.
+
+        Returns:
+            bool: True if the item might be in the filter, False if it is definitely not.
+        """
+        if len(self.fingerprints) == 0:
+            return False
+        hash_value: int = _mix((base_hash(item) + self.seed) & _MASK_64)
+        h0, h1, h2 = self._slots(hash_value)
+        fingerprints: np.ndarray = self.fingerprints
+        return self._fingerprint(hash_value) == int(fingerprints[h0] ^ fingerprints[h1]
+                                                    ^ fingerprints[h2])
+
+    def check_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Check a batch of fixed-width keys against the Binary Fuse Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+
+        Returns:
+            np.ndarray: A boolean array, True where a key might be in the filter.
+        """
+        if len(self.fingerprints) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        hashes: np.ndarray = _mix_many(base_hashes(keys) + np.uint64(self.seed))
+        h0, h1, h2 = self._slots_many(hashes)
+        fingerprints: np.ndarray = ((hashes ^ (hashes >> np.uint64(32)))
+                                    .astype(self.fingerprints.dtype))
+        return fingerprints == (self.fingerprints[h0] ^ self.fingerprints[h1]
+                                ^ self.fingerprints[h2])
+
+    @classmethod
+    def from_hashes(cls, hashes: np.ndarray, fingerprint_bits: int = 8) -> 'BinaryFuseFilter':
+        """
+        Build a Binary Fuse Filter from the base hashes of its elements.
+
+        Elements are peeled off slots that only one remaining element maps to, and fingerprints are
+        then assigned in reverse peeling order. If peeling gets stuck the seed is redrawn. A filter
+        of no elements has no slots, so that it holds no item.
+
+        Args:
+            hashes (np.ndarray): The uint64 base hashes of the elements, as made by base_hashes.
+            fingerprint_bits (int): The width of the fingerprints, 8 or 16 bits.
+
+        Returns:
+            BinaryFuseFilter: The built filter.
+
+        Raises:
+            RuntimeError: If no seed allows the filter to be built.
+        """
+        hashes = np.unique(hashes)
+        size: int = len(hashes)
+        segment_length, segment_count_length, array_length = cls.layout(size)
+        dtype: type = np.uint8 if fingerprint_bits == 8 else np.uint16
+        if size == 0:
+            # Without slots every check answers no, where zeroed slots would match 1 in 2^bits keys
+            return cls(0, segment_length, 0, np.zeros(0, dtype=dtype))
+        instance = cls(0, segment_length, segment_count_length, np.zeros(array_length, dtype=dtype))
+
+        state: int = 0x726b2b9d438b9d4d
+        for _ in range(_MAX_ATTEMPTS):
+            state, instance.seed = _split_mix(state)
+            order: list[tuple[int, int]] = instance._peel(hashes, array_length)
+            if len(order) == size:
+                break
+        else:
+            raise RuntimeError("Could not build the Binary Fuse Filter")
+
+        fingerprints: list[int] = [0] * array_length
+        for hash_value, found in reversed(order):
+            slots: tuple[int, int, int] = instance._slots(hash_value)
+            fingerprints[slots[found]] = (instance._fingerprint(hash_value)
+                                          ^ fingerprints[slots[(found + 1) % 3]]
+                                          ^ fingerprints[slots[(found + 2) % 3]])
+        instance.fingerprints = np.array(fingerprints, dtype=dtype)
+        return instance
+
+    def _peel(self, hashes: np.ndarray, array_length: int) -> list[tuple[int, int]]:
+        """
+        Peel elements off the slots with the current seed.
+
+        Each slot tracks how many elements map to it, the XOR of their mixed hashes and the XOR of
+        which of their three slots it is, so a slot with a single element identifies it fully.
+
+        Args:
+            hashes (np.ndarray): The distinct uint64 base hashes of the elements.
+            array_length (int): The number of slots.
+
+        Returns:
+            list[tuple[int, int]]: The peeled elements as (mixed hash, slot position) pairs, in
+                                   peeling order. Shorter than hashes if peeling got stuck.
+        """
+        mixed: np.ndarray = _mix_many(hashes + np.uint64(self.seed))
+        slots: np.ndarray = self._slots_many(mixed)
+
+        counts: np.ndarray = np.zeros(array_length, dtype=np.int64)
+        xor_hashes: np.ndarray = np.zeros(array_length, dtype=np.uint64)
+        xor_found: np.ndarray = np.zeros(array_length, dtype=np.int64)
+        for found in range(_ARITY):
+            np.add.at(counts, slots[found], 1)
+            np.bitwise_xor.at(xor_hashes, slots[found], mixed)
+            np.bitwise_xor.at(xor_found, slots[found], found)
+
+        count_list: list[int] = counts.tolist()
+        hash_list: list[int] = xor_hashes.tolist()
+        found_list: list[int] = xor_found.tolist()
+        queue: list[int] = np.flatnonzero(counts == 1).tolist()
+        order: list[tuple[int, int]] = []
+
+        while queue:
+            index: int = queue.pop()
+            if count_list[index] != 1:
+                continue
+            hash_value: int = hash_list[index]
+            found: int = found_list[index]
+            order.append((hash_value, found))
+            element_slots: tuple[int, int, int] = self._slots(hash_value)
+            for other in (1, 2):
+                other_found: int = (found + other) % 3
+                other_index: int = element_slots[other_found]
+                count_list[other_index] -= 1
+                hash_list[other_index] ^= hash_value
+                found_list[other_index] ^= other_found
+                if count_list[other_index] == 1:
+                    queue.append(other_index)
+            count_list[index] = 0
+        return order
+
+    def header(self) -> dict:
+        """
+        Return the parameters of the Binary Fuse Filter without its fingerprints.
+
+        Returns:
+            dict: A dictionary containing the filter parameters and the number of slots.
+        """
+        return {
+            'backend': self.backend,
+            'seed': self.seed,
+            'segment_length': self.segment_length,
+            'segment_count_length': self.segment_count_length,
+            'fingerprint_bits': self.fingerprint_bits,
+            'array_length': len(self.fingerprints)
+        }
+
+    def buffer(self) -> memoryview:
+        """
+        Return a view of the bytes of the fingerprint array, in little-endian order.
+
+        Returns:
+            memoryview: The bytes of the fingerprints, writable for a filter made by empty.
+        """
+        fingerprints: np.ndarray = self.fingerprints.astype(f'<u{self.fingerprint_bits // 8}',
+                                                            copy=False)
+        return memoryview(fingerprints.view(np.uint8))
+
+    @classmethod
+    def empty(cls, header: dict) -> 'BinaryFuseFilter':
+        """
+        Create an empty BinaryFuseFilter instance from the parameters returned by header.
+
+        Args:
+            header (dict): The dictionary returned by header.
+
+        Returns:
+            BinaryFuseFilter: A new instance of BinaryFuseFilter with every fingerprint zero,
+                              ready to be filled through buffer.
+        """
+        fingerprints: np.ndarray = np.zeros(header['array_length'],
+                                            dtype=f"<u{header['fingerprint_bits'] // 8}")
+        return cls(header['seed'], header['segment_length'], header['segment_count_length'],
+                   fingerprints)
+
+    def to_buffer(self) -> bytes:
+        """
+        Convert the BinaryFuseFilter instance into the binary format shared by every backend, the
+        layout of a filter file.
+
+        Returns:
+            bytes: The header page followed by the bytes of the fingerprints.
+        """
+        return b''.join((header_page(self.header()), self.buffer()))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'BinaryFuseFilter':
+        """
+        Create a BinaryFuseFilter instance around a buffer made by to_buffer, without copying it.
+
+        Args:
+            buffer (Buffer): A buffer made by to_buffer, or the bytes or memory map of a filter
+                             file.
+
+        Returns:
+            BinaryFuseFilter: A new instance of BinaryFuseFilter whose fingerprints are a view of
+                              the buffer.
+
+        Raises:
+            ValueError: If the buffer does not hold a Binary Fuse Filter.
+        """
+        header: dict = parse_header_page(buffer)
+        if header['backend'] != cls.backend:
+            raise ValueError(f"Buffer holds a {header['backend']} filter, not a {cls.backend} one")
+        fingerprint_bytes: int = header['fingerprint_bits'] // 8
+        payload: memoryview = payload_view(buffer, header['array_length'] * fingerprint_bytes)
+        fingerprints: np.ndarray = np.frombuffer(payload, dtype=f'<u{fingerprint_bytes}')
+        return cls(header['seed'], header['segment_length'], header['segment_count_length'],
+                   fingerprints)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the BinaryFuseFilter instance into a dictionary for serialization.
+
+        Returns:
+            dict: A dictionary containing the filter parameters and fingerprints as a hex string.
+        """
+        return {
+            'backend': self.backend,
+            'seed': self.seed,
+            'segment_length': self.segment_length,
+            'segment_count_length': self.segment_count_length,
+            'fingerprint_bits': self.fingerprint_bits,
+            'fingerprints': self.fingerprints.astype(f'<u{self.fingerprint_bits // 8}')
+                                             .tobytes().hex()
+        }
+
+    @classmethod
+    def from_dict(cls, data_dict: dict) -> 'BinaryFuseFilter':
+        """
+        Create a BinaryFuseFilter instance from a dictionary.
+
+        Args:
+            data_dict (dict): The dictionary produced by to_dict.
+
+        Returns:
+            BinaryFuseFilter: A new instance of BinaryFuseFilter.
+        """
+        dtype: str = f"<u{data_dict['fingerprint_bits'] // 8}"
+        fingerprints: np.ndarray = np.frombuffer(bytes.fromhex(data_dict['fingerprints']),
+                                                 dtype=dtype)
+        return cls(data_dict['seed'], data_dict['segment_length'],
+                   data_dict['segment_count_length'], fingerprints)
+
+    def to_bytes(self) -> bytes:
+        """
+        Convert the BinaryFuseFilter instance into its compact binary format.
+
+        The format is a fixed 25-byte little-endian header (magic, fingerprint width, seed,
+        segment length, first-probe slot count and slot count) followed by the raw fingerprints.
+
+        Returns:
+            bytes: The binary representation of the filter.
+        """
+        header: bytes = _HEADER.pack(_MAGIC, self.fingerprint_bits, self.seed,
+                                     self.segment_length, self.segment_count_length,
+                                     len(self.fingerprints))
+        return header + self.fingerprints.astype(f'<u{self.fingerprint_bits // 8}').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'BinaryFuseFilter':
+        """
+        Create a BinaryFuseFilter instance from its compact binary format.
+
+        Args:
+            data (bytes): The binary representation produced by to_bytes.
+
+        Returns:
+            BinaryFuseFilter: A new instance of BinaryFuseFilter.
+
+        Raises:
+            ValueError: If the data is not a Binary Fuse Filter.
+        """
+        magic, fingerprint_bits, seed, segment_length, segment_count_length, array_length = \
+            _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Data is not a Binary Fuse Filter")
+        fingerprints: np.ndarray = np.frombuffer(data, dtype=f'<u{fingerprint_bits // 8}',
+                                                 count=array_length, offset=_HEADER.size)
+        return cls(seed, segment_length, segment_count_length, fingerprints)
@@ -1,27 +1,313 @@
 """
 Bloom Filter implementation for use in the generic variants of the e-voting protocol.
 
-A Bloom Filter is a space-efficient probabilistic data structure used to test whether 
+A Bloom Filter is a space-efficient probabilistic data structure used to test whether
 an element is a member of a set. False positives are possible, but false negatives are not.
 This implementation uses MurmurHash3 (mmh3) for hash function calculations.
 
+A filter's bits can live in memory or in a memory-mapped file, which lets filters larger than
+the available memory be built and lets a reader that opens the file fault in only the pages that
+its checks touch. A filter file starts with a 4096-byte header page, holding a magic number and the
+filter parameters as JSON, followed by the bytes of the bit array. The same layout is the binary
+format of to_buffer, and from_buffer wraps a filter around any buffer in that layout, including
+a memory-mapped file, without copying its bit array.
+
+Three hashing schemes are supported. The 'seeded' scheme hashes the variable-length bytes of an item
+once per hash function. The 'double' scheme hashes a fixed-width 32-byte key once with the 128-bit
+MurmurHash3 and derives every index from the two 64-bit halves (Kirsch-Mitzenmacher double
+hashing), which lets batches of keys be inserted and checked with NumPy. The 'linear' scheme
+derives the indices in the same way from a 128-bit hash that is linear over GF(2): a fixed random
+binary matrix applied to the 256 bits of the key, computed with one table per key byte. The hash of
+the XOR of two keys is then the XOR of their hashes, so the hash of every subset of vote
+representations can be enumerated from the hashes of its members, without hashing the subsets. A
+fixed offset is XORed into a linear hash before the indices are derived from it, as the hash of
+the empty subset, a combined vote of 0, would otherwise be 0 and put every index at bit 0.
+
 Classes:
     BloomFilter: Implements a Bloom Filter with methods to add and check for elements.
+
+Functions:
+    to_keys(items: Iterable[int]) -> np.ndarray: Converts integers into fixed-width keys.
+    to_hashes(hashes: Iterable[int]) -> np.ndarray: Converts 128-bit hashes into 64-bit halves.
+    linear_hash_many(keys: np.ndarray) -> np.ndarray: Hashes fixed-width keys with the linear hash.
+    linear_hash(item: int) -> int: Hashes an integer with the linear hash.
+    read_file_header(path: str) -> dict: Reads the parameters stored in a filter file.
+    write_file_header(file: BinaryIO, header: dict) -> None: Writes a filter file's header page.
+    header_page(header: dict) -> bytes: Encodes the parameters of a filter as a header page.
+    parse_header_page(buffer: Buffer) -> dict: Decodes the header page at the start of a buffer.
+    payload_view(buffer: Buffer, payload_bytes: int) -> memoryview:
+        Returns a view of the payload that follows the header page of a buffer.
+    bloom_parameters(number_of_elements: int, fp_rate: float,
+                     hash_count: Optional[int]) -> tuple[int, int]:
+        Computes the size and hash count of a Bloom Filter.
 """
 
+import json
+import mmap
+import struct
+from functools import lru_cache
+from hashlib import sha256
+from multiprocessing.shared_memory import SharedMemory
 from math import ceil, log
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
 import mmh3
+import numpy as np
 from bitarray import bitarray
 
+SEEDED: str = 'seeded'
+DOUBLE: str = 'double'
+LINEAR: str = 'linear'
+
+KEY_BYTES: int = 32
+DEFAULT_FP_RATE: float = 0.01
+_MASK_64: int = 2**64 - 1
+
+FILE_MAGIC: bytes = b'BLMF'
+FILE_HEADER_BYTES: int = 4096
+_LENGTH: struct.Struct = struct.Struct('<I')
+
+# Objects exposing the buffer protocol that a filter can be wrapped around
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+def to_keys(items: Iterable[int]) -> np.ndarray:
+    """
+    Convert integers below 2^256 into an array of fixed-width little-endian keys.
+
+    Args:
+        items (Iterable[int]): The integers to convert.
+
+    Returns:
+        np.ndarray: A (number of items, 32) array of uint8 keys.
+    """
+    data: bytes = b''.join(item.to_bytes(KEY_BYTES, byteorder='little') for item in items)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, KEY_BYTES)
+
+
+def to_hashes(hashes: Iterable[int]) -> np.ndarray:
+    """
+    Convert 128-bit hashes into an array of their 64-bit halves.
+
+    Args:
+        hashes (Iterable[int]): The hashes, with the first half in the low 64 bits.
+
+    Returns:
+        np.ndarray: A (number of hashes, 2) array of uint64 halves.
+    """
+    data: bytes = b''.join(item.to_bytes(16, byteorder='little') for item in hashes)
+    return np.frombuffer(data, dtype='<u8').astype(np.uint64).reshape(-1, 2)
+
+
+@lru_cache(maxsize=None)
+def _linear_tables() -> np.ndarray:
+    """
+    Build the byte tables of the linear hash from its fixed random binary matrix.
+
+    The 128-bit row of each of the 256 key bits is taken from a SHA-256 digest, so that every party
+    derives the same matrix. The table entry of a byte value at a key position is the XOR of the
+    rows of its set bits.
+
+    Returns:
+        np.ndarray: A (32, 256, 2) array of uint64 hashes, indexed by key position and byte value.
+    """
+    digests: bytes = b''.join(sha256(f"linear{bit}".encode('utf-8')).digest()[:16]
+                              for bit in range(KEY_BYTES * 8))
+    rows: np.ndarray = (np.frombuffer(digests, dtype='<u8').astype(np.uint64)
+                        .reshape(KEY_BYTES, 8, 2))
+    tables: np.ndarray = np.zeros((KEY_BYTES, 256, 2), dtype=np.uint64)
+    for value in range(1, 256):
+        # Each value adds the row of its lowest set bit to the entry of the value without it
+        lowest: int = value & -value
+        tables[:, value] = tables[:, value ^ lowest] ^ rows[:, lowest.bit_length() - 1]
+    return tables
+
+
+@lru_cache(maxsize=None)
+def _linear_offset() -> np.ndarray:
+    """
+    Return the fixed offset XORed into a linear hash before bit indices are derived from it.
+
+    Returns:
+        np.ndarray: A (1, 2) array of uint64 hash halves.
+    """
+    digest: bytes = sha256(b"linear offset").digest()[:16]
+    return np.frombuffer(digest, dtype='<u8').astype(np.uint64).reshape(1, 2)
+
+
+def linear_hash_many(keys: np.ndarray) -> np.ndarray:
+    """
+    Hash a batch of fixed-width keys with the linear hash.
+
+    Args:
+        keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+
+    Returns:
+        np.ndarray: A (number of keys, 2) array holding the two 64-bit halves of each hash.
+    """
+    tables: np.ndarray = _linear_tables()
+    hashes: np.ndarray = np.zeros((len(keys), 2), dtype=np.uint64)
+    for position in range(KEY_BYTES):
+        hashes ^= tables[position][keys[:, position]]
+    return hashes
+
+
+def linear_hash(item: int) -> int:
+    """
+    Hash an integer below 2^256 with the linear hash.
+
+    Args:
+        item (int): The integer to hash.
+
+    Returns:
+        int: The 128-bit hash, with its first 64-bit half in the low bits.
+    """
+    first, second = linear_hash_many(to_keys([item]))[0]
+    return int(first) | (int(second) << 64)
+
+
+def read_file_header(path: str) -> dict:
+    """
+    Read the parameters stored in the header page of a filter file.
+
+    Args:
+        path (str): The path of the filter file.
+
+    Returns:
+        dict: The parameters, as returned by the header method of the filter that wrote the file.
+
+    Raises:
+        ValueError: If the file is not a filter file.
+    """
+    with open(path, 'rb') as file:
+        page: bytes = file.read(FILE_HEADER_BYTES)
+    try:
+        return parse_header_page(page)
+    except ValueError as error:
+        raise ValueError(f"{path} is not a filter file") from error
+
+
+def write_file_header(file: BinaryIO, header: dict) -> None:
+    """
+    Write the header page of a filter file, leaving the file positioned at the start of the payload.
+
+    Args:
+        file (BinaryIO): The file, open for writing at its start.
+        header (dict): The parameters, as returned by the header method of a filter.
+
+    Raises:
+        ValueError: If the parameters do not fit in the header page.
+    """
+    file.write(header_page(header))
+
+
+def header_page(header: dict) -> bytes:
+    """
+    Encode the parameters of a filter as the header page that starts a filter file or buffer.
+
+    Args:
+        header (dict): The parameters, as returned by the header method of a filter.
+
+    Returns:
+        bytes: The FILE_HEADER_BYTES-long header page.
+
+    Raises:
+        ValueError: If the parameters do not fit in the header page.
+    """
+    encoded_header: bytes = json.dumps(header).encode('utf-8')
+    page: bytes = FILE_MAGIC + _LENGTH.pack(len(encoded_header)) + encoded_header
+    if len(page) > FILE_HEADER_BYTES:
+        raise ValueError("The filter parameters do not fit in the header page")
+    return page.ljust(FILE_HEADER_BYTES, b'\0')
+
+
+def parse_header_page(buffer: Buffer) -> dict:
+    """
+    Decode the parameters of a filter from the header page at the start of a buffer.
+
+    Args:
+        buffer (Buffer): A filter file's bytes, or a buffer made by a filter's to_buffer method.
+
+    Returns:
+        dict: The parameters, as returned by the header method of the filter.
+
+    Raises:
+        ValueError: If the buffer does not start with a header page.
+    """
+    # Release the views straight away, so that a shared memory segment can be closed after
+    with memoryview(buffer) as raw, raw.cast('B') as view:
+        if len(view) < FILE_HEADER_BYTES or view[:len(FILE_MAGIC)] != FILE_MAGIC:
+            raise ValueError("Buffer does not start with a filter header page")
+        (length,) = _LENGTH.unpack_from(view, len(FILE_MAGIC))
+        start: int = len(FILE_MAGIC) + _LENGTH.size
+        encoded_header: bytes = bytes(view[start:start + length])
+    return json.loads(encoded_header.decode('utf-8'))
+
+
+def payload_view(buffer: Buffer, payload_bytes: int) -> memoryview:
+    """
+    Return a view of the payload that follows the header page of a buffer, without copying it.
+
+    Args:
+        buffer (Buffer): A filter file's bytes, or a buffer made by a filter's to_buffer method.
+        payload_bytes (int): The number of payload bytes the header describes.
+
+    Returns:
+        memoryview: The payload, writable if the buffer is.
+
+    Raises:
+        ValueError: If the buffer is shorter than its payload.
+    """
+    view: memoryview = memoryview(buffer).cast('B')
+    if len(view) < FILE_HEADER_BYTES + payload_bytes:
+        raise ValueError(f"Buffer holds {len(view) - FILE_HEADER_BYTES} payload bytes, expected "
+                         f"{payload_bytes}")
+    return view[FILE_HEADER_BYTES:FILE_HEADER_BYTES + payload_bytes]
+
+
+def bloom_parameters(number_of_elements: int, fp_rate: float,
+                     hash_count: Optional[int] = None) -> tuple[int, int]:
+    """
+    Compute the size and hash count of a Bloom Filter.
+
+    By default the filter is the smallest one that reaches the false positive rate. A smaller hash
+    count gives a larger but sparser filter, which compresses to fewer bytes than the smallest
+    filter does (Mitzenmacher, Compressed Bloom Filters).
+
+    Args:
+        number_of_elements (int): The expected number of elements.
+        fp_rate (float): The target false positive rate.
+        hash_count (Optional[int]): The number of hash functions to use, or None for the optimal
+                                    number.
+
+    Returns:
+        tuple[int, int]: The size of the bit array and the number of hash functions, a single byte
+                         for no elements.
+    """
+    if number_of_elements == 0:
+        # An empty filter answers no for every item at any size
+        return 8, hash_count or 1
+    if hash_count is not None:
+        size: int = ceil(-hash_count * number_of_elements / log(1 - fp_rate ** (1 / hash_count)))
+        return size, hash_count
+    size: int = ceil(-(number_of_elements * log(fp_rate)) / (log(2) ** 2))
+    hash_count: int = ceil((size / number_of_elements) * log(2))
+    return size, hash_count
+
 
 class BloomFilter:
     """
     Bloom Filter class for managing a set of elements with a probabilistic approach.
-    
+
     Attributes:
         size (int): The size of the bit array.
         hash_count (int): The number of hash functions to use.
+        hash_scheme (str): How bit indices are derived from an item, 'seeded', 'double' or
+                           'linear'.
         bit_array (bitarray): A bitarray of size `size`, initialized to all False.
+        path (Optional[str]): The file the bit array is memory-mapped from, or None when it is held
+                              in memory.
+        shared_memory_name (Optional[str]): The name of the shared memory segment holding the bit
+                                            array, or None when it is not in shared memory.
 
     Methods:
         add(item: int) -> None:
@@ -30,25 +316,140 @@ class BloomFilter:
         check(item: int) -> bool:
             Checks if an item is possibly in the Bloom Filter.
 
+        add_many(keys: np.ndarray) -> None:
+            Adds a batch of fixed-width keys to the Bloom Filter.
+
+        check_many(keys: np.ndarray) -> np.ndarray:
+            Checks a batch of fixed-width keys against the Bloom Filter.
+
+        add_hashes(hashes: np.ndarray) -> None:
+            Adds a batch of items by their precomputed 128-bit hashes.
+
         to_dict() -> dict:
             Converts the BloomFilter instance into a dictionary for serialization.
 
         from_dict(data_dict: dict) -> 'BloomFilter':
             Creates a BloomFilter instance from a dictionary.
+
+        merge(other: BloomFilter) -> None:
+            Merges another Bloom Filter with the same parameters into this one in place.
+
+        union(other: BloomFilter) -> BloomFilter:
+            Returns a new Bloom Filter containing the elements of both filters.
+
+        merge_chunks(others: list[BloomFilter], chunk_size: int) -> Iterator[memoryview]:
+            Merges other Bloom Filters into this one a chunk at a time, yielding each chunk.
+
+        header() -> dict:
+            Returns the parameters of the Bloom Filter without its bit array.
+
+        buffer() -> memoryview:
+            Returns a writable view of the bytes of the bit array.
+
+        empty(header: dict) -> BloomFilter:
+            Creates an empty BloomFilter instance from the parameters returned by header.
+
+        open(path: str, writable: bool) -> BloomFilter:
+            Opens a filter file written by a filter of this class.
+
+        to_buffer() -> bytes:
+            Converts the BloomFilter instance into its binary format, the layout of a filter file.
+
+        from_buffer(buffer: Buffer) -> BloomFilter:
+            Creates a BloomFilter instance around a buffer in the binary format, without copying it.
+
+        flush() -> None:
+            Writes the changes to a memory-mapped bit array back to its file.
+
+        close() -> None:
+            Unmaps the file or shared memory segment of a bit array.
+
+        attach(name: str) -> BloomFilter:
+            Attaches to a shared memory segment created by a filter of this class.
+
+        unlink() -> None:
+            Removes the name of the bit array's shared memory segment.
     """
 
-    def __init__(self, number_of_elements: int) -> None:
+    backend: str = 'bloom'
+    shared_memory_name: Optional[str] = None
+    _shared_memory: Optional[SharedMemory] = None
+
+    def __init__(self, number_of_elements: int, hash_scheme: str = SEEDED,
+                 fp_rate: float = DEFAULT_FP_RATE, path: Optional[str] = None,
+                 hash_count: Optional[int] = None, shared: bool = False) -> None:
         """
         Initialize a new Bloom Filter with a specified number of elements.
 
         Args:
             number_of_elements (int): The expected number of elements to store without
                                       exceeding the error rate.
+            hash_scheme (str): How bit indices are derived from an item, 'seeded', 'double' or
+                               'linear'.
+            fp_rate (float): The target false positive rate once every element is stored.
+            path (Optional[str]): A file to create and memory-map the bit array from, instead of
+                                  holding it in memory.
+            hash_count (Optional[int]): The number of hash functions, or None for the optimal
+                                        number. Fewer hash functions make a larger filter that
+                                        compresses better.
+            shared (bool): Whether to hold the bit array in a new shared memory segment, which
+                           another process can attach to by name.
+        """
+        self.size, self.hash_count = bloom_parameters(number_of_elements, fp_rate, hash_count)
+        self.hash_scheme: str = hash_scheme
+        self._allocate(path, shared)
+
+    def _allocate(self, path: Optional[str], shared: bool = False) -> None:
+        """
+        Allocate an unset bit array, in memory, in a new memory-mapped file or in a new shared
+        memory segment.
+
+        The file is extended without writing its bit array, so on most file systems its pages
+        only take disk space once a bit in them is set. A shared memory segment is laid out like
+        a filter file, so a process that attaches to it finds the filter's parameters in it.
+
+        Args:
+            path (Optional[str]): The file to create, or None to hold the bit array in memory.
+            shared (bool): Whether to hold the bit array in a new shared memory segment instead.
+
+        Raises:
+            ValueError: If both a file and shared memory are requested.
+        """
+        if path is not None and shared:
+            raise ValueError("A Bloom Filter cannot be both in a file and in shared memory")
+        self.path: Optional[str] = path
+        self._mmap: Optional[mmap.mmap] = None
+        if shared:
+            # New segments are zero-filled by the operating system
+            payload_bytes: int = (self.size + 7) // 8
+            self._shared_memory = SharedMemory(create=True,
+                                               size=FILE_HEADER_BYTES + payload_bytes)
+            self.shared_memory_name = self._shared_memory.name
+            self._shared_memory.buf[:FILE_HEADER_BYTES] = header_page(self.header())
+            self.bit_array: bitarray = bitarray(
+                buffer=payload_view(self._shared_memory.buf, payload_bytes))
+            return
+        if path is None:
+            self.bit_array: bitarray = bitarray(self.size)
+            self.bit_array.setall(0)
+            return
+
+        with open(path, 'w+b') as file:
+            write_file_header(file, self.header())
+            file.truncate(FILE_HEADER_BYTES + (self.size + 7) // 8)
+        self._map(writable=True)
+
+    def _map(self, writable: bool) -> None:
         """
-        self.size: int = ceil(-(number_of_elements * log(0.01)) / (log(2) ** 2))
-        self.hash_count: int = ceil((self.size / number_of_elements) * log(2))
-        self.bit_array: bitarray = bitarray(self.size)
-        self.bit_array.setall(0)
+        Memory-map the bit array from the filter's file.
+
+        Args:
+            writable (bool): Whether the bit array can be changed.
+        """
+        with open(self.path, 'r+b' if writable else 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0,
+                                   access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        self.bit_array = bitarray(buffer=payload_view(self._mmap, (self.size + 7) // 8))
 
     def _to_bytes(self, item: int) -> bytes:
         """
@@ -60,8 +461,81 @@ class BloomFilter:
         Returns:
             bytes: The byte representation of the item.
         """
+        if self.hash_scheme in (DOUBLE, LINEAR):
+            return item.to_bytes(KEY_BYTES, byteorder='little', signed=False)
         return item.to_bytes((item.bit_length() + 7) // 8, byteorder='little', signed=False)
 
+    def _indexes(self, item: int) -> list[int]:
+        """
+        Compute the bit indices of an item.
+
+        Args:
+            item (int): The item to hash.
+
+        Returns:
+            list[int]: One bit index per hash function.
+        """
+        bytes_item: bytes = self._to_bytes(item)
+        if self.hash_scheme == LINEAR:
+            hashes: np.ndarray = linear_hash_many(to_keys([item])) ^ _linear_offset()
+            h1, h2 = int(hashes[0, 0]), int(hashes[0, 1])
+            return [((h1 + i * h2) & _MASK_64) % self.size for i in range(self.hash_count)]
+        if self.hash_scheme == DOUBLE:
+            h1, h2 = mmh3.hash64(bytes_item, 0, True, False)
+            return [((h1 + i * h2) & _MASK_64) % self.size for i in range(self.hash_count)]
+        return [mmh3.hash(bytes_item, i) % self.size for i in range(self.hash_count)]
+
+    def _hash_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Hash a batch of fixed-width keys with the 128-bit MurmurHash3, or the linear hash.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+
+        Returns:
+            np.ndarray: A (number of keys, 2) array holding the two 64-bit halves of each hash.
+        """
+        if self.hash_scheme == LINEAR:
+            return linear_hash_many(keys)
+        data: bytes = np.ascontiguousarray(keys, dtype=np.uint8).tobytes()
+        return np.array(
+            [mmh3.hash64(data[i:i + KEY_BYTES], 0, True, False)
+             for i in range(0, len(data), KEY_BYTES)],
+            dtype=np.uint64
+        ).reshape(-1, 2)
+
+    def _indexes_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Compute the bit indices of a batch of fixed-width keys.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+
+        Returns:
+            np.ndarray: A (number of keys, hash count) array of uint64 bit indices.
+        """
+        if self.hash_scheme == SEEDED:
+            items: list[int] = [int.from_bytes(key.tobytes(), byteorder='little') for key in keys]
+            return np.array([self._indexes(item) for item in items],
+                            dtype=np.uint64).reshape(-1, self.hash_count)
+        return self._indexes_from_hashes(self._hash_many(keys))
+
+    def _indexes_from_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Derive the bit indices of a batch of items from their 128-bit hashes.
+
+        Args:
+            hashes (np.ndarray): A (number of items, 2) array of uint64 hash halves.
+
+        Returns:
+            np.ndarray: A (number of items, hash count) array of uint64 bit indices.
+        """
+        if self.hash_scheme == LINEAR:
+            hashes = hashes ^ _linear_offset()
+        steps: np.ndarray = np.arange(self.hash_count, dtype=np.uint64)
+        # Unsigned 64-bit arithmetic wraps, matching the masking done in _indexes
+        return (hashes[:, :1] + steps * hashes[:, 1:]) % np.uint64(self.size)
+
     def add(self, item: int) -> None:
         """
         Add an item to the Bloom Filter.
@@ -69,9 +543,7 @@ class BloomFilter:
         Args:
             item (int): The item to add to the filter.
         """
-        bytes_item: bytes = self._to_bytes(item)
-        for i in range(self.hash_count):
-            index: int = mmh3.hash(bytes_item, i) % self.size
+        for index in self._indexes(item):
             self.bit_array[index] = True
 
     def check(self, item: int) -> bool:
@@ -84,26 +556,356 @@ class BloomFilter:
         Returns:
             bool: True if the item might be in the filter, False if it is definitely not.
         """
-        bytes_item: bytes = self._to_bytes(item)
-        for i in range(self.hash_count):
-            index: int = mmh3.hash(bytes_item, i) % self.size
+        for index in self._indexes(item):
             if not self.bit_array[index]:
                 return False
         return True
 
-    def to_dict(self) -> dict:
+    def add_many(self, keys: np.ndarray) -> None:
         """
-        Convert the BloomFilter instance into a dictionary for serialization.
+        Add a batch of fixed-width keys to the Bloom Filter.
+
+        The bits are set directly on the buffer underlying the bit array.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+        """
+        self._set_indexes(self._indexes_many(keys).ravel())
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Add a batch of items by their precomputed 128-bit hashes.
+
+        With the linear scheme, the hash of a vote combination is the XOR of the hashes of its
+        members, so combinations can be inserted without being hashed.
+
+        Args:
+            hashes (np.ndarray): A (number of items, 2) array of uint64 hash halves, as made by
+                                 to_hashes or linear_hash_many.
+
+        Raises:
+            ValueError: If the filter uses the seeded scheme, which has no 128-bit hash.
+        """
+        if self.hash_scheme == SEEDED:
+            raise ValueError("A filter with the seeded hash scheme cannot add hashes")
+        self._set_indexes(self._indexes_from_hashes(hashes).ravel())
+
+    def _set_indexes(self, indexes: np.ndarray) -> None:
+        """
+        Set the bits at a batch of indices, directly on the buffer underlying the bit array.
+
+        Args:
+            indexes (np.ndarray): The uint64 bit indices to set.
+        """
+        buffer: np.ndarray = np.frombuffer(self.bit_array, dtype=np.uint8)
+        masks: np.ndarray = np.right_shift(0x80, indexes & np.uint64(7)).astype(np.uint8)
+        np.bitwise_or.at(buffer, indexes >> np.uint64(3), masks)
+
+    def check_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Check a batch of fixed-width keys against the Bloom Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+
+        Returns:
+            np.ndarray: A boolean array, True where a key might be in the filter.
+        """
+        indexes: np.ndarray = self._indexes_many(keys)
+        buffer: np.ndarray = np.frombuffer(self.bit_array, dtype=np.uint8)
+        bits: np.ndarray = (buffer[indexes >> np.uint64(3)]
+                            >> (np.uint64(7) - (indexes & np.uint64(7))).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def _check_compatible(self, other: 'BloomFilter') -> None:
+        """
+        Check that another Bloom Filter maps items to the same bit positions as this one.
+
+        Args:
+            other (BloomFilter): The filter to compare against.
+
+        Raises:
+            ValueError: If the filters do not share the same backend, size, hash count and hash
+                        scheme.
+        """
+        if (self.backend != other.backend or self.size != other.size
+                or self.hash_count != other.hash_count or self.hash_scheme != other.hash_scheme):
+            raise ValueError("Bloom Filters must have the same backend, size, hash count and hash "
+                             "scheme to be combined")
+
+    def merge(self, other: 'BloomFilter') -> None:
+        """
+        Merge another Bloom Filter into this one in place by ORing the bit arrays.
+
+        Args:
+            other (BloomFilter): A filter built with the same size, hash count and hash scheme.
+
+        Raises:
+            ValueError: If the filters do not share the same size, hash count and hash scheme.
+        """
+        self._check_compatible(other)
+        # Work on the bytes, as a memory-mapped bit array is padded to a whole number of bytes
+        buffer: np.ndarray = np.frombuffer(self.bit_array, dtype=np.uint8)
+        np.bitwise_or(buffer, np.frombuffer(other.bit_array, dtype=np.uint8), out=buffer)
+
+    def union(self, other: 'BloomFilter') -> 'BloomFilter':
+        """
+        Create a new Bloom Filter containing the elements of this filter and another one.
+
+        Args:
+            other (BloomFilter): A filter built with the same size, hash count and hash scheme.
 
         Returns:
-            dict: A dictionary containing the size, hash count, and bit array as a hex string.
+            BloomFilter: The union of the two filters.
+        """
+        self._check_compatible(other)
+        result: BloomFilter = self.empty(self.header())
+        np.bitwise_or(np.frombuffer(self.bit_array, dtype=np.uint8),
+                      np.frombuffer(other.bit_array, dtype=np.uint8),
+                      out=np.frombuffer(result.bit_array, dtype=np.uint8))
+        return result
+
+    def merge_chunks(self, others: list['BloomFilter'], chunk_size: int) -> Iterator[memoryview]:
+        """
+        Merge other Bloom Filters into this one a chunk of bytes at a time.
+
+        Each chunk of the bit array is final as soon as it is yielded, so it can be sent while the
+        following chunks are still being merged.
+
+        Args:
+            others (list[BloomFilter]): Filters built with the same size, hash count and hash
+                                        scheme.
+            chunk_size (int): The number of bytes merged per chunk.
+
+        Yields:
+            memoryview: Each merged chunk of the bit array, in order.
+
+        Raises:
+            ValueError: If the filters do not share the same size, hash count and hash scheme.
+        """
+        for other in others:
+            self._check_compatible(other)
+        buffer: np.ndarray = np.frombuffer(self.bit_array, dtype=np.uint8)
+        sources: list[np.ndarray] = [np.frombuffer(other.bit_array, dtype=np.uint8)
+                                     for other in others]
+        for start in range(0, len(buffer), chunk_size):
+            chunk: np.ndarray = buffer[start:start + chunk_size]
+            for source in sources:
+                chunk |= source[start:start + chunk_size]
+            yield memoryview(chunk)
+
+    def header(self) -> dict:
+        """
+        Return the parameters of the Bloom Filter without its bit array.
+
+        Returns:
+            dict: A dictionary containing the backend, size, hash count and hash scheme.
         """
         return {
+            'backend': self.backend,
             'size': self.size,
             'hash_count': self.hash_count,
-            'bit_array': self.bit_array.tobytes().hex()
+            'hash_scheme': self.hash_scheme
         }
 
+    def buffer(self) -> memoryview:
+        """
+        Return a writable view of the bytes of the bit array.
+
+        Returns:
+            memoryview: The bytes of the bit array, without copying them.
+        """
+        return memoryview(self.bit_array)
+
+    @classmethod
+    def empty(cls, header: dict, shared: bool = False) -> 'BloomFilter':
+        """
+        Create an empty BloomFilter instance from the parameters returned by header.
+
+        Args:
+            header (dict): The dictionary returned by header.
+            shared (bool): Whether to hold the bit array in a new shared memory segment.
+
+        Returns:
+            BloomFilter: A new instance of BloomFilter with every bit unset, ready to be filled
+                         through buffer.
+        """
+        instance = cls.__new__(cls)
+        instance.size = header['size']
+        instance.hash_count = header['hash_count']
+        instance.hash_scheme = header.get('hash_scheme', SEEDED)
+        instance._allocate(None, shared)
+        return instance
+
+    @classmethod
+    def attach(cls, name: str) -> 'BloomFilter':
+        """
+        Attach to a shared memory segment created by a filter of this class, without copying it.
+
+        Args:
+            name (str): The name of the shared memory segment.
+
+        Returns:
+            BloomFilter: A new instance of BloomFilter whose bit array is the segment's memory.
+
+        Raises:
+            FileNotFoundError: If there is no segment with that name.
+            ValueError: If the segment does not hold a filter of this class.
+        """
+        shared_memory: SharedMemory = SharedMemory(name=name)
+        try:
+            instance: 'BloomFilter' = cls.from_buffer(shared_memory.buf)
+        except ValueError:
+            shared_memory.close()
+            raise
+        instance._shared_memory = shared_memory
+        instance.shared_memory_name = name
+        return instance
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False) -> 'BloomFilter':
+        """
+        Open a filter file written by a filter of this class.
+
+        Only the header page is read; the bit array is memory-mapped, so checks read just the
+        pages that hold the bits they probe.
+
+        Args:
+            path (str): The path of the filter file.
+            writable (bool): Whether the filter can be changed. Read-only by default.
+
+        Returns:
+            BloomFilter: A new instance of BloomFilter backed by the file.
+
+        Raises:
+            ValueError: If the file was not written by a filter of this class.
+        """
+        header: dict = read_file_header(path)
+        if header['backend'] != cls.backend:
+            raise ValueError(f"{path} holds a {header['backend']} filter, not a {cls.backend} one")
+        instance = cls.__new__(cls)
+        instance.size = header['size']
+        instance.hash_count = header['hash_count']
+        instance.hash_scheme = header['hash_scheme']
+        instance.path = path
+        instance._map(writable)
+        return instance
+
+    def to_buffer(self) -> bytes:
+        """
+        Convert the BloomFilter instance into its binary format, the layout of a filter file.
+
+        Returns:
+            bytes: The header page followed by the bytes of the bit array.
+        """
+        return b''.join((header_page(self.header()), self.buffer()))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'BloomFilter':
+        """
+        Create a BloomFilter instance around a buffer in the binary format, without copying it.
+
+        The bit array is a view of the buffer, so the buffer must outlive the filter, and the
+        filter is read-only if the buffer is, as for bytes or a read-only memory map.
+
+        Args:
+            buffer (Buffer): A buffer made by to_buffer, or the bytes or memory map of a filter
+                             file.
+
+        Returns:
+            BloomFilter: A new instance of BloomFilter sharing the buffer's memory.
+
+        Raises:
+            ValueError: If the buffer does not hold a filter of this class.
+        """
+        header: dict = parse_header_page(buffer)
+        if header['backend'] != cls.backend:
+            raise ValueError(f"Buffer holds a {header['backend']} filter, not a {cls.backend} one")
+        instance = cls.__new__(cls)
+        instance.size = header['size']
+        instance.hash_count = header['hash_count']
+        instance.hash_scheme = header['hash_scheme']
+        instance.path = None
+        instance._mmap = None
+        instance.bit_array = bitarray(buffer=payload_view(buffer, (instance.size + 7) // 8))
+        return instance
+
+    def flush(self) -> None:
+        """
+        Write the changes to a memory-mapped bit array back to its file.
+        """
+        if self._mmap is not None:
+            self._mmap.flush()
+
+    def close(self) -> None:
+        """
+        Unmap the file or shared memory segment of a bit array, after which the filter can no
+        longer be used.
+        """
+        if self._mmap is not None:
+            self.bit_array = bitarray()
+            self._mmap.close()
+            self._mmap = None
+        if self._shared_memory is not None:
+            # The bit array's view of the segment must go before the segment can be closed
+            self.bit_array = bitarray()
+            self._shared_memory.close()
+            self._shared_memory = None
+
+    def __del__(self) -> None:
+        """
+        Close a shared memory segment the filter is dropped with, as the segment cannot be closed
+        by its own finaliser while the bit array still views it.
+        """
+        if self._shared_memory is not None:
+            self.close()
+
+    def unlink(self) -> None:
+        """
+        Remove the name of the bit array's shared memory segment.
+
+        The segment is freed once every process attached to it has closed it.
+        """
+        if self._shared_memory is not None:
+            self._shared_memory.unlink()
+
+    def __getstate__(self) -> dict:
+        """
+        Return the state to pickle, with a memory-mapped bit array replaced by its file path.
+
+        Returns:
+            dict: The attributes of the filter.
+        """
+        state: dict = self.__dict__.copy()
+        if self._mmap is not None:
+            self.flush()
+            del state['bit_array']
+            state['_mmap'] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Restore a pickled filter, memory-mapping its file again if it has one.
+
+        Args:
+            state (dict): The attributes returned by __getstate__.
+        """
+        self.__dict__.update(state)
+        if 'bit_array' not in state:
+            self._map(writable=True)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the BloomFilter instance into a dictionary for serialization.
+
+        Returns:
+            dict: A dictionary containing the backend, size, hash count, hash scheme and bit array
+                  as a hex string.
+        """
+        data_dict: dict = self.header()
+        data_dict['bit_array'] = self.bit_array.tobytes().hex()
+        return data_dict
+
     @classmethod
     def from_dict(cls, data_dict: dict) -> 'BloomFilter':
         """
@@ -115,13 +917,12 @@ class BloomFilter:
         Returns:
             BloomFilter: A new instance of BloomFilter initialized from the dictionary data.
         """
-        size: int = data_dict['size']
-        hash_count: int = data_dict['hash_count']
-        bit_array: bitarray = bitarray()
-        bit_array.frombytes(bytes.fromhex(data_dict['bit_array']))
-
-        instance = cls(len(bit_array))  # Initialize with an estimated number of elements
-        instance.size = size
-        instance.hash_count = hash_count
-        instance.bit_array = bit_array
+        instance = cls.__new__(cls)
+        instance.size = data_dict['size']
+        instance.hash_count = data_dict['hash_count']
+        instance.hash_scheme = data_dict.get('hash_scheme', SEEDED)
+        instance.path = None
+        instance._mmap = None
+        # Wrap the decoded bytes instead of copying them into a new bit array
+        instance.bit_array = bitarray(buffer=bytearray.fromhex(data_dict['bit_array']))
         return instance
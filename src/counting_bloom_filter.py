@@ -0,0 +1,356 @@
+"""
+Counting Bloom Filter implementation for the FinalVoter of the generic variants of the e-voting
+protocol.
+
+A Counting Bloom Filter keeps a 4-bit counter where a standard Bloom Filter keeps a bit, two
+counters packed per byte, so that elements can be removed as well as added. The FinalVoter builds
+one when voters may leave the electorate: the combinations of a departed voter are removed from
+the counters instead of the filter being built from scratch, and the Tallier is sent a standard
+Bloom Filter exported from the counters, with a bit set wherever a counter is not zero.
+
+Bit indices are derived exactly as by a standard Bloom Filter of the same size, hash count and
+hash scheme, so the exported filter answers for the same elements. A counter that reaches 15 sticks
+there and is never decremented again, which can only leave a false positive behind, never a false
+negative. With the optimal hash count a counter overflows with a negligible probability.
+
+The counters are stored in the filter file format, with a header page followed by the packed
+counters, so a Counting Bloom Filter can be kept in the filter cache and memory-mapped from it.
+
+Classes:
+    CountingBloomFilter: Implements a Counting Bloom Filter that exports a standard Bloom Filter.
+"""
+
+from typing import Optional
+import numpy as np
+from src.bloom_filter import (DEFAULT_FP_RATE, DOUBLE, Buffer, BloomFilter, bloom_parameters,
+                              header_page, parse_header_page, payload_view)
+
+COUNTER_MAX: int = 15
+
+
+class CountingBloomFilter:
+    """
+    Counting Bloom Filter class with 4-bit counters, for elements that are added and removed.
+
+    Attributes:
+        size (int): The number of counters, the size of the exported bit array.
+        hash_count (int): The number of hash functions to use.
+        hash_scheme (str): How counter indices are derived from an item, 'double' or 'linear'.
+        counters (np.ndarray): The uint8 array holding two counters per byte, the even-indexed
+                               counter in the high nibble.
+
+    Methods:
+        add_many(keys: np.ndarray) -> None:
+            Adds a batch of fixed-width keys to the Counting Bloom Filter.
+
+        add_hashes(hashes: np.ndarray) -> None:
+            Adds a batch of items by their precomputed 128-bit hashes.
+
+        remove_many(keys: np.ndarray) -> None:
+            Removes a batch of fixed-width keys from the Counting Bloom Filter.
+
+        remove_hashes(hashes: np.ndarray) -> None:
+            Removes a batch of items by their precomputed 128-bit hashes.
+
+        check_many(keys: np.ndarray) -> np.ndarray:
+            Checks a batch of fixed-width keys against the Counting Bloom Filter.
+
+        merge(other: CountingBloomFilter) -> None:
+            Adds the counters of another Counting Bloom Filter with the same parameters to this one.
+
+        to_bloom_filter(shared: bool) -> BloomFilter:
+            Exports the standard Bloom Filter of the elements counted.
+
+        header() -> dict:
+            Returns the parameters of the Counting Bloom Filter without its counters.
+
+        buffer() -> memoryview:
+            Returns a writable view of the bytes of the counters.
+
+        empty(header: dict) -> CountingBloomFilter:
+            Creates an empty CountingBloomFilter instance from the parameters returned by header.
+
+        to_buffer() -> bytes:
+            Converts the CountingBloomFilter instance into its binary format.
+
+        from_buffer(buffer: Buffer) -> CountingBloomFilter:
+            Creates a CountingBloomFilter instance around a buffer in the binary format.
+
+        close() -> None:
+            Releases the counters.
+    """
+
+    backend: str = 'counting'
+
+    # Indices are derived by the standard Bloom Filter's code, from the same three parameters
+    _to_bytes = BloomFilter._to_bytes
+    _indexes = BloomFilter._indexes
+    _hash_many = BloomFilter._hash_many
+    _indexes_many = BloomFilter._indexes_many
+    _indexes_from_hashes = BloomFilter._indexes_from_hashes
+
+    def __init__(self, number_of_elements: int, hash_scheme: str = DOUBLE,
+                 fp_rate: float = DEFAULT_FP_RATE, hash_count: Optional[int] = None) -> None:
+        """
+        Initialize a new Counting Bloom Filter with a specified number of elements.
+
+        Args:
+            number_of_elements (int): The expected number of elements to store without
+                                      exceeding the error rate.
+            hash_scheme (str): How counter indices are derived from an item, 'double' or 'linear'.
+            fp_rate (float): The target false positive rate once every element is stored.
+            hash_count (Optional[int]): The number of hash functions, or None for the optimal
+                                        number.
+        """
+        self.size, self.hash_count = bloom_parameters(number_of_elements, fp_rate, hash_count)
+        self.hash_scheme: str = hash_scheme
+        self.counters: np.ndarray = np.zeros((self.size + 1) // 2, dtype=np.uint8)
+
+    def _read(self, indexes: np.ndarray) -> np.ndarray:
+        """
+        Read the counters at a batch of indices.
+
+        Args:
+            indexes (np.ndarray): The uint64 counter indices.
+
+        Returns:
+            np.ndarray: The uint8 value of each counter.
+        """
+        shifts: np.ndarray = ((~indexes & np.uint64(1)) << np.uint64(2)).astype(np.uint8)
+        return (self.counters[indexes >> np.uint64(1)] >> shifts) & COUNTER_MAX
+
+    def _write(self, indexes: np.ndarray, values: np.ndarray) -> None:
+        """
+        Write the counters at a batch of distinct indices.
+
+        The two counters of a byte are written in separate passes, so that neither write is lost.
+
+        Args:
+            indexes (np.ndarray): The distinct uint64 counter indices.
+            values (np.ndarray): The new uint8 value of each counter.
+        """
+        for parity, shift in ((0, 4), (1, 0)):
+            selected: np.ndarray = (indexes & np.uint64(1)) == parity
+            positions: np.ndarray = indexes[selected] >> np.uint64(1)
+            kept: np.ndarray = self.counters[positions] & np.uint8(~(COUNTER_MAX << shift) & 0xFF)
+            self.counters[positions] = kept | (values[selected] << shift).astype(np.uint8)
+
+    def _increment(self, indexes: np.ndarray) -> None:
+        """
+        Increment the counters at a batch of indices, once per occurrence, saturating at 15.
+
+        Args:
+            indexes (np.ndarray): The uint64 counter indices, which may repeat.
+        """
+        unique, counts = np.unique(indexes, return_counts=True)
+        totals: np.ndarray = self._read(unique).astype(np.int64) + counts
+        self._write(unique, np.minimum(totals, COUNTER_MAX).astype(np.uint8))
+
+    def _decrement(self, indexes: np.ndarray) -> None:
+        """
+        Decrement the counters at a batch of indices, once per occurrence, leaving saturated
+        counters at 15.
+
+        Args:
+            indexes (np.ndarray): The uint64 counter indices, which may repeat.
+
+        Raises:
+            ValueError: If a counter would go below zero, as for an item that was never added, in
+                        which case no counter is changed.
+        """
+        unique, counts = np.unique(indexes, return_counts=True)
+        values: np.ndarray = self._read(unique)
+        saturated: np.ndarray = values == COUNTER_MAX
+        totals: np.ndarray = values.astype(np.int64) - counts
+        if (totals[~saturated] < 0).any():
+            raise ValueError("Cannot remove an item that was not added to the Counting Bloom "
+                             "Filter")
+        self._write(unique, np.where(saturated, COUNTER_MAX, totals).astype(np.uint8))
+
+    def add_many(self, keys: np.ndarray) -> None:
+        """
+        Add a batch of fixed-width keys to the Counting Bloom Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+        """
+        self._increment(self._indexes_many(keys).ravel())
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Add a batch of items by their precomputed 128-bit hashes.
+
+        Args:
+            hashes (np.ndarray): A (number of items, 2) array of uint64 hash halves, as made by
+                                 to_hashes or linear_hash_many.
+        """
+        self._increment(self._indexes_from_hashes(hashes).ravel())
+
+    def remove_many(self, keys: np.ndarray) -> None:
+        """
+        Remove a batch of fixed-width keys from the Counting Bloom Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys that were added.
+
+        Raises:
+            ValueError: If a key was not added.
+        """
+        self._decrement(self._indexes_many(keys).ravel())
+
+    def remove_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Remove a batch of items by their precomputed 128-bit hashes.
+
+        Args:
+            hashes (np.ndarray): A (number of items, 2) array of uint64 hash halves of items that
+                                 were added.
+
+        Raises:
+            ValueError: If an item was not added.
+        """
+        self._decrement(self._indexes_from_hashes(hashes).ravel())
+
+    def check_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Check a batch of fixed-width keys against the Counting Bloom Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+
+        Returns:
+            np.ndarray: A boolean array, True where a key might be in the filter.
+        """
+        indexes: np.ndarray = self._indexes_many(keys)
+        return (self._read(indexes.ravel()).reshape(indexes.shape) > 0).all(axis=1)
+
+    def merge(self, other: 'CountingBloomFilter') -> None:
+        """
+        Add the counters of another Counting Bloom Filter to this one in place, saturating at 15.
+
+        Args:
+            other (CountingBloomFilter): A filter built with the same size, hash count and hash
+                                         scheme.
+
+        Raises:
+            ValueError: If the filters do not share the same size, hash count and hash scheme.
+        """
+        if (self.size != other.size or self.hash_count != other.hash_count
+                or self.hash_scheme != other.hash_scheme):
+            raise ValueError("Counting Bloom Filters must have the same size, hash count and hash "
+                             "scheme to be combined")
+        totals: list[np.ndarray] = []
+        for shift in (4, 0):
+            total: np.ndarray = (((self.counters >> shift) & COUNTER_MAX).astype(np.uint16)
+                                 + ((other.counters >> shift) & COUNTER_MAX))
+            totals.append(np.minimum(total, COUNTER_MAX).astype(np.uint8))
+        self.counters[:] = (totals[0] << 4) | totals[1]
+
+    def to_bloom_filter(self, shared: bool = False) -> BloomFilter:
+        """
+        Export the standard Bloom Filter of the elements counted, with a bit set wherever a
+        counter is not zero.
+
+        Args:
+            shared (bool): Whether to hold the exported bit array in a new shared memory segment.
+
+        Returns:
+            BloomFilter: A standard Bloom Filter with the same size, hash count and hash scheme.
+        """
+        bloom_filter: BloomFilter = BloomFilter.empty(
+            {'size': self.size, 'hash_count': self.hash_count, 'hash_scheme': self.hash_scheme},
+            shared=shared)
+        flags: np.ndarray = np.empty(len(self.counters) * 2, dtype=bool)
+        flags[0::2] = (self.counters >> 4) != 0
+        flags[1::2] = (self.counters & COUNTER_MAX) != 0
+        # Bloom Filter bits are ordered from the most significant bit of each byte, as packbits
+        bloom_filter.buffer()[:] = np.packbits(flags[:self.size]).tobytes()
+        return bloom_filter
+
+    def header(self) -> dict:
+        """
+        Return the parameters of the Counting Bloom Filter without its counters.
+
+        Returns:
+            dict: A dictionary containing the backend, size, hash count and hash scheme.
+        """
+        return {
+            'backend': self.backend,
+            'size': self.size,
+            'hash_count': self.hash_count,
+            'hash_scheme': self.hash_scheme
+        }
+
+    def buffer(self) -> memoryview:
+        """
+        Return a writable view of the bytes of the counters.
+
+        Returns:
+            memoryview: The bytes of the counters, without copying them.
+        """
+        return memoryview(self.counters)
+
+    @classmethod
+    def empty(cls, header: dict) -> 'CountingBloomFilter':
+        """
+        Create an empty CountingBloomFilter instance from the parameters returned by header.
+
+        Args:
+            header (dict): The dictionary returned by header.
+
+        Returns:
+            CountingBloomFilter: A new instance with every counter at zero, ready to be filled
+                                 through buffer.
+        """
+        instance = cls.__new__(cls)
+        instance.size = header['size']
+        instance.hash_count = header['hash_count']
+        instance.hash_scheme = header['hash_scheme']
+        instance.counters = np.zeros((instance.size + 1) // 2, dtype=np.uint8)
+        return instance
+
+    def to_buffer(self) -> bytes:
+        """
+        Convert the CountingBloomFilter instance into its binary format, the layout of a filter
+        file.
+
+        Returns:
+            bytes: The header page followed by the bytes of the counters.
+        """
+        return b''.join((header_page(self.header()), self.buffer()))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'CountingBloomFilter':
+        """
+        Create a CountingBloomFilter instance around a buffer in the binary format, without
+        copying it.
+
+        The counters are a view of the buffer, so the buffer must outlive the filter, and the
+        filter is read-only if the buffer is.
+
+        Args:
+            buffer (Buffer): A buffer made by to_buffer, or the bytes or memory map of a filter
+                             file.
+
+        Returns:
+            CountingBloomFilter: A new instance sharing the buffer's memory.
+
+        Raises:
+            ValueError: If the buffer does not hold a Counting Bloom Filter.
+        """
+        header: dict = parse_header_page(buffer)
+        if header['backend'] != cls.backend:
+            raise ValueError(f"Buffer holds a {header['backend']} filter, not a {cls.backend} one")
+        instance = cls.__new__(cls)
+        instance.size = header['size']
+        instance.hash_count = header['hash_count']
+        instance.hash_scheme = header['hash_scheme']
+        instance.counters = np.frombuffer(payload_view(buffer, (instance.size + 1) // 2),
+                                          dtype=np.uint8)
+        return instance
+
+    def close(self) -> None:
+        """
+        Release the counters, after which the filter can no longer be used.
+        """
+        self.counters = np.zeros(0, dtype=np.uint8)
@@ -0,0 +1,328 @@
+"""
+Exact membership filter for use in the generic variants of the e-voting protocol.
+
+For small and mid-size elections the set of valid vote combinations fits comfortably in memory, so
+it can be stored as a sorted array instead of a Bloom Filter. Each element is kept as a fingerprint
+made of the first bytes of its fixed-width 32-byte key and looked up by binary search. The keys are
+uniformly random PRF outputs, so with 8-byte fingerprints the chance of any false positive is about
+the number of elements divided by 2^64, and with 32-byte fingerprints the filter is exact.
+
+Classes:
+    ExactBuilder: Collects the elements of an Exact Filter before it is built.
+    ExactFilter: Implements an exact membership filter with methods to check for elements.
+"""
+
+import struct
+import numpy as np
+from src.bloom_filter import KEY_BYTES, Buffer, header_page, parse_header_page, payload_view
+
+_HEADER: struct.Struct = struct.Struct('<4sBQ')
+_MAGIC: bytes = b'EXCT'
+
+
+def _fingerprints(keys: np.ndarray, fingerprint_bytes: int) -> np.ndarray:
+    """
+    Truncate a batch of fixed-width keys into fingerprints.
+
+    Args:
+        keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+        fingerprint_bytes (int): The number of leading key bytes to keep.
+
+    Returns:
+        np.ndarray: One fixed-width byte string fingerprint per key.
+    """
+    truncated: np.ndarray = np.ascontiguousarray(keys[:, :fingerprint_bytes], dtype=np.uint8)
+    return truncated.view(f'S{fingerprint_bytes}').ravel()
+
+
+class ExactBuilder:
+    """
+    Collects the fingerprints of the elements of an Exact Filter before it is built.
+
+    Offers the same add_many and merge methods as a Bloom Filter, so it can be filled the same way,
+    including by several worker processes whose builders are merged.
+
+    Attributes:
+        fingerprint_bytes (int): The number of leading key bytes kept per element.
+        fingerprints (list[np.ndarray]): The batches of fingerprints collected so far.
+
+    Methods:
+        add_many(keys: np.ndarray) -> None:
+            Adds a batch of fixed-width keys to the filter being built.
+
+        merge(other: ExactBuilder) -> None:
+            Adds the keys collected by another builder.
+
+        build() -> ExactFilter:
+            Builds the Exact Filter from the collected keys.
+    """
+
+    def __init__(self, fingerprint_bytes: int = 8) -> None:
+        """
+        Initialize an empty Exact Filter builder.
+
+        Args:
+            fingerprint_bytes (int): The number of leading key bytes kept per element, up to 32.
+
+        Raises:
+            ValueError: If the fingerprint width is not between 1 and 32 bytes.
+        """
+        if not 1 <= fingerprint_bytes <= KEY_BYTES:
+            raise ValueError(f"Exact Filter fingerprints must be between 1 and {KEY_BYTES} bytes")
+        self.fingerprint_bytes: int = fingerprint_bytes
+        self.fingerprints: list[np.ndarray] = []
+
+    def add_many(self, keys: np.ndarray) -> None:
+        """
+        Add a batch of fixed-width keys to the filter being built.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+        """
+        self.fingerprints.append(_fingerprints(keys, self.fingerprint_bytes))
+
+    def merge(self, other: 'ExactBuilder') -> None:
+        """
+        Add the keys collected by another builder.
+
+        Args:
+            other (ExactBuilder): A builder with the same fingerprint width.
+
+        Raises:
+            ValueError: If the builders use different fingerprint widths.
+        """
+        if self.fingerprint_bytes != other.fingerprint_bytes:
+            raise ValueError("Exact builders must use the same fingerprint width to be merged")
+        self.fingerprints.extend(other.fingerprints)
+
+    def build(self) -> 'ExactFilter':
+        """
+        Build the Exact Filter from the collected keys.
+
+        Returns:
+            ExactFilter: The built filter.
+        """
+        if not self.fingerprints:
+            return ExactFilter(np.zeros(0, dtype=f'S{self.fingerprint_bytes}'))
+        return ExactFilter(np.unique(np.concatenate(self.fingerprints)))
+
+
+class ExactFilter:
+    """
+    Exact Filter class for checking membership against a sorted array of fingerprints.
+
+    Attributes:
+        fingerprints (np.ndarray): The sorted, distinct fingerprints of the elements.
+        fingerprint_bytes (int): The number of leading key bytes kept per element.
+        size (int): The size of the fingerprint array in bits.
+        hash_count (int): The number of hash functions used, always 0.
+
+    Methods:
+        check(item: int) -> bool:
+            Checks if an item is in the Exact Filter.
+
+        check_many(keys: np.ndarray) -> np.ndarray:
+            Checks a batch of fixed-width keys against the Exact Filter.
+
+        header() -> dict:
+            Returns the parameters of the Exact Filter without its fingerprints.
+
+        buffer() -> memoryview:
+            Returns a view of the bytes of the fingerprint array.
+
+        empty(header: dict) -> ExactFilter:
+            Creates an empty ExactFilter instance from the parameters returned by header.
+
+        to_buffer() -> bytes:
+            Converts the ExactFilter instance into the binary format shared by every backend.
+
+        from_buffer(buffer: Buffer) -> ExactFilter:
+            Creates an ExactFilter instance around a buffer made by to_buffer, without copying it.
+
+        to_dict() -> dict:
+            Converts the ExactFilter instance into a dictionary for serialization.
+
+        from_dict(data_dict: dict) -> ExactFilter:
+            Creates an ExactFilter instance from a dictionary.
+
+        to_bytes() -> bytes:
+            Converts the ExactFilter instance into its compact binary format.
+
+        from_bytes(data: bytes) -> ExactFilter:
+            Creates an ExactFilter instance from its compact binary format.
+    """
+
+    backend: str = 'exact'
+    hash_count: int = 0
+
+    def __init__(self, fingerprints: np.ndarray) -> None:
+        """
+        Initialize an Exact Filter from a sorted array of distinct fingerprints.
+
+        Args:
+            fingerprints (np.ndarray): The sorted fixed-width byte string fingerprints.
+        """
+        self.fingerprints: np.ndarray = fingerprints
+        self.fingerprint_bytes: int = fingerprints.dtype.itemsize
+        self.size: int = len(fingerprints) * self.fingerprint_bytes * 8
+
+    def check(self, item: int) -> bool:
+        """
+        Check if an item is in the Exact Filter.
+
+        Args:
+            item (int): The item to check.
+
+        Returns:
+            bool: True if the item's fingerprint is in the filter, False if it is definitely not.
+        """
+        fingerprint: bytes = item.to_bytes(KEY_BYTES, byteorder='little')[:self.fingerprint_bytes]
+        query: np.ndarray = np.array([fingerprint], dtype=self.fingerprints.dtype)
+        index: int = int(np.searchsorted(self.fingerprints, query)[0])
+        return index < len(self.fingerprints) and self.fingerprints[index] == query[0]
+
+    def check_many(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Check a batch of fixed-width keys against the Exact Filter.
+
+        Args:
+            keys (np.ndarray): A (number of keys, 32) array of uint8 keys, as made by to_keys.
+
+        Returns:
+            np.ndarray: A boolean array, True where a key's fingerprint is in the filter.
+        """
+        queries: np.ndarray = _fingerprints(keys, self.fingerprint_bytes)
+        if len(self.fingerprints) == 0:
+            return np.zeros(len(queries), dtype=bool)
+        indexes: np.ndarray = np.searchsorted(self.fingerprints, queries)
+        found: np.ndarray = self.fingerprints[np.minimum(indexes, len(self.fingerprints) - 1)]
+        return (indexes < len(self.fingerprints)) & (found == queries)
+
+    def header(self) -> dict:
+        """
+        Return the parameters of the Exact Filter without its fingerprints.
+
+        Returns:
+            dict: A dictionary containing the fingerprint width and number of fingerprints.
+        """
+        return {
+            'backend': self.backend,
+            'fingerprint_bytes': self.fingerprint_bytes,
+            'count': len(self.fingerprints)
+        }
+
+    def buffer(self) -> memoryview:
+        """
+        Return a view of the bytes of the fingerprint array.
+
+        Returns:
+            memoryview: The bytes of the fingerprints, writable for a filter made by empty.
+        """
+        return memoryview(self.fingerprints.view(np.uint8))
+
+    @classmethod
+    def empty(cls, header: dict) -> 'ExactFilter':
+        """
+        Create an empty ExactFilter instance from the parameters returned by header.
+
+        The fingerprints must be written through buffer in sorted order, as sent by another
+        Exact Filter.
+
+        Args:
+            header (dict): The dictionary returned by header.
+
+        Returns:
+            ExactFilter: A new instance of ExactFilter, ready to be filled through buffer.
+        """
+        return cls(np.zeros(header['count'], dtype=f"S{header['fingerprint_bytes']}"))
+
+    def to_buffer(self) -> bytes:
+        """
+        Convert the ExactFilter instance into the binary format shared by every backend, the
+        layout of a filter file.
+
+        Returns:
+            bytes: The header page followed by the sorted fingerprints.
+        """
+        return b''.join((header_page(self.header()), self.buffer()))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'ExactFilter':
+        """
+        Create an ExactFilter instance around a buffer made by to_buffer, without copying it.
+
+        Args:
+            buffer (Buffer): A buffer made by to_buffer, or the bytes or memory map of a filter
+                             file.
+
+        Returns:
+            ExactFilter: A new instance of ExactFilter whose fingerprints are a view of the buffer.
+
+        Raises:
+            ValueError: If the buffer does not hold an Exact Filter.
+        """
+        header: dict = parse_header_page(buffer)
+        if header['backend'] != cls.backend:
+            raise ValueError(f"Buffer holds a {header['backend']} filter, not a {cls.backend} one")
+        payload: memoryview = payload_view(buffer, header['count'] * header['fingerprint_bytes'])
+        return cls(np.frombuffer(payload, dtype=f"S{header['fingerprint_bytes']}"))
+
+    def to_dict(self) -> dict:
+        """
+        Convert the ExactFilter instance into a dictionary for serialization.
+
+        Returns:
+            dict: A dictionary containing the fingerprint width and fingerprints as a hex string.
+        """
+        return {
+            'backend': self.backend,
+            'fingerprint_bytes': self.fingerprint_bytes,
+            'fingerprints': self.fingerprints.tobytes().hex()
+        }
+
+    @classmethod
+    def from_dict(cls, data_dict: dict) -> 'ExactFilter':
+        """
+        Create an ExactFilter instance from a dictionary.
+
+        Args:
+            data_dict (dict): The dictionary produced by to_dict.
+
+        Returns:
+            ExactFilter: A new instance of ExactFilter.
+        """
+        return cls(np.frombuffer(bytes.fromhex(data_dict['fingerprints']),
+                                 dtype=f"S{data_dict['fingerprint_bytes']}"))
+
+    def to_bytes(self) -> bytes:
+        """
+        Convert the ExactFilter instance into its compact binary format.
+
+        The format is a fixed 13-byte little-endian header (magic, fingerprint width and number of
+        fingerprints) followed by the sorted fingerprints.
+
+        Returns:
+            bytes: The binary representation of the filter.
+        """
+        header: bytes = _HEADER.pack(_MAGIC, self.fingerprint_bytes, len(self.fingerprints))
+        return header + self.fingerprints.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ExactFilter':
+        """
+        Create an ExactFilter instance from its compact binary format.
+
+        Args:
+            data (bytes): The binary representation produced by to_bytes.
+
+        Returns:
+            ExactFilter: A new instance of ExactFilter.
+
+        Raises:
+            ValueError: If the data is not an Exact Filter.
+        """
+        magic, fingerprint_bytes, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Data is not an Exact Filter")
+        return cls(np.frombuffer(data, dtype=f'S{fingerprint_bytes}', count=count,
+                                 offset=_HEADER.size))
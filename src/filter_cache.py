@@ -0,0 +1,218 @@
+"""
+Persistent cache of prebuilt vote combination filters for the generic variants of the e-voting
+protocol.
+
+The filter the FinalVoter builds only depends on the PRF key and mode, the offset, the number of
+voters, the threshold and the filter plan, so it can be built before the election and reused by
+every run with the same parameters. Each filter is stored in the filter file format under the
+SHA-256 digest of those parameters, and only a digest of the PRF key is part of it. A cached Bloom
+Filter is memory-mapped when it is loaded, while static filters and Counting Bloom Filters are
+wrapped around a read-only memory map of their file.
+
+The cache is bounded in size. Storing a filter evicts the least recently used filters until the
+cache fits again, and loading a filter marks it as used by updating the modification time of its
+file.
+
+Classes:
+    FilterCache: A directory of filter files addressed by the parameters of their election.
+
+Functions:
+    cache_key(key: bytes, offset: int, number_of_voters: int, threshold: int,
+              plan: FilterPlan, prf_mode: str) -> str:
+        Computes the digest a filter is cached under.
+"""
+
+import json
+import os
+from hashlib import sha256
+from typing import List, Optional
+from src.filter_planner import FilterPlan
+from src.helpers import COMPATIBLE
+from src.filters import MembershipFilter, open_filter_file, save_filter
+
+# Changing how a filter is built from the same parameters must change this, to miss stale entries
+CACHE_VERSION: int = 1
+DEFAULT_CACHE_BYTES: int = 2**30
+_SUFFIX: str = '.filter'
+
+
+def cache_key(key: bytes, offset: int, number_of_voters: int, threshold: int,
+              plan: FilterPlan, prf_mode: str = COMPATIBLE) -> str:
+    """
+    Compute the digest a filter is cached under.
+
+    Args:
+        key (bytes): The key of the pseudo-random function.
+        offset (int): The offset used in generating the vote representations.
+        number_of_voters (int): The total number of voters.
+        threshold (int): The smallest subset size held in the filter.
+        plan (FilterPlan): The plan of the filter, giving its backend, false positive rate, hash
+                           count and scheme, the capacity it is sized for and whether it is
+                           layered, inverted or counting.
+        prf_mode (str): The PRF mode the vote representations are derived in.
+
+    Returns:
+        str: The hexadecimal SHA-256 digest of the parameters.
+    """
+    parameters: dict = {
+        'version': CACHE_VERSION,
+        'key': sha256(key).hexdigest(),
+        'offset': offset,
+        'number_of_voters': number_of_voters,
+        'threshold': threshold,
+        'backend': plan.backend,
+        'fp_rate': plan.fp_rate,
+        'hash_count': plan.hash_count,
+        'layered': plan.layered,
+        'inverted': plan.inverted,
+        'hash_scheme': plan.hash_scheme,
+        'capacity': plan.capacity,
+        'counting': plan.counting,
+        'prf_mode': prf_mode,
+    }
+    return sha256(json.dumps(parameters, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FilterCache:
+    """
+    FilterCache class storing filter files under the digest of the parameters of their election.
+
+    Attributes:
+        directory (str): The directory holding the filter files.
+        max_bytes (int): The most bytes the filter files may take before the least recently used
+                         are evicted.
+
+    Methods:
+        path(digest: str) -> str:
+            Returns the path of the file a filter is cached in.
+
+        load(digest: str) -> Optional[MembershipFilter]:
+            Loads a cached filter, marking it as recently used.
+
+        store(digest: str, membership_filter: MembershipFilter) -> str:
+            Stores a filter, replacing any filter cached under the same digest.
+
+        evict(keep: Optional[str]) -> List[str]:
+            Removes the least recently used filters until the cache fits in its size.
+
+        size() -> int:
+            Returns the number of bytes the cached filters take.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        """
+        Open a filter cache, creating its directory if it does not exist.
+
+        Args:
+            directory (str): The directory holding the filter files.
+            max_bytes (int): The most bytes the filter files may take.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory: str = directory
+        self.max_bytes: int = max_bytes
+
+    def path(self, digest: str) -> str:
+        """
+        Return the path of the file a filter is cached in.
+
+        Args:
+            digest (str): The digest returned by cache_key.
+
+        Returns:
+            str: The path of the filter file.
+        """
+        return os.path.join(self.directory, digest + _SUFFIX)
+
+    def load(self, digest: str) -> Optional[MembershipFilter]:
+        """
+        Load a cached filter, marking it as recently used.
+
+        A file that is not a valid filter file is removed and treated as a miss.
+
+        Args:
+            digest (str): The digest returned by cache_key.
+
+        Returns:
+            Optional[MembershipFilter]: The cached filter, or None if it is not cached.
+        """
+        path: str = self.path(digest)
+        try:
+            os.utime(path)
+            return open_filter_file(path)
+        except FileNotFoundError:
+            return None
+        except (KeyError, ValueError):
+            os.remove(path)
+            return None
+
+    def store(self, digest: str, membership_filter: MembershipFilter) -> str:
+        """
+        Store a filter, replacing any filter cached under the same digest.
+
+        The filter is written to a temporary file that is then renamed, so a concurrent load
+        never sees a partly written filter.
+
+        Args:
+            digest (str): The digest returned by cache_key.
+            membership_filter (MembershipFilter): The finished filter to store.
+
+        Returns:
+            str: The path of the filter file.
+        """
+        path: str = self.path(digest)
+        temporary_path: str = f"{path}.{os.getpid()}.tmp"
+        try:
+            save_filter(membership_filter, temporary_path)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        return path
+
+    def _entries(self) -> List[os.DirEntry]:
+        """
+        List the filter files in the cache, least recently used first.
+
+        Returns:
+            List[os.DirEntry]: The filter files.
+        """
+        with os.scandir(self.directory) as entries:
+            files: List[os.DirEntry] = [entry for entry in entries
+                                        if entry.name.endswith(_SUFFIX) and entry.is_file()]
+        return sorted(files, key=lambda entry: entry.stat().st_mtime)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Remove the least recently used filters until the cache fits in its size.
+
+        Args:
+            keep (Optional[str]): The path of a filter never to evict, such as one just stored,
+                                  even if it alone is larger than the cache.
+
+        Returns:
+            List[str]: The paths of the evicted filter files.
+        """
+        entries: List[os.DirEntry] = self._entries()
+        total: int = sum(entry.stat().st_size for entry in entries)
+        evicted: List[str] = []
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.path == keep:
+                continue
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= entry.stat().st_size
+            evicted.append(entry.path)
+        return evicted
+
+    def size(self) -> int:
+        """
+        Return the number of bytes the cached filters take.
+
+        Returns:
+            int: The total size of the filter files.
+        """
+        return sum(entry.stat().st_size for entry in self._entries())
@@ -0,0 +1,553 @@
+"""
+Planning of the filter of valid vote combinations built by the FinalVoter in the generic variants.
+
+The number of valid vote combinations grows exponentially with the number of voters, so a filter
+that is cheap to build for 20 voters can need more memory than the machine has for 35. The planner
+estimates, before anything is allocated, how many combinations a filter will hold, how large it
+will be, how much memory and time it will take to build and how many bytes it will take on the
+wire. It picks the backend to use and refuses plans that do not fit a memory or time budget.
+
+The estimates come from the sizing formulas of each backend and from build rates and memory
+overheads measured on a single core; they are meant to tell a run that takes minutes from one that
+cannot finish, not to be exact.
+
+When an election has fewer subsets below its threshold than at or above it, as with a low
+threshold, the planner can invert the filter: it then holds the combinations of the subsets below
+the threshold, from the empty subset up, and the Tallier's verdict is the opposite of its
+membership answer. A false positive of an inverted filter reports an election that reached the
+threshold as one that did not, rather than the other way around.
+
+At the extremes of the threshold no filter is needed at all. With a threshold of 1, a combined
+vote reaches it exactly when it is not 0, as in the efficient variants, and when either side of
+the threshold has only a few subsets, as with a threshold of n or n - 1, their combinations are
+sent to the Tallier as a plain set. The verdict engine of a plan names which of these the Tallier
+uses: 'xor', 'set' or 'filter'.
+
+A Bloom Filter can be planned with a capacity above the number of voters, sizing it for the vote
+combinations of that many voters. The filter of a standing electorate can then be grown as voters
+join, by inserting only the combinations that include them, without losing its false positive rate.
+A standard Bloom Filter can also be planned with counters, taking four times the memory to build,
+so that the combinations of voters who leave can be removed from it instead of it being rebuilt.
+
+Classes:
+    FilterPlanError: Raised when no filter fits the requested false positive rate and budgets.
+    FilterPlan: Describes the filter the FinalVoter will build.
+
+Functions:
+    count_combinations(number_of_voters: int, threshold: int, inverted: bool) -> int:
+        Returns the number of vote combinations that reach the threshold, or that do not.
+
+    choose_verdict_engine(number_of_voters: int, threshold: int) -> str:
+        Returns the cheapest way for the Tallier to reach a verdict without a filter, if any.
+
+    physical_memory() -> Optional[int]:
+        Returns the amount of physical memory of the machine, if it can be determined.
+
+    plan_filter(number_of_voters: int, threshold: int, ...) -> FilterPlan:
+        Plans the filter of valid vote combinations for an election.
+"""
+
+import math
+import os
+from typing import List, Optional
+from src.binary_fuse_filter import BinaryFuseFilter, fingerprint_bits_for
+from src.blocked_bloom_filter import BlockedBloomFilter, blocked_parameters
+from src.bloom_filter import DEFAULT_FP_RATE, DOUBLE, LINEAR, BloomFilter, bloom_parameters
+from src.exact_filter import ExactFilter
+from src.filter_transfer import NO_CODEC, available_codecs
+from src.filters import DEFAULT_EXACT_LIMIT
+from src.subset_enumeration import subset_sizes
+
+AUTO: str = 'auto'
+
+# The ways the Tallier can reach its verdict, from comparing with 0 to querying a filter
+XOR_ENGINE: str = 'xor'
+SET_ENGINE: str = 'set'
+FILTER_ENGINE: str = 'filter'
+
+# The most vote combinations sent to the Tallier as a plain set instead of a filter
+SET_LIMIT: int = 256
+
+# Bytes taken by a 256-bit vote combination written as a JSON integer
+_SET_BYTES_PER_ELEMENT: int = 80
+
+# Vote combinations inserted per second by a single process, measured per backend
+_BUILD_RATES: dict[str, float] = {
+    BloomFilter.backend: 340000.0,
+    BlockedBloomFilter.backend: 370000.0,
+    BinaryFuseFilter.backend: 140000.0,
+    ExactFilter.backend: 470000.0,
+}
+
+# Vote combinations inserted per second by a single process into a linearly hashed Bloom Filter,
+# whose combinations are never hashed
+_LINEAR_BUILD_RATE: float = 750000.0
+
+# Bytes held per vote combination while a static filter is built, measured per backend
+_BUILD_BYTES_PER_ELEMENT: dict[str, int] = {
+    BinaryFuseFilter.backend: 224,
+    ExactFilter.backend: 56,
+}
+
+# Bytes held by each building process for the batch of combinations being hashed
+_BATCH_BYTES: int = 32 * 2**20
+
+# Bytes added around the filter by the framing and JSON header of the vote_bf message
+_MESSAGE_BYTES: int = 512
+
+
+class FilterPlanError(ValueError):
+    """
+    Raised when no filter fits the requested false positive rate and budgets.
+    """
+
+
+class FilterPlan:
+    """
+    Describes the filter the FinalVoter will build for an election.
+
+    Attributes:
+        number_of_voters (int): The total number of voters.
+        threshold (int): The threshold of the election.
+        backend (str): The filter backend to use.
+        fp_rate (float): The target false positive rate.
+        workers (int): The number of processes used to build the filter.
+        file_backed (bool): Whether the filter is memory-mapped from a file.
+        hash_count (Optional[int]): A number of hash functions other than the optimal one.
+        codec (str): The codec the filter is compressed with on the wire.
+        layered (bool): Whether the filter is layered by subset size, holding every threshold from
+                        the plan's threshold up.
+        shared_memory (bool): Whether the filter is built in a shared memory segment that the
+                              Tallier attaches to.
+        inverted (bool): Whether the filter holds the vote combinations below the threshold
+                         instead of those that reach it.
+        verdict_engine (str): How the Tallier reaches its verdict: 'filter' to query the filter,
+                              or 'xor' or 'set' when no filter is built.
+        hash_scheme (str): How a standard Bloom Filter derives bit indices, 'double' or 'linear'.
+        capacity (int): The number of voters the filter is sized for, at least the number of
+                        voters, and above it for a filter that can be grown as voters join.
+        counting (bool): Whether a standard Bloom Filter is built with counters, so that the
+                         combinations of voters who leave can be removed, and exported to be sent.
+        layers (int): The number of layers a query may check, 1 for a filter that is not layered.
+        lookup_fp_rate (float): The false positive rate the filter is sized for, the target rate
+                                split across the layers.
+        elements (int): The number of vote combinations the filter is sized for, those of the
+                        capacity's number of voters.
+        filter_bytes (int): The size of the finished filter.
+        build_bytes (int): The estimated peak memory used while building the filter.
+        build_seconds (float): The estimated time taken to build the filter.
+        wire_bytes (int): The estimated size of the message that carries the filter, at best when
+                          it is compressed.
+
+    Methods:
+        describe() -> str:
+            Returns a one-line human readable summary of the plan.
+    """
+
+    def __init__(self, number_of_voters: int, threshold: int, backend: str, fp_rate: float,
+                 workers: int, file_backed: bool = False, hash_count: Optional[int] = None,
+                 codec: str = NO_CODEC, layered: bool = False,
+                 shared_memory: bool = False, inverted: bool = False,
+                 verdict_engine: str = FILTER_ENGINE, hash_scheme: str = DOUBLE,
+                 capacity: Optional[int] = None, counting: bool = False) -> None:
+        """
+        Estimate the cost of building a filter with a given backend.
+
+        Args:
+            number_of_voters (int): The total number of voters.
+            threshold (int): The threshold of the election.
+            backend (str): The filter backend to use.
+            fp_rate (float): The target false positive rate.
+            workers (int): The number of processes used to build the filter.
+            file_backed (bool): Whether the filter is memory-mapped from a file.
+            hash_count (Optional[int]): A number of hash functions other than the optimal one, for
+                                        the standard Bloom Filter backend.
+            codec (str): The codec the filter is compressed with on the wire.
+            layered (bool): Whether the filter is layered by subset size, so that it can be queried
+                            at any threshold from the given one up.
+            shared_memory (bool): Whether the filter is built in a shared memory segment.
+            inverted (bool): Whether the filter holds the vote combinations below the threshold.
+            verdict_engine (str): How the Tallier reaches its verdict. With 'xor' or 'set' no
+                                  filter is built and the backend is not used.
+            hash_scheme (str): How a standard Bloom Filter derives bit indices. With 'linear' the
+                               combinations are inserted by the XOR of their members' hashes.
+            capacity (Optional[int]): The number of voters to size the filter for, so that it can
+                                      be grown as voters join. Defaults to the number of voters.
+            counting (bool): Whether the filter is built with 4-bit counters, so that voters can
+                             leave, for the standard Bloom Filter backend.
+
+        Raises:
+            FilterPlanError: If the backend is unknown, cannot reach the false positive rate,
+                             cannot be backed by a file or held in shared memory or does not take
+                             a hash count or the hash scheme or cannot grow or count, if the
+                             codec is not available, if a layered filter is inverted or if the
+                             capacity is below the number of voters.
+        """
+        self.number_of_voters: int = number_of_voters
+        self.threshold: int = threshold
+        self.backend: str = backend
+        self.fp_rate: float = fp_rate
+        self.workers: int = workers
+        self.file_backed: bool = file_backed
+        self.hash_count: Optional[int] = hash_count
+        self.codec: str = codec
+        self.layered: bool = layered
+        self.shared_memory: bool = shared_memory
+        self.inverted: bool = inverted
+        self.verdict_engine: str = verdict_engine
+        self.hash_scheme: str = hash_scheme
+        self.capacity: int = number_of_voters if capacity is None else capacity
+        self.counting: bool = counting
+        # A filter that can grow is sized for the layers and combinations of its capacity
+        self.layers: int = max(self.capacity - threshold + 1, 1) if layered else 1
+        self.lookup_fp_rate: float = fp_rate / self.layers
+        self.elements: int = (0 if verdict_engine == XOR_ENGINE
+                              else count_combinations(self.capacity, threshold, inverted))
+
+        if verdict_engine != FILTER_ENGINE:
+            # Nothing is built, and only the combinations of a set are sent
+            self.filter_bytes: int = 0
+            self.build_bytes: int = 0
+            self.build_seconds: float = 0.0
+            self.wire_bytes: int = self.elements * _SET_BYTES_PER_ELEMENT + _MESSAGE_BYTES
+            return
+
+        size: int = max(self.elements, 1)
+        if layered and inverted:
+            raise FilterPlanError("A layered filter cannot be inverted")
+        if self.capacity < number_of_voters:
+            raise FilterPlanError(f"The capacity of {self.capacity} voters is below the "
+                                  f"{number_of_voters} voters")
+        if (self.capacity > number_of_voters
+                and backend not in (BloomFilter.backend, BlockedBloomFilter.backend)):
+            raise FilterPlanError(f"The {backend} backend cannot grow as voters join")
+        if counting and backend != BloomFilter.backend:
+            raise FilterPlanError(f"The {backend} backend has no counting variant")
+        if counting and file_backed:
+            raise FilterPlanError("A counting filter cannot be backed by a file")
+        if hash_count is not None and backend != BloomFilter.backend:
+            raise FilterPlanError(f"The {backend} backend does not take a hash count")
+        if hash_scheme not in (DOUBLE, LINEAR):
+            raise FilterPlanError(f"Unknown hash scheme: {hash_scheme}")
+        if hash_scheme != DOUBLE and backend != BloomFilter.backend:
+            raise FilterPlanError(f"The {backend} backend does not take the {hash_scheme} hash "
+                                  "scheme")
+        if codec not in available_codecs():
+            raise FilterPlanError(f"The {codec} codec is not available")
+
+        if backend == BloomFilter.backend:
+            self.filter_bytes: int = math.ceil(
+                bloom_parameters(size, self.lookup_fp_rate, hash_count)[0] / 8)
+        elif backend == BlockedBloomFilter.backend:
+            self.filter_bytes: int = blocked_parameters(size, self.lookup_fp_rate)[0] // 8
+        elif backend == BinaryFuseFilter.backend:
+            try:
+                fingerprint_bytes: int = fingerprint_bits_for(self.lookup_fp_rate) // 8
+            except ValueError as error:
+                raise FilterPlanError(str(error)) from error
+            self.filter_bytes: int = BinaryFuseFilter.layout(size)[2] * fingerprint_bytes
+        elif backend == ExactFilter.backend:
+            self.filter_bytes: int = self.elements * 8
+        else:
+            raise FilterPlanError(f"Unknown filter backend: {backend}")
+        if file_backed and backend not in (BloomFilter.backend, BlockedBloomFilter.backend):
+            raise FilterPlanError(f"The {backend} backend cannot be backed by a file")
+        if shared_memory and backend not in (BloomFilter.backend, BlockedBloomFilter.backend):
+            raise FilterPlanError(f"The {backend} backend cannot be held in shared memory")
+        if shared_memory and file_backed:
+            raise FilterPlanError("A filter cannot be both backed by a file and in shared memory")
+
+        processes: int = min(workers, os.cpu_count() or 1)
+        if backend in _BUILD_BYTES_PER_ELEMENT:
+            self.build_bytes: int = self.elements * _BUILD_BYTES_PER_ELEMENT[backend]
+        elif file_backed:
+            # The filters live in page cache that the kernel can write back to their files
+            self.build_bytes: int = _BATCH_BYTES * workers
+        else:
+            # Every worker fills its own copy of the filter, merged into the FinalVoter's copy
+            copies: int = workers + 1 if workers > 1 else 1
+            self.build_bytes: int = self.filter_bytes * copies + _BATCH_BYTES * workers
+            if counting:
+                # Four bits per counter, plus the standard filter exported from them
+                self.build_bytes += self.filter_bytes * (3 * copies + 1)
+        rate: float = _LINEAR_BUILD_RATE if hash_scheme == LINEAR else _BUILD_RATES[backend]
+        built: int = count_combinations(number_of_voters, threshold, inverted)
+        self.build_seconds: float = built / (rate * processes)
+        self.wire_bytes: int = self._payload_bytes(size) + _MESSAGE_BYTES
+
+    def _payload_bytes(self, size: int) -> int:
+        """
+        Estimate the number of payload bytes sent for the filter.
+
+        A compressed filter cannot get smaller than its entropy: that of the fraction of set bits
+        for a Bloom Filter, and that of a sorted set of random fingerprints for an Exact Filter.
+        Binary Fuse fingerprints are random and do not compress.
+
+        Args:
+            size (int): The number of elements, at least 1.
+
+        Returns:
+            int: The estimated payload size in bytes.
+        """
+        if self.codec == NO_CODEC or self.backend == BinaryFuseFilter.backend:
+            return self.filter_bytes
+        if self.backend == ExactFilter.backend:
+            return min(self.filter_bytes, math.ceil(size * (66 - math.log2(size)) / 8))
+        bits: int = self.filter_bytes * 8
+        hashes: int = (bloom_parameters(size, self.lookup_fp_rate, self.hash_count)[1]
+                       if self.backend == BloomFilter.backend
+                       else blocked_parameters(size, self.lookup_fp_rate)[1])
+        fill: float = 1 - math.exp(-hashes * size / bits)
+        if fill >= 1:
+            return self.filter_bytes
+        entropy: float = -fill * math.log2(fill) - (1 - fill) * math.log2(1 - fill)
+        return math.ceil(bits * entropy / 8)
+
+    def describe(self) -> str:
+        """
+        Return a one-line human readable summary of the plan.
+
+        Returns:
+            str: The summary.
+        """
+        if self.verdict_engine == XOR_ENGINE:
+            return ("Filter plan: no filter, the Tallier compares the combined vote with 0 "
+                    f"({_format_bytes(self.wire_bytes)} on the wire)")
+        if self.verdict_engine == SET_ENGINE:
+            return (f"Filter plan: no filter, the Tallier looks the combined vote up in a set of "
+                    f"{self.elements} vote combinations"
+                    + (f" below {self.threshold}" if self.inverted else "")
+                    + f" ({_format_bytes(self.wire_bytes)} on the wire)")
+        return (f"Filter plan: {self.backend} filter of {self.elements} vote combinations at a "
+                f"{self.fp_rate} false positive rate, {_format_bytes(self.filter_bytes)} "
+                f"({_format_bytes(self.wire_bytes)} on the wire"
+                + (f" with {self.codec}" if self.codec != NO_CODEC else "") + "), about "
+                f"{_format_bytes(self.build_bytes)} of memory and {self.build_seconds:.1f}s to "
+                f"build with {self.workers} process(es)"
+                + (", in a memory-mapped file" if self.file_backed else "")
+                + (", in shared memory" if self.shared_memory else "")
+                + (f", layered for thresholds from {self.threshold} up" if self.layered else "")
+                + (f", inverted to the subsets below {self.threshold}" if self.inverted else "")
+                + (", hashed linearly" if self.hash_scheme == LINEAR else "")
+                + (f", sized to grow to {self.capacity} voters"
+                   if self.capacity > self.number_of_voters else "")
+                + (", with counters for voters to leave" if self.counting else ""))
+
+
+def _format_bytes(size: int) -> str:
+    """
+    Format a number of bytes with a binary unit.
+
+    Args:
+        size (int): The number of bytes.
+
+    Returns:
+        str: The formatted size, e.g. '1.5 MiB'.
+    """
+    value: float = float(size)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def _overrun(plan: FilterPlan, memory_budget: Optional[int],
+             time_budget: Optional[float]) -> float:
+    """
+    Measure how far a plan goes over the tighter of its budgets.
+
+    Args:
+        plan (FilterPlan): The plan to measure.
+        memory_budget (Optional[int]): The memory budget in bytes, if any.
+        time_budget (Optional[float]): The time budget in seconds, if any.
+
+    Returns:
+        float: The largest ratio of estimated cost to budget, 0 without budgets.
+    """
+    ratios: List[float] = [0.0]
+    if memory_budget is not None:
+        ratios.append(plan.build_bytes / max(memory_budget, 1))
+    if time_budget is not None:
+        ratios.append(plan.build_seconds / max(time_budget, 1e-9))
+    return max(ratios)
+
+
+def count_combinations(number_of_voters: int, threshold: int, inverted: bool = False) -> int:
+    """
+    Return the number of vote combinations that reach the threshold, or that do not.
+
+    Args:
+        number_of_voters (int): The total number of voters.
+        threshold (int): The threshold of the election.
+        inverted (bool): Whether to count the subsets below the threshold instead.
+
+    Returns:
+        int: The number of subsets of voters with at least threshold members, or with fewer.
+    """
+    elements: int = 0
+    for i in subset_sizes(number_of_voters, threshold, inverted):
+        elements += math.comb(number_of_voters, i)
+    return elements
+
+
+def choose_verdict_engine(number_of_voters: int, threshold: int) -> str:
+    """
+    Return the cheapest way for the Tallier to reach a verdict without a filter, if any.
+
+    Args:
+        number_of_voters (int): The total number of voters.
+        threshold (int): The threshold of the election.
+
+    Returns:
+        str: 'xor' for a threshold of 1, 'set' when either side of the threshold has at most
+             SET_LIMIT subsets, and 'filter' otherwise.
+    """
+    if threshold == 1:
+        return XOR_ENGINE
+    if min(count_combinations(number_of_voters, threshold),
+           count_combinations(number_of_voters, threshold, True)) <= SET_LIMIT:
+        return SET_ENGINE
+    return FILTER_ENGINE
+
+
+def physical_memory() -> Optional[int]:
+    """
+    Return the amount of physical memory of the machine, if it can be determined.
+
+    Returns:
+        Optional[int]: The number of bytes of physical memory, or None on platforms without
+                       sysconf, such as Windows.
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def plan_filter(number_of_voters: int, threshold: int, fp_rate: float = DEFAULT_FP_RATE,
+                backend: str = AUTO, workers: int = 1, exact_limit: int = DEFAULT_EXACT_LIMIT,
+                memory_budget: Optional[int] = None, time_budget: Optional[float] = None,
+                file_backed: bool = False, hash_count: Optional[int] = None,
+                codec: str = NO_CODEC, layered: bool = False,
+                shared_memory: bool = False, invertible: bool = False,
+                hash_scheme: str = DOUBLE, capacity: Optional[int] = None,
+                counting: bool = False) -> FilterPlan:
+    """
+    Plan the filter of valid vote combinations for an election.
+
+    With the 'auto' backend, elections with no more combinations than the exact limit use an exact
+    filter, and larger ones use whichever probabilistic backend fits the budgets and is estimated
+    to build fastest. A file-backed filter, or one in shared memory, is always one of the Bloom
+    Filter backends, and only the batches being hashed count against a file-backed filter's
+    memory budget. A hash count other than the optimal
+    one is only taken by the standard Bloom Filter. An invertible filter that is not layered is
+    inverted when fewer subsets fall below the threshold than reach it. With the 'auto' backend
+    and no option that needs a filter, thresholds that need none get a plan without one; a set of
+    combinations holds no false positives, so it is always the smaller side. The linear hash scheme
+    is only taken by the standard Bloom Filter. A filter with a capacity above the number of voters
+    is always one of the Bloom Filter backends, and a counting filter is always a standard one.
+
+    Args:
+        number_of_voters (int): The total number of voters.
+        threshold (int): The threshold of the election.
+        fp_rate (float): The target false positive rate.
+        backend (str): The filter backend to use, or 'auto' to let the planner choose.
+        workers (int): The number of processes used to build the filter.
+        exact_limit (int): The largest number of combinations stored in an exact filter by 'auto'.
+        memory_budget (Optional[int]): The most memory, in bytes, the build may use. Defaults to
+                                       the physical memory of the machine.
+        time_budget (Optional[float]): The most time, in seconds, the build may take. Defaults to
+                                       no limit.
+        file_backed (bool): Whether the filter is memory-mapped from a file.
+        hash_count (Optional[int]): A number of hash functions other than the optimal one, for the
+                                    standard Bloom Filter backend.
+        codec (str): The codec the filter is compressed with on the wire.
+        layered (bool): Whether to layer the filter by subset size, so that it can be queried at
+                        any threshold from the given one up.
+        shared_memory (bool): Whether the filter is built in a shared memory segment.
+        invertible (bool): Whether the filter may hold the vote combinations below the threshold
+                           instead, when there are fewer of them.
+        hash_scheme (str): How a standard Bloom Filter derives bit indices, 'double' or 'linear'.
+        capacity (Optional[int]): The number of voters to size the filter for, so that it can be
+                                  grown as voters join. Defaults to the number of voters.
+        counting (bool): Whether to build the filter with 4-bit counters, so that voters can leave.
+
+    Returns:
+        FilterPlan: The plan of the filter to build.
+
+    Raises:
+        FilterPlanError: If the false positive rate is invalid or no backend fits the budgets.
+    """
+    if not 0 < fp_rate < 1:
+        raise FilterPlanError(f"The false positive rate must be between 0 and 1, got {fp_rate}")
+    if memory_budget is None:
+        memory_budget = physical_memory()
+    below_is_smaller: bool = (count_combinations(number_of_voters, threshold, True)
+                              < count_combinations(number_of_voters, threshold))
+    inverted: bool = invertible and not layered and below_is_smaller
+
+    growable: bool = capacity is not None and capacity > number_of_voters
+    if (backend == AUTO
+            and not (layered or file_backed or shared_memory or growable or counting)
+            and hash_count is None and hash_scheme == DOUBLE):
+        verdict_engine: str = choose_verdict_engine(number_of_voters, threshold)
+        if verdict_engine != FILTER_ENGINE:
+            return FilterPlan(number_of_voters, threshold, ExactFilter.backend, fp_rate, workers,
+                              codec=codec,
+                              inverted=verdict_engine == SET_ENGINE and below_is_smaller,
+                              verdict_engine=verdict_engine)
+
+    if backend != AUTO:
+        candidates: List[FilterPlan] = [
+            FilterPlan(number_of_voters, threshold, backend, fp_rate, workers, file_backed,
+                       hash_count, codec, layered, shared_memory, inverted,
+                       hash_scheme=hash_scheme, capacity=capacity,
+                       counting=counting)]
+    elif (count_combinations(number_of_voters, threshold, inverted) <= exact_limit
+          and not (file_backed or shared_memory or growable or counting) and hash_count is None
+          and hash_scheme == DOUBLE):
+        candidates: List[FilterPlan] = [
+            FilterPlan(number_of_voters, threshold, ExactFilter.backend, fp_rate, workers,
+                       codec=codec, layered=layered, inverted=inverted)]
+    else:
+        candidates: List[FilterPlan] = []
+        for name in (BloomFilter.backend, BlockedBloomFilter.backend, BinaryFuseFilter.backend):
+            try:
+                candidates.append(FilterPlan(number_of_voters, threshold, name, fp_rate, workers,
+                                             file_backed, hash_count, codec, layered,
+                                             shared_memory, inverted,
+                                             hash_scheme=hash_scheme, capacity=capacity,
+                                             counting=counting))
+            except FilterPlanError:
+                continue
+        if not candidates:
+            # Report why the standard Bloom Filter, which takes every option, does not fit
+            candidates.append(FilterPlan(number_of_voters, threshold, BloomFilter.backend,
+                                         fp_rate, workers, file_backed, hash_count, codec,
+                                         layered, shared_memory, inverted,
+                                         hash_scheme=hash_scheme, capacity=capacity,
+                                         counting=counting))
+
+    fitting: List[FilterPlan] = [
+        plan for plan in candidates
+        if (memory_budget is None or plan.build_bytes <= memory_budget)
+        and (time_budget is None or plan.build_seconds <= time_budget)
+    ]
+    if fitting:
+        return min(fitting, key=lambda plan: plan.build_seconds)
+
+    closest: FilterPlan = min(candidates,
+                              key=lambda plan: _overrun(plan, memory_budget, time_budget))
+    problems: List[str] = []
+    if memory_budget is not None and closest.build_bytes > memory_budget:
+        problems.append(f"about {_format_bytes(closest.build_bytes)} of memory to build, over the "
+                        f"budget of {_format_bytes(memory_budget)}")
+    if time_budget is not None and closest.build_seconds > time_budget:
+        problems.append(f"about {closest.build_seconds:.0f}s to build, over the budget of "
+                        f"{time_budget}s")
+    raise FilterPlanError(
+        f"Cannot build the filter for {number_of_voters} voters with a threshold of {threshold}: "
+        f"its {closest.elements} vote combinations need a {closest.backend} filter of "
+        f"{_format_bytes(closest.filter_bytes)}, which takes {' and '.join(problems)}"
+    )
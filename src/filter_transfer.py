@@ -0,0 +1,444 @@
+"""
+Streaming transfer of the filter of valid vote combinations from the FinalVoter to the Tallier.
+
+A filter message is framed so that the Tallier knows up front how many bytes to expect:
+
+    magic (4 bytes) | header length (4 bytes, little-endian) | JSON header | payload
+
+The JSON header carries the message fields, such as the type and the FinalVoter's encoded vote,
+the filter parameters under 'bf' and the payload length. The payload is the raw bytes of the
+filter, sent in fixed-size chunks and received directly into the buffer of an empty filter of the
+right backend, so it is never copied or hex-encoded on either side.
+
+A filter held in a memory-mapped file is sent with socket.sendfile, so the kernel copies it
+straight from the file. When the Tallier runs on the same host, the FinalVoter can instead send
+only the path of the file under 'path', with an empty payload, and the Tallier opens the file
+read-only. A filter built in a shared memory segment can likewise be handed over by sending only
+the segment's name under 'shared_memory'; the Tallier attaches to the segment without copying it
+and takes it over, removing its name so that it is freed once both sides have closed it.
+
+The payload can be compressed with a codec named under 'codec' in the header: 'zlib' or 'lzma'
+from the standard library, or 'zstd' when the zstandard package is installed. A compressed
+payload is sent as a series of length-prefixed compressed chunks ending with an empty one, and is
+decompressed chunk by chunk into the filter's buffer. Bloom Filters at their optimal size barely
+compress, so a codec pays off together with a sparser filter that uses fewer hash functions.
+
+Messages from the other voters are plain JSON and are read until the voter closes its connection.
+
+Functions:
+    available_codecs() -> list[str]:
+        Returns the names of the codecs that can be used on this host.
+
+    payload_chunks(buffer: memoryview, chunk_size: int) -> Iterator[memoryview]:
+        Splits a buffer into fixed-size chunks without copying it.
+
+    send_filter_message(client_socket: socket.socket, message: dict, ...) -> int:
+        Sends a message carrying a filter as a framed stream.
+
+    send_filter_path(client_socket: socket.socket, message: dict, ...) -> int:
+        Sends a message carrying the path of a filter file instead of the filter.
+
+    send_filter_shared(client_socket: socket.socket, message: dict, ...) -> int:
+        Sends a message carrying the name of a shared memory segment holding the filter.
+
+    receive_message(client_socket: socket.socket) -> dict:
+        Receives either a framed filter message or a plain JSON message.
+"""
+
+import json
+import lzma
+import os
+import socket
+import struct
+import time
+import zlib
+from typing import Any, Iterable, Iterator, Optional
+from src.bloom_filter import FILE_HEADER_BYTES, BloomFilter
+from src.filters import FILTER_BACKENDS, MembershipFilter, attach_shared_filter, open_filter_file
+
+MAGIC: bytes = b'VBF1'
+CHUNK_SIZE: int = 1 << 20
+_LENGTH: struct.Struct = struct.Struct('<I')
+
+try:
+    import zstandard
+except ImportError:  # zstd compression is optional
+    zstandard = None
+
+NO_CODEC: str = 'none'
+ZLIB: str = 'zlib'
+LZMA: str = 'lzma'
+ZSTD: str = 'zstd'
+CODECS: tuple[str, ...] = (NO_CODEC, ZLIB, LZMA, ZSTD)
+
+
+def available_codecs() -> list[str]:
+    """
+    Return the names of the codecs that can be used on this host.
+
+    Returns:
+        list[str]: The codecs, always including 'none', 'zlib' and 'lzma'.
+    """
+    return [codec for codec in CODECS if codec != ZSTD or zstandard is not None]
+
+
+def _compressor(codec: str) -> Any:
+    """
+    Create a streaming compressor with compress and flush methods for a codec.
+
+    Args:
+        codec (str): The codec name.
+
+    Returns:
+        Any: The compressor.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed.
+    """
+    if codec == ZLIB:
+        return zlib.compressobj()
+    if codec == LZMA:
+        return lzma.LZMACompressor()
+    if codec == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported filter codec: {codec}")
+
+
+def _decompressor(codec: str) -> Any:
+    """
+    Create a streaming decompressor with a decompress method for a codec.
+
+    Args:
+        codec (str): The codec name.
+
+    Returns:
+        Any: The decompressor.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed.
+    """
+    if codec == ZLIB:
+        return zlib.decompressobj()
+    if codec == LZMA:
+        return lzma.LZMADecompressor()
+    if codec == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    raise ValueError(f"Unsupported filter codec: {codec}")
+
+
+def payload_chunks(buffer: memoryview, chunk_size: int = CHUNK_SIZE) -> Iterator[memoryview]:
+    """
+    Split a buffer into fixed-size chunks without copying it.
+
+    Args:
+        buffer (memoryview): The buffer to split.
+        chunk_size (int): The number of bytes per chunk; the last chunk may be shorter.
+
+    Yields:
+        memoryview: Each chunk of the buffer, in order.
+    """
+    buffer = buffer.cast('B')
+    for start in range(0, buffer.nbytes, chunk_size):
+        yield buffer[start:start + chunk_size]
+
+
+def send_filter_message(client_socket: socket.socket, message: dict,
+                        membership_filter: MembershipFilter,
+                        chunks: Optional[Iterable[memoryview]] = None,
+                        codec: str = NO_CODEC) -> int:
+    """
+    Send a message carrying a filter as a framed stream.
+
+    The chunks default to the filter's own buffer, or to its file for a memory-mapped filter. A
+    caller that is still finishing the filter can pass its own chunks instead, such as the chunks
+    yielded by BloomFilter.merge_chunks, as long as they add up to the filter's buffer.
+
+    Args:
+        client_socket (socket.socket): The connected socket to send on.
+        message (dict): The fields of the message, without the filter.
+        membership_filter (MembershipFilter): The filter, used for its header and payload length.
+        chunks (Optional[Iterable[memoryview]]): The payload chunks to send.
+        codec (str): The codec to compress the payload with, 'none' to send it as it is.
+
+    Returns:
+        int: The total number of bytes sent.
+
+    Raises:
+        ValueError: If the codec is unknown or not installed.
+    """
+    payload_bytes: int = membership_filter.buffer().nbytes
+    if codec != NO_CODEC:
+        compressor: Any = _compressor(codec)
+        sent: int = _send_header(client_socket, dict(message, codec=codec), membership_filter,
+                                 payload_bytes)
+        for chunk in chunks if chunks is not None else payload_chunks(membership_filter.buffer()):
+            sent += _send_compressed(client_socket, compressor.compress(chunk))
+        sent += _send_compressed(client_socket, compressor.flush())
+        client_socket.sendall(_LENGTH.pack(0))
+        return sent + _LENGTH.size
+
+    sent: int = _send_header(client_socket, message, membership_filter, payload_bytes)
+    path: Optional[str] = getattr(membership_filter, 'path', None)
+    if chunks is None and path is not None:
+        membership_filter.flush()
+        with open(path, 'rb') as file:
+            client_socket.sendfile(file, FILE_HEADER_BYTES, payload_bytes)
+        return sent + payload_bytes
+
+    if chunks is None:
+        chunks = payload_chunks(membership_filter.buffer())
+    for chunk in chunks:
+        client_socket.sendall(chunk)
+    return sent + payload_bytes
+
+
+def send_filter_path(client_socket: socket.socket, message: dict,
+                     bloom_filter: BloomFilter) -> int:
+    """
+    Send a message carrying the path of a filter file instead of the filter.
+
+    Only works when the receiver can open the same file, such as a Tallier on the same host.
+
+    Args:
+        client_socket (socket.socket): The connected socket to send on.
+        message (dict): The fields of the message, without the filter.
+        bloom_filter (BloomFilter): A filter memory-mapped from a file.
+
+    Returns:
+        int: The total number of bytes sent.
+
+    Raises:
+        ValueError: If the filter is not backed by a file.
+    """
+    if bloom_filter.path is None:
+        raise ValueError("Only a filter backed by a file can be sent by path")
+    bloom_filter.flush()
+    header: dict = dict(message)
+    header['path'] = os.path.abspath(bloom_filter.path)
+    return _send_header(client_socket, header, bloom_filter, 0)
+
+
+def send_filter_shared(client_socket: socket.socket, message: dict,
+                       bloom_filter: BloomFilter) -> int:
+    """
+    Send a message carrying the name of a shared memory segment holding the filter.
+
+    Only works when the receiver can attach to the same segment, such as a Tallier on the same
+    host. The receiver takes the segment over, so the sender should only close it afterwards.
+
+    Args:
+        client_socket (socket.socket): The connected socket to send on.
+        message (dict): The fields of the message, without the filter.
+        bloom_filter (BloomFilter): A filter held in shared memory.
+
+    Returns:
+        int: The total number of bytes sent.
+
+    Raises:
+        ValueError: If the filter is not held in shared memory.
+    """
+    if bloom_filter.shared_memory_name is None:
+        raise ValueError("Only a filter held in shared memory can be sent by segment name")
+    header: dict = dict(message)
+    header['shared_memory'] = bloom_filter.shared_memory_name
+    return _send_header(client_socket, header, bloom_filter, 0)
+
+
+def _send_compressed(client_socket: socket.socket, data: bytes) -> int:
+    """
+    Send one length-prefixed chunk of a compressed payload, unless it is empty.
+
+    Args:
+        client_socket (socket.socket): The connected socket to send on.
+        data (bytes): The compressed bytes.
+
+    Returns:
+        int: The number of bytes sent.
+    """
+    if not data:
+        return 0
+    client_socket.sendall(_LENGTH.pack(len(data)) + data)
+    return _LENGTH.size + len(data)
+
+
+def _send_header(client_socket: socket.socket, message: dict,
+                 membership_filter: MembershipFilter, payload_bytes: int) -> int:
+    """
+    Send the magic, length and JSON header that start a filter message.
+
+    Args:
+        client_socket (socket.socket): The connected socket to send on.
+        message (dict): The fields of the message, without the filter.
+        membership_filter (MembershipFilter): The filter, used for its header.
+        payload_bytes (int): The number of payload bytes that follow the header.
+
+    Returns:
+        int: The number of bytes sent.
+    """
+    header: dict = dict(message)
+    header['bf'] = membership_filter.header()
+    header['payload_bytes'] = payload_bytes
+    encoded_header: bytes = json.dumps(header).encode('utf-8')
+    client_socket.sendall(MAGIC + _LENGTH.pack(len(encoded_header)) + encoded_header)
+    return len(MAGIC) + _LENGTH.size + len(encoded_header)
+
+
+def _receive_into(client_socket: socket.socket, buffer: memoryview) -> int:
+    """
+    Receive into a buffer until it is full or the connection is closed.
+
+    Args:
+        client_socket (socket.socket): The connected socket to receive from.
+        buffer (memoryview): The writable buffer to fill.
+
+    Returns:
+        int: The number of bytes received.
+    """
+    buffer = buffer.cast('B')
+    received: int = 0
+    while received < buffer.nbytes:
+        count: int = client_socket.recv_into(buffer[received:])
+        if count == 0:
+            break
+        received += count
+    return received
+
+
+def _receive_exactly(client_socket: socket.socket, buffer: memoryview) -> None:
+    """
+    Receive into a buffer until it is full.
+
+    Args:
+        client_socket (socket.socket): The connected socket to receive from.
+        buffer (memoryview): The writable buffer to fill.
+
+    Raises:
+        ConnectionError: If the connection is closed before the buffer is full.
+    """
+    if _receive_into(client_socket, buffer) < buffer.nbytes:
+        raise ConnectionError("Connection closed before the whole message was received")
+
+
+def receive_message(client_socket: socket.socket) -> dict:
+    """
+    Receive either a framed filter message or a plain JSON message.
+
+    For a framed message, the filter is rebuilt in place, opened read-only from the file named
+    under 'path' or attached from the shared memory segment named under 'shared_memory', and
+    returned under 'bf' instead of its parameters. The number of payload bytes
+    that crossed the wire and the time spent decompressing them are added under 'wire_bytes' and
+    'decode_seconds'.
+
+    Args:
+        client_socket (socket.socket): The connected socket to receive from.
+
+    Returns:
+        dict: The received message.
+
+    Raises:
+        ConnectionError: If a framed message is cut short.
+        ValueError: If the header of a framed message does not describe the payload.
+    """
+    prefix: bytearray = bytearray(len(MAGIC))
+    received: int = _receive_into(client_socket, memoryview(prefix))
+
+    if received < len(MAGIC) or prefix != MAGIC:
+        # A plain JSON message, sent in one piece by a voter that then closes the connection
+        parts: list[bytes] = [bytes(prefix[:received])]
+        while True:
+            data: bytes = client_socket.recv(65536)
+            if not data:
+                break
+            parts.append(data)
+        return json.loads(b''.join(parts).decode('utf-8'))
+
+    length: bytearray = bytearray(_LENGTH.size)
+    _receive_exactly(client_socket, memoryview(length))
+    encoded_header: bytearray = bytearray(_LENGTH.unpack(length)[0])
+    _receive_exactly(client_socket, memoryview(encoded_header))
+    message: dict = json.loads(encoded_header.decode('utf-8'))
+
+    message['wire_bytes'] = 0
+    message['decode_seconds'] = 0.0
+    if 'path' in message:
+        message['bf'] = open_filter_file(message['path'])
+        return message
+    if 'shared_memory' in message:
+        bloom_filter: BloomFilter = attach_shared_filter(message['shared_memory'])
+        # The receiver owns the segment from now on, and it is freed once the filter is closed
+        bloom_filter.unlink()
+        message['bf'] = bloom_filter
+        return message
+
+    membership_filter: MembershipFilter = FILTER_BACKENDS[message['bf']['backend']].empty(
+        message['bf'])
+    buffer: memoryview = membership_filter.buffer()
+    if buffer.nbytes != message['payload_bytes']:
+        raise ValueError(f"Filter header describes {buffer.nbytes} bytes but the payload is "
+                         f"{message['payload_bytes']} bytes")
+    if message.get('codec', NO_CODEC) == NO_CODEC:
+        _receive_exactly(client_socket, buffer)
+        message['wire_bytes'] = buffer.nbytes
+    else:
+        _receive_compressed(client_socket, buffer, message)
+    message['bf'] = membership_filter
+    return message
+
+
+def _receive_compressed(client_socket: socket.socket, buffer: memoryview, message: dict) -> None:
+    """
+    Receive a compressed payload, decompressing it chunk by chunk into a buffer.
+
+    Args:
+        client_socket (socket.socket): The connected socket to receive from.
+        buffer (memoryview): The writable buffer of the filter, exactly the decompressed size.
+        message (dict): The message header, updated with 'wire_bytes' and 'decode_seconds'.
+
+    Raises:
+        ConnectionError: If the payload is cut short.
+        ValueError: If the codec is unsupported or the payload does not fill the buffer exactly.
+    """
+    buffer = buffer.cast('B')
+    decompressor: Any = _decompressor(message['codec'])
+    length: bytearray = bytearray(_LENGTH.size)
+    offset: int = 0
+    while True:
+        _receive_exactly(client_socket, memoryview(length))
+        message['wire_bytes'] += _LENGTH.size
+        (chunk_bytes,) = _LENGTH.unpack(length)
+        if chunk_bytes == 0:
+            break
+        data: bytearray = bytearray(chunk_bytes)
+        _receive_exactly(client_socket, memoryview(data))
+        message['wire_bytes'] += chunk_bytes
+
+        time1: float = time.perf_counter()
+        offset = _write_decoded(buffer, offset, decompressor.decompress(data))
+        message['decode_seconds'] += time.perf_counter() - time1
+
+    if hasattr(decompressor, 'flush'):
+        offset = _write_decoded(buffer, offset, decompressor.flush())
+    if offset != buffer.nbytes:
+        raise ValueError(f"Compressed filter payload decoded to {offset} bytes, expected "
+                         f"{buffer.nbytes}")
+
+
+def _write_decoded(buffer: memoryview, offset: int, decoded: bytes) -> int:
+    """
+    Copy decompressed bytes into a buffer.
+
+    Args:
+        buffer (memoryview): The writable buffer of the filter.
+        offset (int): The number of bytes already written.
+        decoded (bytes): The decompressed bytes.
+
+    Returns:
+        int: The number of bytes written so far.
+
+    Raises:
+        ValueError: If the bytes do not fit in the buffer.
+    """
+    if offset + len(decoded) > buffer.nbytes:
+        raise ValueError("Compressed filter payload is larger than the filter")
+    buffer[offset:offset + len(decoded)] = decoded
+    return offset + len(decoded)
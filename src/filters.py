@@ -0,0 +1,232 @@
+"""
+Registry of the membership filter backends that the generic variants can use.
+
+The FinalVoter picks a backend by name when it builds the filter of valid vote combinations, and
+the name travels with the serialized filter so that the Tallier can rebuild the right class.
+
+Bloom Filter backends are filled in place. Static backends, such as the Binary Fuse Filter and the
+Exact Filter, are filled through a builder that collects the elements and builds the filter once
+they are all known. A standard Bloom Filter can also be built as a Counting Bloom Filter, from which
+elements can be removed, and which is exported to a standard Bloom Filter to be sent. It is not a
+backend the Tallier receives, but it can be stored in a filter file and opened from one.
+
+Functions:
+    create_filter(backend: str, number_of_elements: int, fp_rate: float, path: Optional[str],
+                  hash_count: Optional[int], shared: bool, hash_scheme: str,
+                  counting: bool) -> FilterBuilder:
+        Creates an empty filter, or a builder for a static filter, ready for batched insertion.
+
+    finish_filter(membership_filter: FilterBuilder) -> MembershipFilter:
+        Returns the finished filter once every element has been inserted.
+
+    filter_from_dict(data_dict: dict) -> MembershipFilter:
+        Recreates a filter of whichever backend produced the dictionary.
+
+    save_filter(membership_filter: MembershipFilter, path: str) -> None:
+        Writes a finished filter of any backend to a filter file.
+
+    filter_from_buffer(buffer: Buffer) -> MembershipFilter:
+        Wraps a filter of whichever backend produced the buffer around it, without copying it.
+
+    open_filter_file(path: str) -> MembershipFilter:
+        Opens a filter file of whichever backend wrote it, read-only.
+
+    attach_shared_filter(name: str) -> BloomFilter:
+        Attaches to a shared memory segment holding a Bloom Filter of any backend.
+"""
+
+import mmap
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional, Union
+from src.binary_fuse_filter import BinaryFuseBuilder, BinaryFuseFilter, fingerprint_bits_for
+from src.blocked_bloom_filter import BlockedBloomFilter
+from src.bloom_filter import (DEFAULT_FP_RATE, DOUBLE, Buffer, BloomFilter, parse_header_page,
+                              read_file_header, write_file_header)
+from src.counting_bloom_filter import CountingBloomFilter
+from src.exact_filter import ExactBuilder, ExactFilter
+
+MembershipFilter = Union[BloomFilter, BinaryFuseFilter, ExactFilter]
+FilterBuilder = Union[BloomFilter, CountingBloomFilter, BinaryFuseBuilder, ExactBuilder]
+
+FILTER_BACKENDS: dict[str, type] = {
+    BloomFilter.backend: BloomFilter,
+    BlockedBloomFilter.backend: BlockedBloomFilter,
+    BinaryFuseFilter.backend: BinaryFuseFilter,
+    ExactFilter.backend: ExactFilter,
+}
+
+# Filters that can be stored in a filter file, including those never sent to the Tallier
+_STORED_BACKENDS: dict[str, type] = {
+    **FILTER_BACKENDS,
+    CountingBloomFilter.backend: CountingBloomFilter,
+}
+
+# Largest number of vote combinations the FinalVoter stores in an Exact Filter by default, 8 MiB
+DEFAULT_EXACT_LIMIT: int = 2**20
+
+
+def create_filter(backend: str, number_of_elements: int, fp_rate: float = DEFAULT_FP_RATE,
+                  path: Optional[str] = None, hash_count: Optional[int] = None,
+                  shared: bool = False, hash_scheme: str = DOUBLE,
+                  counting: bool = False) -> FilterBuilder:
+    """
+    Create an empty filter, or a builder for a static filter, ready for batched insertion.
+
+    Args:
+        backend (str): The name of the backend, one of FILTER_BACKENDS.
+        number_of_elements (int): The expected number of elements.
+        fp_rate (float): The target false positive rate.
+        path (Optional[str]): A file to memory-map the filter from, for Bloom Filter backends.
+        hash_count (Optional[int]): A number of hash functions other than the optimal one, for the
+                                    standard Bloom Filter backend.
+        shared (bool): Whether to hold the filter in a new shared memory segment, for Bloom Filter
+                       backends.
+        hash_scheme (str): How the standard Bloom Filter backend derives bit indices, 'double'
+                           or 'linear'. The other backends only hash with MurmurHash3.
+        counting (bool): Whether to build a Counting Bloom Filter, held in memory, for the
+                         standard Bloom Filter backend.
+
+    Returns:
+        FilterBuilder: The empty filter or builder.
+
+    Raises:
+        ValueError: If the backend is unknown, cannot reach the false positive rate, cannot be
+                    backed by a file or by shared memory or does not take a hash count or the
+                    hash scheme, or cannot count.
+    """
+    if backend not in FILTER_BACKENDS:
+        raise ValueError(f"Unknown filter backend: {backend}")
+    if path is not None and not issubclass(FILTER_BACKENDS[backend], BloomFilter):
+        raise ValueError(f"The {backend} backend cannot be backed by a file")
+    if shared and not issubclass(FILTER_BACKENDS[backend], BloomFilter):
+        raise ValueError(f"The {backend} backend cannot be held in shared memory")
+    if hash_count is not None and backend != BloomFilter.backend:
+        raise ValueError(f"The {backend} backend does not take a hash count")
+    if hash_scheme != DOUBLE and backend != BloomFilter.backend:
+        raise ValueError(f"The {backend} backend does not take the {hash_scheme} hash scheme")
+    if counting and backend != BloomFilter.backend:
+        raise ValueError(f"The {backend} backend has no counting variant")
+    if counting and (path is not None or shared):
+        raise ValueError("A Counting Bloom Filter is only held in memory")
+    if counting:
+        return CountingBloomFilter(number_of_elements, hash_scheme, fp_rate, hash_count)
+    if backend == BinaryFuseFilter.backend:
+        return BinaryFuseBuilder(fingerprint_bits_for(fp_rate))
+    if backend == ExactFilter.backend:
+        return ExactBuilder()
+    if backend == BloomFilter.backend:
+        return BloomFilter(number_of_elements, hash_scheme, fp_rate, path, hash_count, shared)
+    return FILTER_BACKENDS[backend](number_of_elements, DOUBLE, fp_rate, path, shared=shared)
+
+
+def finish_filter(membership_filter: FilterBuilder) -> MembershipFilter:
+    """
+    Return the finished filter once every element has been inserted.
+
+    Args:
+        membership_filter (FilterBuilder): The filled filter or builder.
+
+    Returns:
+        MembershipFilter: The filter itself, or the static filter built from the builder.
+    """
+    if isinstance(membership_filter, (BinaryFuseBuilder, ExactBuilder)):
+        return membership_filter.build()
+    return membership_filter
+
+
+def filter_from_dict(data_dict: dict) -> MembershipFilter:
+    """
+    Recreate a filter of whichever backend produced the dictionary.
+
+    Dictionaries without a backend come from standard Bloom Filters.
+
+    Args:
+        data_dict (dict): The dictionary produced by the filter's to_dict method.
+
+    Returns:
+        MembershipFilter: The recreated filter.
+    """
+    backend: str = data_dict.get('backend', BloomFilter.backend)
+    return FILTER_BACKENDS[backend].from_dict(data_dict)
+
+
+def save_filter(membership_filter: MembershipFilter, path: str) -> None:
+    """
+    Write a finished filter of any backend to a filter file.
+
+    The file has the layout of a memory-mapped Bloom Filter, a header page holding the filter's
+    parameters followed by its payload, so a Bloom Filter saved this way can be memory-mapped
+    straight back.
+
+    Args:
+        membership_filter (MembershipFilter): The filter to write.
+        path (str): The path of the file to create.
+    """
+    with open(path, 'wb') as file:
+        write_file_header(file, membership_filter.header())
+        file.write(membership_filter.buffer())
+
+
+def filter_from_buffer(buffer: Buffer) -> MembershipFilter:
+    """
+    Wrap a filter of whichever backend produced the buffer around it, without copying it.
+
+    Args:
+        buffer (Buffer): A buffer made by a filter's to_buffer method, or the bytes or memory map
+                         of a filter file.
+
+    Returns:
+        MembershipFilter: The filter, sharing the buffer's memory.
+    """
+    return _STORED_BACKENDS[parse_header_page(buffer)['backend']].from_buffer(buffer)
+
+
+def open_filter_file(path: str) -> MembershipFilter:
+    """
+    Open a filter file of whichever backend wrote it, read-only.
+
+    The file is memory-mapped and the filter wrapped around the mapping, so only the pages that
+    checks touch are read. A Bloom Filter also keeps the file's path, so it can be sent with
+    sendfile or by path.
+
+    Args:
+        path (str): The path of the filter file.
+
+    Returns:
+        MembershipFilter: The filter stored in the file.
+
+    Raises:
+        ValueError: If the file is not a filter file, or is shorter than its filter.
+    """
+    header: dict = read_file_header(path)
+    filter_class: type = _STORED_BACKENDS[header['backend']]
+    if issubclass(filter_class, BloomFilter):
+        return filter_class.open(path)
+    with open(path, 'rb') as file:
+        mapping: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    # The filter's arrays keep the mapping alive for as long as the filter is used
+    return filter_class.from_buffer(mapping)
+
+
+def attach_shared_filter(name: str) -> BloomFilter:
+    """
+    Attach to a shared memory segment holding a Bloom Filter of any backend, without copying it.
+
+    Args:
+        name (str): The name of the shared memory segment.
+
+    Returns:
+        BloomFilter: The filter, whose bit array is the segment's memory.
+
+    Raises:
+        FileNotFoundError: If there is no segment with that name.
+        ValueError: If the segment does not hold a Bloom Filter.
+    """
+    shared_memory: SharedMemory = SharedMemory(name=name)
+    try:
+        backend: str = parse_header_page(shared_memory.buf)['backend']
+    finally:
+        shared_memory.close()
+    if not issubclass(FILTER_BACKENDS[backend], BloomFilter):
+        raise ValueError(f"The {backend} backend cannot be held in shared memory")
+    return FILTER_BACKENDS[backend].attach(name)
@@ -8,13 +8,100 @@ running the final voter operations.
 
 import itertools
 import json
-import math
+import multiprocessing
+import os
 import socket
 import time
-from typing import List
-from src.bloom_filter import BloomFilter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
+from src.blocked_bloom_filter import BlockedBloomFilter
+from src.bloom_filter import LINEAR, BloomFilter, linear_hash, to_hashes, to_keys
+from src.counting_bloom_filter import CountingBloomFilter
+from src.filter_cache import FilterCache, cache_key
 from src.final_voter import FinalVoter
-from src.helpers import prf
+from src.filter_planner import FILTER_ENGINE, SET_ENGINE, FilterPlan, plan_filter
+from src.filter_transfer import (CHUNK_SIZE, send_filter_message, send_filter_path,
+                                 send_filter_shared)
+from src.filters import FilterBuilder, MembershipFilter, create_filter, finish_filter
+from src.helpers import COMPATIBLE, PRFEngine
+from src.layered_filter import tag_hashes, tag_keys
+from src.prf_table import PRFTable
+from src.subset_enumeration import (prefix_shards, shard_size, shard_xors, subset_sizes,
+                                     subset_xors, threshold_subset_xors)
+
+
+# Number of vote combinations hashed and inserted into the bloom filter at a time
+BATCH_SIZE: int = 65536
+
+
+def fill_filter(bloom_filter: FilterBuilder, xors: Iterable[int],
+                cardinality: Optional[int] = None, hashed: bool = False,
+                remove: bool = False) -> None:
+    """
+    Stream vote combinations into a Bloom Filter in fixed-size batches, or out of a Counting
+    Bloom Filter.
+
+    Args:
+        bloom_filter (FilterBuilder): The filter, or static filter builder, to fill.
+        xors (Iterable[int]): The vote combinations to insert.
+        cardinality (Optional[int]): The subset size of every combination, to tag them with for a
+                                     layered filter, or None.
+        hashed (bool): Whether the combinations are XORs of the members' linear hashes rather than
+                       of their vote representations, and so already the combinations' hashes.
+        remove (bool): Whether to remove the combinations from a Counting Bloom Filter instead of
+                       inserting them.
+    """
+    xors = iter(xors)
+    while True:
+        batch: List[int] = list(itertools.islice(xors, BATCH_SIZE))
+        if not batch:
+            return
+        if hashed:
+            hashes: np.ndarray = to_hashes(batch)
+            if cardinality is not None:
+                hashes = tag_hashes(hashes, cardinality)
+            if remove:
+                bloom_filter.remove_hashes(hashes)
+            else:
+                bloom_filter.add_hashes(hashes)
+            continue
+        keys: np.ndarray = to_keys(batch)
+        if cardinality is not None:
+            keys = tag_keys(keys, cardinality)
+        if remove:
+            bloom_filter.remove_many(keys)
+        else:
+            bloom_filter.add_many(keys)
+
+
+def build_shards(plan: FilterPlan, vote_representations: List[int],
+                 shards: List[tuple[int, int]], path: Optional[str] = None) -> FilterBuilder:
+    """
+    Fill a Bloom Filter with the vote combinations of a group of shards.
+
+    Runs in a worker process. Every worker sizes its filter from the same total element count, so
+    the resulting filters line up and can be merged. A file-backed filter is returned to the
+    FinalVoter as its path, not its bits.
+
+    Args:
+        plan (FilterPlan): The plan of the filter, including the total number of elements.
+        vote_representations (List[int]): The vote representations of every voter, or their
+                                           linear hashes for a linearly hashed filter.
+        shards (List[tuple[int, int]]): The (subset size, smallest member) shards to enumerate.
+        path (Optional[str]): A file to memory-map the worker's Bloom Filter from.
+
+    Returns:
+        FilterBuilder: The worker's partial filter, or static filter builder.
+    """
+    bloom_filter: FilterBuilder = create_filter(plan.backend, plan.elements, plan.lookup_fp_rate,
+                                                path, plan.hash_count,
+                                                hash_scheme=plan.hash_scheme,
+                                                counting=plan.counting)
+    for shard in shards:
+        fill_filter(bloom_filter, shard_xors(vote_representations, shard),
+                    shard[0] if plan.layered else None, plan.hash_scheme == LINEAR)
+    return bloom_filter
 
 
 class GenericFinalVoter(FinalVoter):
@@ -27,15 +114,44 @@ class GenericFinalVoter(FinalVoter):
         voter_index (int): The index of the voter.
         offset (int): An offset value used in generating the masking value.
         threshold (int): The threshold for creating combinations in the bloom filter.
+        filter_threshold (int): The smallest subset size held in the bloom filter, the lowest
+                                layer of a layered plan and the threshold otherwise.
+        workers (int): The number of processes used to build the bloom filter.
+        plan (FilterPlan): The plan of the bloom filter, including its backend, its false positive
+                           rate and whether it is built in shared memory.
+        filter_path (Optional[str]): A file to memory-map the bloom filter from, or None to build
+                                     it in memory.
+        send_path (bool): Whether to send the tallier the path of the filter file instead of the
+                          filter itself.
+        cache (Optional[FilterCache]): A cache of prebuilt bloom filters to load the bloom filter
+                                       from, and to store it in when it is built, or None.
+        prf_engine (PRFEngine): The PRF keyed with the key, in the election's PRF mode, or a
+                                precomputed table of its outputs.
 
     Methods:
         mask_vote(masking_value: int) -> int:
             Masks the voter's vote using the masking value.
 
-        create_bloom_filter() -> BloomFilter:
+        vote_representations(number_of_voters: Optional[int]) -> List[int]:
+            Derives the vote representation of every voter.
+
+        create_bloom_filter() -> MembershipFilter:
             Creates a bloom filter with all valid vote combinations.
 
-        start_server() -> None:
+        fill_bloom_filter() -> tuple[FilterBuilder, List[FilterBuilder]]:
+            Fills a bloom filter with all valid vote combinations, leaving the final merge to the
+            caller.
+
+        grow_bloom_filter(bloom_filter: FilterBuilder, voters: int) -> None:
+            Inserts the vote combinations of the voters who joined an electorate of fewer voters.
+
+        shrink_bloom_filter(counting_filter: CountingBloomFilter, voters: int) -> None:
+            Removes the vote combinations of the voters who left an electorate of more voters.
+
+        listen() -> socket.socket:
+            Opens the server socket the other voters send their masking values to.
+
+        start_server(server_socket: Optional[socket.socket]) -> None:
             Starts the server to receive masking values from other voters.
 
         run() -> None:
@@ -44,13 +160,28 @@ class GenericFinalVoter(FinalVoter):
     """
 
     def __init__(self, key: bytes, voter_id: str, voter_index: int, vote: int, offset: int,
-                 threshold: int, number_of_voters: int, port: int, tallier_port: int) -> None:
+                 threshold: int, number_of_voters: int, port: int, tallier_port: int,
+                 workers: int = 1, plan: Optional[FilterPlan] = None,
+                 filter_path: Optional[str] = None, send_path: bool = False,
+                 cache: Optional[FilterCache] = None, prf_mode: str = COMPATIBLE,
+                 prf_table: Optional[PRFTable] = None) -> None:
         super().__init__(number_of_voters, vote, port, tallier_port)
         self.key: bytes = key
         self.voter_id: str = voter_id
         self.voter_index: int = voter_index
         self.offset: int = offset
         self.threshold: int = threshold
+        self.workers: int = workers
+        # Planning up front refuses an election whose filter cannot be built before any work
+        self.plan: FilterPlan = plan or plan_filter(number_of_voters, threshold, workers=workers,
+                                                    file_backed=filter_path is not None)
+        # A layered filter holds every subset size from its lowest layer up, whatever the threshold
+        self.filter_threshold: int = self.plan.threshold if self.plan.layered else threshold
+        self.filter_path: Optional[str] = filter_path
+        self.send_path: bool = send_path
+        self.cache: Optional[FilterCache] = cache
+        # A precomputed table answers for the engine, computing only what it does not hold
+        self.prf_engine: PRFEngine = prf_table or PRFEngine(key, prf_mode)
 
     def mask_vote(self, masking_value: int) -> int:
         """
@@ -65,41 +196,268 @@ class GenericFinalVoter(FinalVoter):
         if self.vote == 0:
             vote: int = 0
         else:
-            vote: int = prf(self.key, f"2{self.offset}{self.voter_index}{self.voter_id}")
+            vote: int = self.prf_engine.prf(2, self.offset, self.voter_index, self.voter_id)
         return vote ^ masking_value
 
-    def create_bloom_filter(self) -> BloomFilter:
+    def vote_representations(self, number_of_voters: Optional[int] = None) -> List[int]:
+        """
+        Derive the vote representation of every voter.
+
+        Args:
+            number_of_voters (Optional[int]): The number of voters to derive the representations
+                                              of, including any who left. Defaults to the number
+                                              of voters.
+
+        Returns:
+            List[int]: The value each voter's vote for is masked from, by voter index.
+        """
+        if number_of_voters is None:
+            number_of_voters = self.number_of_voters
+        indexes: range = range(0, number_of_voters)
+        outputs: List[bytes] = self.prf_engine.prf_many(2, self.offset, indexes,
+                                                        (f"voter{i}" for i in indexes))
+        return [int.from_bytes(output, byteorder='big') for output in outputs]
+
+    def create_bloom_filter(self) -> MembershipFilter:
         """
         Create a bloom filter with all valid vote combinations based on the threshold.
 
+        The backend and false positive rate of the filter come from the plan, and so does whether
+        it holds the subsets below the threshold instead of those that reach it. With a cache, a
+        prebuilt filter for the same key and election is loaded instead, and a built filter is
+        stored for the next run. When only the filter of a smaller electorate with the same plan is
+        cached, it is grown to this one instead of building the filter from scratch, and so is the
+        counting filter of a larger one shrunk. A counting plan gives a Counting Bloom Filter, which
+        is exported to a standard one before it is sent.
+
         Returns:
-            BloomFilter: The created bloom filter.
-        """
-        elements: int = 0
-        for i in range(self.threshold, self.number_of_voters + 1):
-            elements += math.comb(self.number_of_voters, i)
-        bloom_filter = BloomFilter(elements)
-        vote_representations: List[int] = []
-
-        for i in range(0, self.number_of_voters):
-            vote_rep: int = prf(self.key, f"2{self.offset}{i}voter{i}")
-            vote_representations.append(vote_rep)
-
-        for i in range(self.threshold, self.number_of_voters + 1):
-            for comb in itertools.combinations(vote_representations, i):
-                xor: int = 0
-                for rep in comb:
-                    xor ^= rep
-                bloom_filter.add(xor)
+            MembershipFilter: The created bloom filter, of the planned backend.
+        """
+        digest: Optional[str] = None
+        if self.cache is not None:
+            digest = cache_key(self.key, self.offset, self.number_of_voters,
+                               self.filter_threshold, self.plan, self.prf_engine.mode)
+            cached_filter: Optional[MembershipFilter] = self.cache.load(digest)
+            if cached_filter is not None:
+                print(f"Bloom Filter cache hit: {self.cache.path(digest)}")
+                return cached_filter
+            print(f"Bloom Filter cache miss: {self.cache.path(digest)}")
+
+        bloom_filter: Optional[FilterBuilder] = None
+        if self.cache is not None:
+            bloom_filter = self._resize_cached_filter()
+        if bloom_filter is None:
+            bloom_filter, partial_filters = self.fill_bloom_filter()
+            for partial_filter in partial_filters:
+                bloom_filter.merge(partial_filter)
+            self._discard(partial_filters)
+            bloom_filter = finish_filter(bloom_filter)
+
+        if self.cache is not None:
+            path: str = self.cache.store(digest, bloom_filter)
+            evicted: List[str] = self.cache.evict(keep=path)
+            print(f"Bloom Filter stored in cache: {path} ({len(evicted)} filter(s) evicted)")
         return bloom_filter
 
-    def start_server(self) -> None:
+    def fill_bloom_filter(self) -> tuple[FilterBuilder, List[FilterBuilder]]:
         """
-        Starts the server to receive masking values from other voters.
+        Fill a bloom filter with all valid vote combinations, leaving the final merge to the caller.
+
+        With several workers, every worker returns its own partial filter, and those still have to
+        be merged into the returned filter. Leaving the merge to the caller lets a Bloom Filter be
+        merged and sent one chunk at a time.
+
+        Returns:
+            tuple[FilterBuilder, List[FilterBuilder]]: The filter, or static filter builder, and
+                                                       the partial filters to merge into it.
+        """
+        # A counting filter is built in memory and only its export is put in shared memory
+        bloom_filter: FilterBuilder = create_filter(self.plan.backend, self.plan.elements,
+                                                    self.plan.lookup_fp_rate, self.filter_path,
+                                                    self.plan.hash_count,
+                                                    self.plan.shared_memory
+                                                    and not self.plan.counting,
+                                                    self.plan.hash_scheme, self.plan.counting)
+        vote_representations: List[int] = self.vote_representations()
+        hashed: bool = self.plan.hash_scheme == LINEAR
+        if hashed:
+            # Linear hashes XOR like the values they hash, so the subsets are never hashed
+            vote_representations = [linear_hash(vote_rep) for vote_rep in vote_representations]
+
+        if self.workers > 1:
+            return bloom_filter, self._fill_in_parallel(vote_representations)
+        # Consecutive subsets differ by a single swap, so each XOR costs two operations
+        if self.plan.layered:
+            for cardinality in range(self.filter_threshold, self.number_of_voters + 1):
+                fill_filter(bloom_filter, subset_xors(vote_representations, cardinality),
+                            cardinality, hashed)
+        else:
+            fill_filter(bloom_filter,
+                        threshold_subset_xors(vote_representations, self.filter_threshold,
+                                              self.plan.inverted), hashed=hashed)
+        return bloom_filter, []
+
+    def grow_bloom_filter(self, bloom_filter: FilterBuilder, voters: int) -> None:
+        """
+        Insert the vote combinations of the voters who joined an electorate of fewer voters.
+
+        The filter of the first voters already holds every combination of theirs, so only the
+        combinations that include a voter who joined are inserted, each voter joining in turn. A
+        voter who joins never changes the side of the threshold an existing combination is on.
+        The filter must have been planned with a capacity of at least the number of voters.
+
+        Args:
+            bloom_filter (FilterBuilder): The filter of the first voters, with the same plan.
+            voters (int): The number of voters the filter was filled for.
+        """
+        self._fill_joined(bloom_filter, voters, self.number_of_voters, remove=False)
+
+    def shrink_bloom_filter(self, counting_filter: CountingBloomFilter, voters: int) -> None:
+        """
+        Remove the vote combinations of the voters who left an electorate of more voters.
+
+        Voters are indexed by the order they joined in, so the voters who left are the last ones,
+        and every combination that includes one of them is removed from the counters.
+
+        Args:
+            counting_filter (CountingBloomFilter): The counting filter of the larger electorate,
+                                                   with the same plan.
+            voters (int): The number of voters the filter was filled for.
+        """
+        self._fill_joined(counting_filter, self.number_of_voters, voters, remove=True)
+
+    def _fill_joined(self, bloom_filter: FilterBuilder, first: int, last: int,
+                     remove: bool) -> None:
+        """
+        Insert or remove the vote combinations that include any of the voters from first to last.
+
+        Each combination is visited once, with the voter of highest index among its members.
+
+        Args:
+            bloom_filter (FilterBuilder): The filter to fill, or the counting filter to empty.
+            first (int): The index of the first voter whose combinations are visited.
+            last (int): The number of voters of the larger electorate.
+            remove (bool): Whether to remove the combinations instead of inserting them.
+        """
+        vote_representations: List[int] = self.vote_representations(last)
+        hashed: bool = self.plan.hash_scheme == LINEAR
+        if hashed:
+            vote_representations = [linear_hash(vote_rep) for vote_rep in vote_representations]
+
+        for voter in range(first, last):
+            previous: List[int] = vote_representations[:voter]
+            vote_rep: int = vote_representations[voter]
+            for cardinality in subset_sizes(voter + 1, self.filter_threshold, self.plan.inverted):
+                if cardinality == 0:
+                    continue
+                fill_filter(bloom_filter,
+                            (vote_rep ^ xor for xor in subset_xors(previous, cardinality - 1)),
+                            cardinality if self.plan.layered else None, hashed, remove)
+
+    def _resize_cached_filter(self) -> Optional[FilterBuilder]:
+        """
+        Resize the cached filter of the closest electorate with the same plan, if any.
+
+        A filter of fewer voters is grown, and the counting filter of more voters, up to the
+        capacity, is shrunk.
+
+        Returns:
+            Optional[FilterBuilder]: A resized copy of the cached filter, or None if no filter
+                                     could be resized.
+        """
+        if self.plan.backend not in (BloomFilter.backend, BlockedBloomFilter.backend):
+            return None
+        larger: range = range(self.number_of_voters + 1,
+                              self.plan.capacity + 1 if self.plan.counting else 0)
+        candidates: List[int] = sorted(itertools.chain(range(1, self.number_of_voters), larger),
+                                       key=lambda voters: abs(voters - self.number_of_voters))
+        for voters in candidates:
+            digest: str = cache_key(self.key, self.offset, voters, self.filter_threshold,
+                                    self.plan, self.prf_engine.mode)
+            cached_filter: Optional[MembershipFilter] = self.cache.load(digest)
+            if cached_filter is None:
+                continue
+            # The cached filter is memory-mapped read-only, so it is resized in a copy
+            bloom_filter: FilterBuilder = type(cached_filter).empty(cached_filter.header())
+            bloom_filter.buffer()[:] = cached_filter.buffer()
+            cached_filter.close()
+            if voters < self.number_of_voters:
+                self.grow_bloom_filter(bloom_filter, voters)
+                print(f"Bloom Filter grown from {voters} to {self.number_of_voters} voters: "
+                      f"{self.cache.path(digest)}")
+            else:
+                self.shrink_bloom_filter(bloom_filter, voters)
+                print(f"Bloom Filter shrunk from {voters} to {self.number_of_voters} voters: "
+                      f"{self.cache.path(digest)}")
+            return bloom_filter
+        return None
+
+    def _fill_in_parallel(self, vote_representations: List[int]) -> List[FilterBuilder]:
+        """
+        Fill partial bloom filters by splitting the combinations across a pool of worker processes.
+
+        Shards are handed out largest first to the least loaded worker, and each worker fills its
+        own copy of the filter.
+
+        Args:
+            vote_representations (List[int]): The vote representations of every voter, or their
+                                              linear hashes for a linearly hashed filter.
+
+        Returns:
+            List[FilterBuilder]: The partial filter, or static filter builder, of every worker.
+        """
+        shards: List[tuple[int, int]] = prefix_shards(self.number_of_voters, self.filter_threshold,
+                                                      self.plan.inverted)
+        shards.sort(key=lambda shard: shard_size(self.number_of_voters, shard), reverse=True)
+
+        groups: List[List[tuple[int, int]]] = [[] for _ in range(self.workers)]
+        loads: List[int] = [0] * self.workers
+        for shard in shards:
+            worker: int = loads.index(min(loads))
+            groups[worker].append(shard)
+            loads[worker] += shard_size(self.number_of_voters, shard)
+
+        tasks = [(self.plan, vote_representations, group,
+                  f"{self.filter_path}.part{index}" if self.filter_path else None)
+                 for index, group in enumerate(groups) if group]
+        with multiprocessing.Pool(len(tasks)) as pool:
+            return pool.starmap(build_shards, tasks)
+
+    @staticmethod
+    def _discard(partial_filters: List[FilterBuilder]) -> None:
+        """
+        Release the workers' partial filters once they are merged, deleting any of their files.
+
+        Args:
+            partial_filters (List[FilterBuilder]): The merged partial filters.
+        """
+        for partial_filter in partial_filters:
+            if isinstance(partial_filter, BloomFilter) and partial_filter.path is not None:
+                partial_filter.close()
+                os.remove(partial_filter.path)
+
+    def listen(self) -> socket.socket:
+        """
+        Opens the server socket the other voters send their masking values to.
+
+        Returns:
+            socket.socket: A socket bound to the final voter's port and listening.
         """
         server_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         server_socket.bind(('localhost', self.port))
         server_socket.listen(self.number_of_voters)
+        return server_socket
+
+    def start_server(self, server_socket: Optional[socket.socket] = None) -> None:
+        """
+        Starts the server to receive masking values from other voters.
+
+        Args:
+            server_socket (Optional[socket.socket]): A socket already returned by listen, or None
+                                                     to open one.
+        """
+        if server_socket is None:
+            server_socket = self.listen()
 
         while len(self.masking_values) < self.number_of_voters - 1:
             client_socket, _ = server_socket.accept()
@@ -108,41 +466,136 @@ class GenericFinalVoter(FinalVoter):
                 self.masking_values.append(int(data.decode()))
             client_socket.close()
 
+    def _build_for_sending(self) -> tuple[FilterBuilder, List[FilterBuilder], float]:
+        """
+        Fill the bloom filter and finish it, unless its partial filters can be merged as it is sent.
+
+        Only the partial filters of several workers can be merged as the filter is sent. A filter
+        filled by a single worker is finished before it is sent, as any combination can set any of
+        its bits, so none of its chunks is final until every combination is inserted.
+
+        With a cache the filter is always finished, as the whole filter is loaded or stored, and
+        so is a filter in shared memory, as the tallier reads it whole from the segment. A filter
+        loaded from the cache is copied into a shared memory segment once when one is planned. A
+        counting filter is merged whole and exported to the standard filter that is sent.
+
+        Returns:
+            tuple[FilterBuilder, List[FilterBuilder], float]: The filter, the partial filters still
+                                                              to be merged into it, and the time
+                                                              taken.
+        """
+        time1: float = time.perf_counter()
+        if self.cache is not None:
+            bloom_filter: FilterBuilder = self.create_bloom_filter()
+            if self.plan.counting:
+                bloom_filter = bloom_filter.to_bloom_filter(self.plan.shared_memory)
+            elif self.plan.shared_memory and bloom_filter.shared_memory_name is None:
+                shared_filter: BloomFilter = type(bloom_filter).empty(bloom_filter.header(),
+                                                                      shared=True)
+                shared_filter.buffer()[:] = bloom_filter.buffer()
+                bloom_filter.close()
+                bloom_filter = shared_filter
+            time2: float = time.perf_counter()
+            return bloom_filter, [], time2 - time1
+        bloom_filter, partial_filters = self.fill_bloom_filter()
+        if not (partial_filters and isinstance(bloom_filter, BloomFilter) and not self.send_path
+                and not self.plan.shared_memory):
+            for partial_filter in partial_filters:
+                bloom_filter.merge(partial_filter)
+            self._discard(partial_filters)
+            partial_filters = []
+            bloom_filter = finish_filter(bloom_filter)
+            if self.plan.counting:
+                bloom_filter = bloom_filter.to_bloom_filter(self.plan.shared_memory)
+        time2: float = time.perf_counter()
+        return bloom_filter, partial_filters, time2 - time1
+
     def run(self) -> None:
         """
         Runs the final voter operations, including sending the vote and bloom filter to the tallier.
+
+        The bloom filter only depends on the PRF key, the offset and the voter IDs, so it is built
+        in the background while the masking values are collected. When the plan's verdict engine
+        needs no filter, none is built, and the tallier is sent the few combinations it needs, if
+        any, in a plain message.
         """
         print("FinalVoter started")
         start: float = time.perf_counter()
 
-        self.start_server()
+        # Listen before the build starts so that no voter finds the port closed
+        server_socket: socket.socket = self.listen()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            build: Optional[Future] = (executor.submit(self._build_for_sending)
+                                       if self.plan.verdict_engine == FILTER_ENGINE else None)
 
-        time1: float = time.perf_counter()
-        masking_value: int = self.generate_masking_value()
-        time2: float = time.perf_counter()
-        print(f"Time taken for FinalVoter to generate masking value: {time2-time1}")
+            time1: float = time.perf_counter()
+            self.start_server(server_socket)
+            time2: float = time.perf_counter()
+            print(f"Time taken for FinalVoter to collect masking values: {time2-time1}")
 
-        time1: float = time.perf_counter()
-        encoded_vote: int = self.mask_vote(masking_value)
-        time2: float = time.perf_counter()
-        print(f"Time taken for FinalVoter to mask vote: {time2-time1}")
+            time1: float = time.perf_counter()
+            masking_value: int = self.generate_masking_value()
+            time2: float = time.perf_counter()
+            print(f"Time taken for FinalVoter to generate masking value: {time2-time1}")
 
-        time1: float = time.perf_counter()
-        bloom_filter: BloomFilter = self.create_bloom_filter()
-        time2: float = time.perf_counter()
-        print(f"Time taken for FinalVoter to create and fill Bloom Filter: {time2-time1}")
+            time1: float = time.perf_counter()
+            encoded_vote: int = self.mask_vote(masking_value)
+            time2: float = time.perf_counter()
+            print(f"Time taken for FinalVoter to mask vote: {time2-time1}")
+
+            bloom_filter: Optional[FilterBuilder] = None
+            partial_filters: List[FilterBuilder] = []
+            if build is not None:
+                time1: float = time.perf_counter()
+                bloom_filter, partial_filters, build_time = build.result()
+                time2: float = time.perf_counter()
+                print(f"Time taken for FinalVoter to create and fill Bloom Filter: {build_time}")
+                print(f"Time FinalVoter waited for Bloom Filter after masking vote: {time2-time1}")
+
+        chunks: Optional[Iterator[memoryview]] = None
+        if partial_filters:
+            # Merge the workers' filters one chunk at a time while the merged chunks are sent
+            chunks = bloom_filter.merge_chunks(partial_filters, CHUNK_SIZE)
 
         client_socket: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         client_socket.connect(('localhost', self.tallier_port))
 
         message = {
             'type': 'vote_bf',
-            'vote': encoded_vote,
-            'bf': bloom_filter.to_dict()
+            'vote': encoded_vote
         }
+        if self.plan.layered:
+            # The tallier needs the layers to query the filter at its own threshold
+            message['layers'] = [self.filter_threshold, self.number_of_voters]
+        if self.plan.inverted:
+            # The filter holds the subsets below the threshold, so the tallier inverts its answer
+            message['inverted'] = True
 
-        client_socket.sendall(json.dumps(message).encode('utf-8'))
+        time1: float = time.perf_counter()
+        if self.plan.verdict_engine != FILTER_ENGINE:
+            message['verdict_engine'] = self.plan.verdict_engine
+            if self.plan.verdict_engine == SET_ENGINE:
+                message['combinations'] = list(threshold_subset_xors(
+                    self.vote_representations(), self.threshold, self.plan.inverted))
+            data: bytes = json.dumps(message).encode('utf-8')
+            client_socket.sendall(data)
+            sent: int = len(data)
+        elif self.send_path:
+            sent: int = send_filter_path(client_socket, message, bloom_filter)
+        elif self.plan.shared_memory:
+            sent: int = send_filter_shared(client_socket, message, bloom_filter)
+            # The tallier closes the connection once it has attached to the segment, and only
+            # then can the segment be closed here without being freed first on every platform
+            client_socket.recv(1)
+        else:
+            sent: int = send_filter_message(client_socket, message, bloom_filter, chunks,
+                                            self.plan.codec)
         client_socket.close()
+        if self.plan.shared_memory:
+            bloom_filter.close()
+        self._discard(partial_filters)
+        time2: float = time.perf_counter()
+        print(f"Time taken for FinalVoter to send Bloom Filter ({sent} bytes): {time2-time1}")
 
         end: float = time.perf_counter()
 
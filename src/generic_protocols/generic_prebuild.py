@@ -0,0 +1,62 @@
+"""
+Script to build the Bloom Filter of a generic election ahead of time and store it in a filter cache.
+
+The FinalVoter of a later run with the same PRF key, number of voters, threshold and filter plan
+loads the prebuilt filter from the cache instead of building it while the election runs.
+"""
+
+import time
+from typing import Optional
+
+from src.filter_cache import FilterCache
+from src.filter_planner import FILTER_ENGINE, FilterPlan, plan_filter
+from src.generic_protocols.generic_final_voter import GenericFinalVoter
+from src.helpers import COMPATIBLE
+from src.prf_table import PRFTable
+
+
+def generic_prebuild(number_of_voters: int, threshold: int, key: bytes, cache: FilterCache,
+                     workers: int = 1, plan: Optional[FilterPlan] = None,
+                     filter_path: Optional[str] = None, prf_mode: str = COMPATIBLE,
+                     prf_table: Optional[PRFTable] = None) -> None:
+    """
+    Build the Bloom Filter of a generic election and store it in a filter cache.
+
+    Both generic variants use the same filter, so one prebuilt filter serves either of them.
+
+    Args:
+        number_of_voters (int): The total number of voters.
+        threshold (int): The threshold for computing the final verdict.
+        key (bytes): The shared PRF key the election will use.
+        cache (FilterCache): The cache to store the filter in.
+        workers (int): The number of processes used to build the Bloom Filter.
+        plan (Optional[FilterPlan]): The plan of the Bloom Filter. Defaults to the plan chosen
+                                     automatically for the election.
+        filter_path (Optional[str]): A file to build the Bloom Filter in, instead of memory.
+        prf_mode (str): The PRF mode the election will derive its votes in.
+        prf_table (Optional[PRFTable]): A precomputed table of the PRF outputs to look the vote
+                                        representations up in, or None.
+    """
+    print(f"Prebuilding the Bloom Filter of {number_of_voters} voters, with a threshold of "
+          f"{threshold}")
+
+    if plan is None:
+        plan = plan_filter(number_of_voters, threshold, workers=workers,
+                           file_backed=filter_path is not None)
+    print(plan.describe())
+    if plan.verdict_engine != FILTER_ENGINE:
+        print("Nothing to prebuild: the Tallier reaches its verdict without a Bloom Filter")
+        return
+
+    # Only the key, the offset, the voter count and the threshold shape the filter, so the
+    # FinalVoter's vote and ports are placeholders that are never used
+    final_voter = GenericFinalVoter(
+        key, f"voter{number_of_voters - 1}", number_of_voters - 1, 0, 0, threshold,
+        number_of_voters, 0, 0, workers, plan, filter_path, False, cache, prf_mode, prf_table
+    )
+
+    time1: float = time.perf_counter()
+    final_voter.create_bloom_filter()
+    time2: float = time.perf_counter()
+    print(f"Time taken to prebuild Bloom Filter: {time2-time1}")
+    print(f"Filter cache size: {cache.size()} of {cache.max_bytes} bytes")
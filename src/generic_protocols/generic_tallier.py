@@ -5,8 +5,11 @@ This class inherits from the Tallier base class and implements specific
 functionality for determining the final verdict using a bloom filter.
 """
 
+from typing import Optional, Set, Union
+from src.filter_planner import FILTER_ENGINE, SET_ENGINE, XOR_ENGINE
 from src.tallier import Tallier
-from src.bloom_filter import BloomFilter
+from src.filters import MembershipFilter
+from src.layered_filter import LayeredFilter
 
 
 class GenericTallier(Tallier):
@@ -14,35 +17,100 @@ class GenericTallier(Tallier):
     GenericTallier class for combining votes and determining the final verdict.
 
     Attributes:
-        bloom_filter (BloomFilter): The bloom filter used to check combined votes.
+        bloom_filter (Union[MembershipFilter, LayeredFilter]): The bloom filter used to check
+                                                               combined votes, of whichever
+                                                               backend the FinalVoter chose.
+        threshold (Optional[int]): The threshold to query a layered bloom filter at, or None for
+                                   the threshold the bloom filter was built for.
+        inverted (bool): Whether the bloom filter holds the vote combinations below the threshold,
+                         so that the verdict is the opposite of its membership answer.
+        verdict_engine (str): How the verdict is reached: 'filter' to query the bloom filter,
+                              'xor' to compare the combined vote with 0 or 'set' to look it up in
+                              the combinations sent instead of a bloom filter.
+        combinations (Optional[Set[int]]): The vote combinations sent for the 'set' engine.
 
     Methods:
-        gfvd() -> int:
+        store_bloom_filter(message: dict) -> None:
+            Keeps the bloom filter carried by a vote_bf message.
+
+        gfvd(threshold: Optional[int]) -> int:
             Combines all encoded votes and determines the final verdict using the bloom filter.
     """
 
-    def __init__(self, number_of_voters: int, port: int) -> None:
+    def __init__(self, number_of_voters: int, port: int, threshold: Optional[int] = None) -> None:
         """
         Constructs all the necessary attributes for the Tallier object.
 
         Args:
             number_of_voters (int): The total number of voters.
             port (int): The port number for the tallier server.
+            threshold (Optional[int]): The threshold to query a layered bloom filter at, or None
+                                       for the threshold the bloom filter was built for.
         """
         super().__init__(number_of_voters, port)
-        self.bloom_filter: BloomFilter = None
+        self.bloom_filter: Union[MembershipFilter, LayeredFilter] = None
+        self.threshold: Optional[int] = threshold
+        self.inverted: bool = False
+        self.verdict_engine: str = FILTER_ENGINE
+        self.combinations: Optional[Set[int]] = None
+
+    def store_bloom_filter(self, message: dict) -> None:
+        """
+        Keeps the bloom filter carried by a vote_bf message.
 
-    def gfvd(self) -> int:
+        A filter sent with its layers is layered by subset size, and is wrapped so that it can be
+        queried at any threshold. A filter flagged as inverted holds the subsets below the
+        threshold. A message naming another verdict engine carries no filter, and at most a few
+        vote combinations.
+
+        Args:
+            message (dict): The vote_bf message received from the final voter.
+        """
+        self.verdict_engine = message.get('verdict_engine', FILTER_ENGINE)
+        if self.verdict_engine == SET_ENGINE:
+            self.combinations = set(message['combinations'])
+        elif 'layers' in message:
+            lowest, highest = message['layers']
+            self.bloom_filter = LayeredFilter(message['bf'], lowest, highest)
+        elif self.verdict_engine == FILTER_ENGINE:
+            self.bloom_filter = message['bf']
+        self.inverted = message.get('inverted', False)
+
+    def gfvd(self, threshold: Optional[int] = None) -> int:
         """
         Combines all encoded votes and determines the final verdict.
 
+        Args:
+            threshold (Optional[int]): The threshold to query a layered bloom filter at. Defaults
+                                       to the tallier's threshold, or else to the threshold the
+                                       bloom filter was built for.
+
         Returns:
             int: The final verdict (0 or 1).
+
+        Raises:
+            ValueError: If a threshold is given but the bloom filter is not layered.
         """
+        if threshold is None:
+            threshold = self.threshold
+
         combined_votes: int = 0
         for encoded_vote in self.encoded_votes:
             combined_votes ^= encoded_vote
 
-        # If the combined vote is in the bloom filter, set the final verdict to 1, otherwise 0
-        self.final_verdict = 1 if self.bloom_filter.check(combined_votes) else 0
+        # If the combined vote is in the bloom filter, set the final verdict to 1, otherwise 0, and
+        # the other way around for a filter of the combinations below the threshold
+        if self.verdict_engine == XOR_ENGINE and threshold is None:
+            # With a threshold of 1, as in the efficient variants, only no votes for combine to 0
+            in_filter: bool = combined_votes != 0
+        elif self.verdict_engine == SET_ENGINE and threshold is None:
+            in_filter: bool = combined_votes in self.combinations
+        elif threshold is None:
+            in_filter: bool = self.bloom_filter.check(combined_votes)
+        elif self.verdict_engine == FILTER_ENGINE and isinstance(self.bloom_filter, LayeredFilter):
+            # Only the layers of subsets with at least threshold members are checked
+            in_filter: bool = self.bloom_filter.check_at_least(combined_votes, threshold)
+        else:
+            raise ValueError("Only a layered bloom filter can be queried at another threshold")
+        self.final_verdict = 1 if in_filter != self.inverted else 0
         return self.final_verdict
@@ -5,7 +5,9 @@ This class represents a voter and includes methods to generate a masking value
 and mask votes.
 """
 
-from src.helpers import prf
+from typing import Optional
+from src.helpers import COMPATIBLE, PRFEngine
+from src.prf_table import PRFTable
 
 
 class GenericVoter:
@@ -20,6 +22,8 @@ class GenericVoter:
         offset (int): An offset value used in generating the masking value.
         final_voter_port (int): The port number for connecting to the final voter.
         tallier_port (int): The port number for connecting to the tallier.
+        prf_engine (PRFEngine): The PRF keyed with the key, in the election's PRF mode, or a
+                                precomputed table of its outputs.
 
     Methods:
         generate_masking_value() -> int:
@@ -30,7 +34,8 @@ class GenericVoter:
     """
 
     def __init__(self, key: bytes, voter_id: str, voter_index: int, vote: int, offset: int,
-                 final_voter_port: int, tallier_port: int) -> None:
+                 final_voter_port: int, tallier_port: int, prf_mode: str = COMPATIBLE,
+                 prf_table: Optional[PRFTable] = None) -> None:
         self.key: bytes = key
         self.voter_id: str = voter_id
         self.voter_index: int = voter_index
@@ -38,6 +43,8 @@ class GenericVoter:
         self.offset: int = offset
         self.final_voter_port: int = final_voter_port
         self.tallier_port: int = tallier_port
+        # A precomputed table answers for the engine, computing only what it does not hold
+        self.prf_engine: PRFEngine = prf_table or PRFEngine(key, prf_mode)
 
     def generate_masking_value(self) -> int:
         """
@@ -46,7 +53,7 @@ class GenericVoter:
         Returns:
             int: The masking value.
         """
-        return prf(self.key, f'1{self.offset}{self.voter_index}{self.voter_id}')
+        return self.prf_engine.prf(1, self.offset, self.voter_index, self.voter_id)
 
     def mask_vote(self, masking_value: int) -> int:
         """
@@ -61,5 +68,5 @@ class GenericVoter:
         if self.vote == 0:
             vote: int = 0
         else:
-            vote: int = prf(self.key, f"2{self.offset}{self.voter_index}{self.voter_id}")
+            vote: int = self.prf_engine.prf(2, self.offset, self.voter_index, self.voter_id)
         return vote ^ masking_value
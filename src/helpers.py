@@ -4,13 +4,62 @@ Provides various utility functions used in the e-voting protocol.
 This module includes cryptographic functions such as a Pseudo Random Function (PRF) 
 and modulus generation suitable for cryptographic operations.
 
+The PRF engine keys its hash once and copies the keyed state for every input, instead of hashing
+the key again on each call. Its 'compatible' mode reproduces prf bit for bit, hashing the text of
+the key followed by the text of the input with SHA-256. The 'hmac' and 'blake2' modes key
+HMAC-SHA256 or BLAKE2b with the key's bytes and hash a compact binary encoding of the input, a tag
+byte, a 64-bit offset and a 32-bit index followed by the identifier. Every party of an election
+must use the same mode, as the modes give different outputs.
+
+Classes:
+    PRFEngine: A keyed PRF over (tag, offset, index, identifier) inputs, with a batch call.
+
 Functions:
     prf(k: bytes, val: str) -> int: Computes a pseudo-random function using SHA-256.
-    generate_modulus(bits: int) -> tuple[int, int]: Generates an RSA modulus and Euler's totient.
+    read_key_file(path: str) -> bytes: Reads a PRF key from a file, creating it if missing.
+    generate_prime(bits: int) -> int: Generates a random prime of a given bit length.
+    generate_modulus(bits: int, pool: Optional[PrimePool]) -> tuple[int, int]:
+        Generates an RSA modulus and Euler's totient, taking its primes from a pool if given.
 """
 
+import hashlib
+import os
+import secrets
+import struct
+from functools import lru_cache
 from hashlib import sha256
-import sympy
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.prime_pool import PrimePool
+
+KEY_BYTES: int = 32
+PRF_BYTES: int = 32
+
+COMPATIBLE: str = 'compatible'
+HMAC: str = 'hmac'
+BLAKE2: str = 'blake2'
+PRF_MODES: tuple[str, ...] = (COMPATIBLE, HMAC, BLAKE2)
+
+# Tag byte, offset and index of the binary encoding, followed by the identifier's UTF-8 bytes
+_FIELDS: struct.Struct = struct.Struct('>BQI')
+_NO_TAG: int = 0xFF
+_SHA256_BLOCK_BYTES: int = 64
+
+
+@lru_cache(maxsize=16)
+def _compatible_state(k: bytes) -> 'hashlib._Hash':
+    """
+    Return the SHA-256 state after hashing the text of a key, the prefix of every prf input.
+
+    Args:
+        k (bytes): The key for the PRF.
+
+    Returns:
+        hashlib._Hash: The hash state, to be copied and never updated in place.
+    """
+    return sha256(str(k).encode())
 
 
 def prf(k: bytes, val: str) -> int:
@@ -24,36 +73,320 @@ def prf(k: bytes, val: str) -> int:
     Returns:
         int: The PRF output as an integer, reduced modulo 2^256.
     """
-    return int(sha256((str(k) + str(val)).encode()).hexdigest(), 16) % 2**256
+    state = _compatible_state(k).copy()
+    state.update(str(val).encode())
+    # A SHA-256 digest is already below 2^256
+    return int.from_bytes(state.digest(), byteorder='big')
+
+
+class PRFEngine:
+    """
+    PRFEngine class computing a keyed PRF over (tag, offset, index, identifier) inputs.
+
+    Attributes:
+        key (bytes): The key for the PRF.
+        mode (str): The construction, 'compatible', 'hmac' or 'blake2'.
+
+    Methods:
+        prf(tag: Optional[int], offset: int, index: int, identifier: str) -> int:
+            Computes the PRF of one input as an integer.
+
+        prf_bytes(tag: Optional[int], offset: int, index: int, identifier: str) -> bytes:
+            Computes the PRF of one input as fixed-width bytes.
+
+        prf_many(tag: Optional[int], offset: int, indexes: Iterable[int],
+                 identifiers: Iterable[str], as_array: bool) -> Union[List[bytes], np.ndarray]:
+            Computes the PRF of a batch of inputs that share a tag and an offset.
+    """
+
+    def __init__(self, key: bytes, mode: str = COMPATIBLE) -> None:
+        """
+        Key the hash of the chosen construction once.
+
+        Args:
+            key (bytes): The key for the PRF.
+            mode (str): The construction, 'compatible' to reproduce prf, 'hmac' for HMAC-SHA256
+                        or 'blake2' for keyed BLAKE2b, both over the binary encoding.
+
+        Raises:
+            ValueError: If the mode is unknown.
+        """
+        if mode not in PRF_MODES:
+            raise ValueError(f"Unknown PRF mode: {mode}")
+        self.key: bytes = key
+        self.mode: str = mode
+        self._outer: Optional['hashlib._Hash'] = None
+        if mode == COMPATIBLE:
+            self._state = _compatible_state(key)
+        elif mode == HMAC:
+            # The inner and outer hashes of HMAC-SHA256 (RFC 2104) are keyed once, as the hmac
+            # module's copy is much slower than copying the hashes themselves
+            if len(key) > _SHA256_BLOCK_BYTES:
+                key = sha256(key).digest()
+            key = key.ljust(_SHA256_BLOCK_BYTES, b'\0')
+            self._state = sha256(bytes(byte ^ 0x36 for byte in key))
+            self._outer = sha256(bytes(byte ^ 0x5C for byte in key))
+        else:
+            self._state = hashlib.blake2b(key=key, digest_size=PRF_BYTES)
+
+    def _digest(self, encoded: bytes) -> bytes:
+        """
+        Hash an encoded input with the keyed state.
+
+        Args:
+            encoded (bytes): The input, as encoded by _encode.
+
+        Returns:
+            bytes: The PRF_BYTES-long output.
+        """
+        state = self._state.copy()
+        state.update(encoded)
+        if self._outer is None:
+            return state.digest()
+        outer = self._outer.copy()
+        outer.update(state.digest())
+        return outer.digest()
+
+    def _encode(self, tag: Optional[int], offset: int, index: int, identifier: str) -> bytes:
+        """
+        Encode an input in the format of the engine's mode.
+
+        Args:
+            tag (Optional[int]): The domain tag, such as 1 for masking values and 2 for votes, or
+                                 None for no tag.
+            offset (int): The offset of the election.
+            index (int): The index of the voter.
+            identifier (str): The identifier of the voter.
+
+        Returns:
+            bytes: The text of the input in the compatible mode, its binary encoding otherwise.
+
+        Raises:
+            ValueError: If a field does not fit in the binary encoding.
+        """
+        if self.mode == COMPATIBLE:
+            return f"{'' if tag is None else tag}{offset}{index}{identifier}".encode()
+        try:
+            return (_FIELDS.pack(_NO_TAG if tag is None else tag, offset, index)
+                    + identifier.encode('utf-8'))
+        except struct.error as error:
+            raise ValueError(f"PRF input out of range: {error}") from error
+
+    def prf_bytes(self, tag: Optional[int], offset: int, index: int, identifier: str) -> bytes:
+        """
+        Compute the PRF of one input as fixed-width bytes.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            index (int): The index of the voter.
+            identifier (str): The identifier of the voter.
+
+        Returns:
+            bytes: The PRF_BYTES-long big-endian output.
+        """
+        return self._digest(self._encode(tag, offset, index, identifier))
+
+    def prf(self, tag: Optional[int], offset: int, index: int, identifier: str) -> int:
+        """
+        Compute the PRF of one input as an integer.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            index (int): The index of the voter.
+            identifier (str): The identifier of the voter.
+
+        Returns:
+            int: The PRF output, below 2^256.
+        """
+        return int.from_bytes(self.prf_bytes(tag, offset, index, identifier), byteorder='big')
+
+    def prf_many(self, tag: Optional[int], offset: int, indexes: Iterable[int],
+                 identifiers: Iterable[str],
+                 as_array: bool = False) -> Union[List[bytes], np.ndarray]:
+        """
+        Compute the PRF of a batch of inputs that share a tag and an offset.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            indexes (Iterable[int]): The index of each voter.
+            identifiers (Iterable[str]): The identifier of each voter, in the same order.
+            as_array (bool): Whether to return a NumPy array instead of a list of bytes.
+
+        Returns:
+            Union[List[bytes], np.ndarray]: The PRF_BYTES-long big-endian output of each input, or
+                                            a (number of inputs, PRF_BYTES) array of uint8.
+        """
+        outputs: List[bytes] = [self._digest(self._encode(tag, offset, index, identifier))
+                                for index, identifier in zip(indexes, identifiers)]
+        if as_array:
+            return np.frombuffer(b''.join(outputs), dtype=np.uint8).reshape(-1, PRF_BYTES)
+        return outputs
+
+
+def read_key_file(path: str) -> bytes:
+    """
+    Read a PRF key from a file, creating the file with a new random key if it does not exist.
 
+    Keeping the key in a file lets filters built for one run be reused by the next.
+
+    Args:
+        path (str): The path of the key file.
 
-def _generate_prime(bits: int) -> int:
+    Returns:
+        bytes: The key.
+
+    Raises:
+        ValueError: If the file does not hold a key of the right length.
+    """
+    try:
+        # Only the owner may read a newly created key
+        descriptor: int = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, 'rb') as file:
+            key: bytes = file.read()
+        if len(key) != KEY_BYTES:
+            raise ValueError(f"{path} does not hold a {KEY_BYTES}-byte key")
+        return key
+    key = secrets.token_bytes(KEY_BYTES)
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(key)
+    return key
+
+
+def _small_primes(limit: int) -> List[int]:
     """
-    Generate a prime number of a specified bit length using the sympy library.
+    List the primes below a limit with the sieve of Eratosthenes.
 
     Args:
-        bits (int): The desired bit length of the prime number.
+        limit (int): The exclusive upper bound.
+
+    Returns:
+        List[int]: The primes below the limit, in ascending order.
+    """
+    sieve: bytearray = bytearray([1]) * limit
+    sieve[:2] = b'\x00\x00'
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, limit, i)))
+    return [i for i, is_prime in enumerate(sieve) if is_prime]
+
+
+# Odd primes a window of candidates may be sieved by before any is tested
+_SIEVE_PRIMES: List[int] = _small_primes(2000)[1:]
+# Bases for which Miller-Rabin is exact below each bound, smallest bound first
+_DETERMINISTIC_BASES: List[tuple[int, List[int]]] = [
+    (1 << 64, [2, 325, 9375, 28178, 450775, 9780504, 1795265022]),
+    (3317044064679887385961981, [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41]),
+]
+# Rounds of Miller-Rabin with random bases for an error below 2^-80 on a random candidate of at
+# least this many bits (Handbook of Applied Cryptography, table 4.4)
+_RANDOM_ROUNDS: List[tuple[int, int]] = [(1300, 2), (850, 3), (650, 4), (550, 5), (450, 6),
+                                         (400, 7), (350, 8), (300, 9), (250, 12), (200, 15),
+                                         (150, 18), (0, 27)]
+
+
+def _is_probable_prime(candidate: int) -> bool:
+    """
+    Test whether an odd candidate above the sieve primes is prime with Miller-Rabin.
+
+    The test is exact for candidates below 2^81, and otherwise errs with probability below 2^-80.
+
+    Args:
+        candidate (int): The candidate, odd and larger than the sieve primes.
+
+    Returns:
+        bool: True if the candidate is prime, or probably prime when above 2^81.
+    """
+    d: int = candidate - 1
+    s: int = (d & -d).bit_length() - 1
+    d >>= s
+    bases: Optional[List[int]] = next((bases for bound, bases in _DETERMINISTIC_BASES
+                                       if candidate < bound), None)
+    if bases is None:
+        rounds: int = next(rounds for bits, rounds in _RANDOM_ROUNDS
+                           if candidate.bit_length() >= bits)
+        bases = [2] + [secrets.randbelow(candidate - 3) + 2 for _ in range(rounds - 1)]
+    for base in bases:
+        base %= candidate
+        if base == 0:
+            continue
+        x: int = pow(base, d, candidate)
+        if x in (1, candidate - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % candidate
+            if x == candidate - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def generate_prime(bits: int) -> int:
+    """
+    Generate a random prime number of a specified bit length.
+
+    A window of odd candidates from a random start is sieved by small primes, more of them for
+    longer primes, and only the survivors are tested with Miller-Rabin. This is faster than
+    sympy.randprime, and does not import sympy.
+
+    Args:
+        bits (int): The desired bit length of the prime number, at least 16.
 
     Returns:
         int: A prime number with the specified bit length.
+
+    Raises:
+        ValueError: If the bit length is below 16.
     """
-    return sympy.randprime(2**(bits-1), 2**bits)
+    if bits < 16:
+        raise ValueError("Primes must be at least 16 bits long")
+    # About twice the expected gap between primes, counted in odd candidates
+    window: int = bits * 2
+    sieve_primes: List[int] = [prime for prime in _SIEVE_PRIMES if prime < bits * 4]
+    while True:
+        start: int = secrets.randbits(bits - 1) | (1 << (bits - 1)) | 1
+        # Candidate i of the window is start + 2i
+        composite: bytearray = bytearray(window)
+        for prime in sieve_primes:
+            # The first i for which prime divides start + 2i, as (prime + 1) // 2 inverts 2
+            first: int = -start * ((prime + 1) // 2) % prime
+            composite[first::prime] = b'\x01' * len(range(first, window, prime))
+        for i in range(window):
+            candidate: int = start + 2 * i
+            if not composite[i] and candidate.bit_length() == bits and \
+                    _is_probable_prime(candidate):
+                return candidate
 
 
-def generate_modulus(bits: int) -> tuple[int, int]:
+def generate_modulus(bits: int, pool: Optional['PrimePool'] = None) -> tuple[int, int]:
     """
-    Generate a modulus by computing the product of two prime numbers.
+    Generate a modulus by computing the product of two distinct prime numbers.
 
     Each prime is half of the specified bit length, suitable for cryptographic operations.
 
     Args:
         bits (int): The total bit length for the modulus (n).
+        pool (Optional[PrimePool]): A pool of primes of half the bit length to take the primes
+                                    from, instead of generating them.
 
     Returns:
         tuple[int, int]: A tuple containing the RSA modulus and Euler's totient function value.
+
+    Raises:
+        ValueError: If the pool holds primes of another bit length.
     """
-    p: int = _generate_prime(bits // 2)
-    q: int = _generate_prime(bits // 2)
+    if pool is not None and pool.bits != bits // 2:
+        raise ValueError(f"A {bits}-bit modulus needs {bits // 2}-bit primes, but the pool holds "
+                         f"{pool.bits}-bit primes")
+    take = pool.take if pool is not None else lambda: generate_prime(bits // 2)
+    p: int = take()
+    q: int = take()
+    while q == p:
+        q = take()
     n: int = p * q
     phi_n: int = (p - 1) * (q - 1)
     return n, phi_n
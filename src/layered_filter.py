@@ -0,0 +1,147 @@
+"""
+Layered view of a vote combination filter, answering threshold queries for any threshold.
+
+A standard filter holds the XOR of every subset of vote representations with at least the
+threshold's number of members, so a different threshold needs a new filter. A layered filter
+instead holds every subset from its lowest layer up, with the subsets of each size tagged by
+XORing their key with a constant for that size. Each tag splits the filter into one layer per
+subset size, so that whether a combined vote reaches a threshold t is answered by checking the
+vote under the tags of sizes t and above only. The filter is therefore built once per electorate
+and queried at any threshold down to its lowest layer.
+
+A query checks one key per layer, so the false positive rate of each lookup is the target rate
+divided by the number of layers, and the filter is sized for that rate.
+
+Classes:
+    LayeredFilter: Answers threshold queries against a filter of size-tagged vote combinations.
+
+Functions:
+    layer_tag(cardinality: int) -> np.ndarray: Returns the key tag of a subset size.
+    tag_keys(keys: np.ndarray, cardinality: int) -> np.ndarray: Tags a batch of keys with a size.
+    tag_hashes(hashes: np.ndarray, cardinality: int) -> np.ndarray:
+        Tags a batch of linear hashes of keys with a size.
+"""
+
+from functools import lru_cache
+from hashlib import sha256
+import numpy as np
+from src.bloom_filter import linear_hash_many, to_keys
+from src.filters import MembershipFilter
+
+
+@lru_cache(maxsize=None)
+def layer_tag(cardinality: int) -> np.ndarray:
+    """
+    Return the key tag of a subset size.
+
+    Args:
+        cardinality (int): The subset size.
+
+    Returns:
+        np.ndarray: A 32-byte uint8 tag, XORed into the keys of the subsets of that size.
+    """
+    digest: bytes = sha256(f"layer{cardinality}".encode('utf-8')).digest()
+    return np.frombuffer(digest, dtype=np.uint8)
+
+
+def tag_keys(keys: np.ndarray, cardinality: int) -> np.ndarray:
+    """
+    Tag a batch of fixed-width keys with a subset size.
+
+    Args:
+        keys (np.ndarray): A (number of keys, 32) array of uint8 keys.
+        cardinality (int): The subset size the keys belong to.
+
+    Returns:
+        np.ndarray: The tagged keys.
+    """
+    return keys ^ layer_tag(cardinality)
+
+
+def tag_hashes(hashes: np.ndarray, cardinality: int) -> np.ndarray:
+    """
+    Tag a batch of linear hashes of keys with a subset size.
+
+    The linear hash of a tagged key is the hash of the key XORed with the hash of the tag, so the
+    result is the hash of the key tagged by tag_keys.
+
+    Args:
+        hashes (np.ndarray): A (number of keys, 2) array of uint64 linear hash halves.
+        cardinality (int): The subset size the keys belong to.
+
+    Returns:
+        np.ndarray: The hashes of the tagged keys.
+    """
+    return hashes ^ linear_hash_many(layer_tag(cardinality).reshape(1, -1))
+
+
+class LayeredFilter:
+    """
+    LayeredFilter class answering threshold queries against a filter of size-tagged vote
+    combinations.
+
+    Attributes:
+        membership_filter (MembershipFilter): The filter holding the tagged vote combinations, of
+                                              any backend.
+        lowest (int): The smallest subset size held in the filter.
+        highest (int): The largest subset size held in the filter, the number of voters.
+
+    Methods:
+        check(item: int) -> bool:
+            Checks if an item is possibly the XOR of a subset of any held size.
+
+        check_at_least(item: int, threshold: int) -> bool:
+            Checks if an item is possibly the XOR of a subset with at least threshold members.
+    """
+
+    def __init__(self, membership_filter: MembershipFilter, lowest: int, highest: int) -> None:
+        """
+        Wrap a filter of size-tagged vote combinations.
+
+        Args:
+            membership_filter (MembershipFilter): The filter holding the tagged vote combinations.
+            lowest (int): The smallest subset size held in the filter.
+            highest (int): The largest subset size held in the filter.
+        """
+        self.membership_filter: MembershipFilter = membership_filter
+        self.lowest: int = lowest
+        self.highest: int = highest
+
+    def check(self, item: int) -> bool:
+        """
+        Check if an item is possibly the XOR of a subset of any held size.
+
+        Args:
+            item (int): The item to check.
+
+        Returns:
+            bool: True if the item reaches the lowest layer's threshold, False otherwise.
+        """
+        return self.check_at_least(item, self.lowest)
+
+    def check_at_least(self, item: int, threshold: int) -> bool:
+        """
+        Check if an item is possibly the XOR of a subset with at least threshold members.
+
+        Only the layers of sizes from the threshold up are checked.
+
+        Args:
+            item (int): The item to check.
+            threshold (int): The smallest subset size that counts.
+
+        Returns:
+            bool: True if the item is possibly in one of the checked layers, False otherwise.
+
+        Raises:
+            ValueError: If the threshold is below the lowest layer.
+        """
+        if threshold < self.lowest:
+            raise ValueError(f"The filter only holds thresholds down to {self.lowest}, "
+                             f"got {threshold}")
+        cardinalities: range = range(threshold, self.highest + 1)
+        if not cardinalities:
+            return False
+        key: np.ndarray = to_keys([item])
+        keys: np.ndarray = np.concatenate([tag_keys(key, cardinality)
+                                           for cardinality in cardinalities])
+        return bool(self.membership_filter.check_many(keys).any())
@@ -9,22 +9,35 @@ import datetime as dt
 import secrets
 import threading
 from random import randint
-from typing import List
+from typing import List, Optional
 
 from src.new_protocol.efficient.new_efficient_final_voter import \
     NewEfficientFinalVoter
 from src.new_protocol.efficient.new_efficient_tallier import \
     NewEfficientTallier
 from src.new_protocol.efficient.new_efficient_voter import NewEfficientVoter
+from src.prime_pool import PrimePool
+from src.squaring import AUTO
+from src.unlock_checkpoint import DEFAULT_CHECKPOINT_INTERVAL
 
 
-def new_efficient(number_of_voters: int, squarings_per_second: int) -> None:
+def new_efficient(number_of_voters: int, squarings_per_second: int, modulus_bits: int = 128,
+                  prime_pool: Optional[PrimePool] = None, squaring_backend: str = AUTO,
+                  checkpoint_path: Optional[str] = None,
+                  checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> None:
     """
     Run the new efficient protocol.
 
     Args:
         number_of_voters (int): The total number of voters.
         squarings_per_second (int): The number of squarings the Tallier system can do per second
+        modulus_bits (int): The bit length of the moduli of the voters' time-lock puzzles.
+        prime_pool (Optional[PrimePool]): A pool the voters take the primes of their moduli from, or
+                                          None to generate them.
+        squaring_backend (str): The backend the Tallier unlocks the time-locked votes with.
+        checkpoint_path (Optional[str]): A state file the Tallier keeps the election in, resuming
+                                         the unfinished election already in it, or None.
+        checkpoint_interval (int): The number of squarings between the Tallier's checkpoints.
     """
     print(f"Running Dropout Resilient Efficient Protocol with {number_of_voters} voters")
 
@@ -45,11 +58,17 @@ def new_efficient(number_of_voters: int, squarings_per_second: int) -> None:
         votes.append(vote)
         voter = NewEfficientVoter(
             k_0, f"voter{i}", i, vote, 0, final_voter_port, tallier_port, vote_time,
-            squarings_per_second)
+            squarings_per_second, modulus_bits, prime_pool)
         voters.append(voter)
 
     # Create the Tallier
-    tallier = NewEfficientTallier(number_of_voters, tallier_port)
+    tallier = NewEfficientTallier(number_of_voters, tallier_port, squaring_backend,
+                                  checkpoint_path, checkpoint_interval)
+    if tallier.restored_votes:
+        # Every vote of the unfinished election was restored, so only the Tallier runs
+        tallier.run()
+        print(f"Final verdict: {tallier.get_final_verdict()}")
+        return
     tallier_thread = threading.Thread(target=tallier.run)
 
     # Create the FinalVoter
@@ -10,10 +10,12 @@ import json
 import random
 import socket
 import time
+from typing import Optional
 from Crypto.Cipher import ChaCha20
 from Crypto.Random import get_random_bytes
 from src.efficient_protocols.efficient_voter import EfficientVoter
 from src.helpers import generate_modulus
+from src.prime_pool import PrimePool
 
 
 class NewEfficientVoter(EfficientVoter):
@@ -30,6 +32,9 @@ class NewEfficientVoter(EfficientVoter):
         tallier_port (int): The port number for connecting to the tallier.
         vote_time (datetime.datetime): The time when the vote should be cast.
         squarings (int): The number of squarings used for the time-lock puzzle.
+        modulus_bits (int): The bit length of the modulus of the time-lock puzzle.
+        prime_pool (Optional[PrimePool]): A pool the primes of the modulus are taken from, or None
+                                          to generate them.
 
     Methods:
         time_lock(message: int, time_for_lock: int, squarings: int) -> tuple:
@@ -41,11 +46,14 @@ class NewEfficientVoter(EfficientVoter):
 
     def __init__(
         self, key: bytes, voter_id: str, voter_index: int, vote: int, offset: int,
-        final_voter_port: int, tallier_port: int, vote_time: datetime.datetime, squarings: int
+        final_voter_port: int, tallier_port: int, vote_time: datetime.datetime, squarings: int,
+        modulus_bits: int = 128, prime_pool: Optional[PrimePool] = None
     ) -> None:
         super().__init__(key, voter_id, voter_index, vote, offset, final_voter_port, tallier_port)
         self.vote_time: datetime.datetime = vote_time
         self.squarings: int = squarings
+        self.modulus_bits: int = modulus_bits
+        self.prime_pool: Optional[PrimePool] = prime_pool
 
     def time_lock(self, message: int, time_for_lock: int, squarings: int) -> tuple:
         """
@@ -63,7 +71,7 @@ class NewEfficientVoter(EfficientVoter):
             tuple: A tuple containing parameters (n, a, t, key, message_ciphertext, nonce) necessary
             solving the time-lock puzzle and decrypting the message.
         """
-        n, phi_n = generate_modulus(128)
+        n, phi_n = generate_modulus(self.modulus_bits, self.prime_pool)
         t: int = time_for_lock * squarings
 
         K: bytes = get_random_bytes(32)
@@ -9,14 +9,28 @@ import datetime as dt
 import secrets
 import threading
 from random import randint
-from typing import List
+from typing import List, Optional
 
+from src.filter_cache import FilterCache
+from src.filter_planner import FilterPlan, plan_filter
 from src.generic_protocols.generic_final_voter import GenericFinalVoter
+from src.helpers import COMPATIBLE
 from src.new_protocol.generic.new_generic_tallier import NewGenericTallier
 from src.new_protocol.generic.new_generic_voter import NewGenericVoter
-
-
-def new_generic(number_of_voters: int, threshold: int, squarings_per_second: int) -> None:
+from src.prf_table import PRFTable
+from src.prime_pool import PrimePool
+from src.squaring import AUTO
+from src.unlock_checkpoint import DEFAULT_CHECKPOINT_INTERVAL
+
+
+def new_generic(number_of_voters: int, threshold: int, squarings_per_second: int,
+                workers: int = 1, plan: Optional[FilterPlan] = None,
+                filter_path: Optional[str] = None, send_path: bool = False,
+                key: Optional[bytes] = None, cache: Optional[FilterCache] = None,
+                prf_mode: str = COMPATIBLE, prf_table: Optional[PRFTable] = None,
+                modulus_bits: int = 128, prime_pool: Optional[PrimePool] = None,
+                squaring_backend: str = AUTO, checkpoint_path: Optional[str] = None,
+                checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> None:
     """
     Run the new generic protocol.
 
@@ -24,10 +38,36 @@ def new_generic(number_of_voters: int, threshold: int, squarings_per_second: int
         number_of_voters (int): The total number of voters.
         threshold (int): The threshold for computing the final verdict.
         squarings_per_second (int): The number of squarings the Tallier system can do per second
+        workers (int): The number of processes the FinalVoter uses to build the Bloom Filter.
+        plan (Optional[FilterPlan]): The plan of the Bloom Filter the FinalVoter builds, which may
+                                     be layered for thresholds down to its own. Defaults to the
+                                     plan chosen automatically for the election.
+        filter_path (Optional[str]): A file the FinalVoter builds the Bloom Filter in, instead of
+                                     memory.
+        send_path (bool): Whether the FinalVoter sends the Tallier the path of the filter file
+                          instead of the filter itself.
+        key (Optional[bytes]): The shared PRF key. Defaults to a new random key.
+        cache (Optional[FilterCache]): A cache of prebuilt Bloom Filters the FinalVoter loads its
+                                       filter from, or stores it in.
+        prf_mode (str): The PRF mode every party derives its masking values and votes in.
+        prf_table (Optional[PRFTable]): A precomputed table of the PRF outputs every party looks
+                                        its masking values and votes up in, or None.
+        modulus_bits (int): The bit length of the moduli of the voters' time-lock puzzles.
+        prime_pool (Optional[PrimePool]): A pool the voters take the primes of their moduli from, or
+                                          None to generate them.
+        squaring_backend (str): The backend the Tallier unlocks the time-locked votes with.
+        checkpoint_path (Optional[str]): A state file the Tallier keeps the election in, resuming
+                                         the unfinished election already in it, or None.
+        checkpoint_interval (int): The number of squarings between the Tallier's checkpoints.
     """
     print(f"Running Dropout Resilient Generic Protocol with {number_of_voters} voters, with a threshold of {threshold}")
 
-    k_0: bytes = secrets.token_bytes(32)  # Random shared key for PRF
+    if plan is None:
+        plan = plan_filter(number_of_voters, threshold, workers=workers,
+                           file_backed=filter_path is not None)
+    print(plan.describe())
+
+    k_0: bytes = key or secrets.token_bytes(32)  # Shared key for PRF, random unless given
     final_voter_port: int = 65433
     tallier_port: int = 65432
 
@@ -42,11 +82,19 @@ def new_generic(number_of_voters: int, threshold: int, squarings_per_second: int
         votes.append(vote)
         voter = NewGenericVoter(
             k_0, f"voter{i}", i, vote, 0, final_voter_port, tallier_port, vote_time,
-            squarings_per_second)
+            squarings_per_second, prf_mode, prf_table, modulus_bits, prime_pool)
         voters.append(voter)
 
     # Create the Tallier
-    tallier = NewGenericTallier(number_of_voters, tallier_port)
+    # A layered filter is queried at the election's threshold instead of the one it was built for
+    tallier = NewGenericTallier(number_of_voters, tallier_port,
+                                threshold if plan.layered else None, squaring_backend,
+                                checkpoint_path, checkpoint_interval)
+    if tallier.restored_votes:
+        # Every vote of the unfinished election was restored, so only the Tallier runs
+        tallier.run()
+        print(f"Final verdict: {tallier.get_final_verdict()}")
+        return
     tallier_thread = threading.Thread(target=tallier.run)
 
     # Create the FinalVoter
@@ -54,7 +102,8 @@ def new_generic(number_of_voters: int, threshold: int, squarings_per_second: int
     votes.append(final_voter_vote)
     final_voter = GenericFinalVoter(
         k_0, f"voter{number_of_voters - 1}", number_of_voters - 1, final_voter_vote, 0,
-        threshold, number_of_voters, final_voter_port, tallier_port
+        threshold, number_of_voters, final_voter_port, tallier_port, workers, plan,
+        filter_path, send_path, cache, prf_mode, prf_table
     )
     final_voter_thread = threading.Thread(target=final_voter.run)
 
@@ -5,19 +5,26 @@ This class represents the tallier and includes methods to start a server,
 receive encoded votes, process time-locked votes, and compute the final verdict.
 """
 
-import json
 import multiprocessing
 import socket
 import time
+from typing import Optional
 from Crypto.Cipher import ChaCha20
-from src.bloom_filter import BloomFilter
+from src.filter_transfer import receive_message
 from src.generic_protocols.generic_tallier import GenericTallier
+from src.squaring import AUTO, repeated_squaring, resolve_backend
+from src.unlock_checkpoint import DEFAULT_CHECKPOINT_INTERVAL, UnlockCheckpoints
 
 
-def unlock(n: int, a: int, t: int, key: int, message_ciphertext: int, nonce: int) -> int:
+def unlock(n: int, a: int, t: int, key: int, message_ciphertext: int, nonce: int,
+           backend: str = AUTO, checkpoints: Optional[UnlockCheckpoints] = None) -> int:
     """
     Decrypts and computes the unlocked vote from the time-locked vote parameters.
 
+    The t squarings of a modulo n are done in chunks by a squaring backend, giving the same result
+    as squaring one at a time. With checkpoints, the squarings resume from the puzzle's latest
+    checkpoint and are checkpointed as they go.
+
     Args:
         n (int): The modulus used in the vote encryption.
         a (int): The base number used in the encryption process.
@@ -25,6 +32,9 @@ def unlock(n: int, a: int, t: int, key: int, message_ciphertext: int, nonce: int
         key (int): The combined key derived from private keys of the authorities.
         message_ciphertext (int): The combined encrypted vote message.
         nonce (int): The nonce value used for symmetric decryption.
+        backend (str): The squaring backend, or 'auto' for the fastest one available.
+        checkpoints (Optional[UnlockCheckpoints]): The state file the squarings are checkpointed
+                                                   in, or None.
 
     Returns:
         int: The decrypted and computed vote as an integer.
@@ -32,11 +42,16 @@ def unlock(n: int, a: int, t: int, key: int, message_ciphertext: int, nonce: int
     first_time: float = time.perf_counter()
     nonce_bytes: bytes = int.to_bytes(nonce, length=8, byteorder='big')
     ciphertext: bytes = int.to_bytes(message_ciphertext, length=32, byteorder='big')
-    x: int = a
-    for _ in range(1, t + 1):
-        x = (x ** 2) % n
-    b: int = x
-    second_time: float = time.perf_counter()
+    if checkpoints is not None:
+        # Reports its own rate, as it may resume or skip the squarings
+        b: int = checkpoints.solve(n, a, t, backend)
+        checkpoints.close()
+        second_time: float = time.perf_counter()
+    else:
+        b = repeated_squaring(a, t, n, backend)
+        second_time = time.perf_counter()
+        print(f"Squarings per second to unlock vote with {resolve_backend(backend)}: "
+              f"{t / (second_time - first_time):.0f}")
     print(f"Time taken to unlock vote: {second_time - first_time}")
     K: bytes = int.to_bytes(key - b, length=32, byteorder='big')
     cipher: ChaCha20.ChaCha20Cipher = ChaCha20.new(key=K, nonce=nonce_bytes)
@@ -44,7 +59,8 @@ def unlock(n: int, a: int, t: int, key: int, message_ciphertext: int, nonce: int
     return int.from_bytes(plaintext, byteorder='big')
 
 
-def unlock_message(message: dict, encoded_votes: list) -> None:
+def unlock_message(message: dict, encoded_votes: list, backend: str = AUTO,
+                   checkpoints: Optional[UnlockCheckpoints] = None) -> None:
     """
     Initiates the unlocking of a single encoded vote and appends it to the list of encoded votes.
 
@@ -53,6 +69,9 @@ def unlock_message(message: dict, encoded_votes: list) -> None:
         including the parameters n, a, t, CK, CM, and nonce.
         encoded_votes (list): A shared list (from multiprocessing.Manager) to which the unlocked
         vote is appended.
+        backend (str): The squaring backend, or 'auto' for the fastest one available.
+        checkpoints (Optional[UnlockCheckpoints]): The state file the squarings are checkpointed
+                                                   in, or None.
     """
     n: int = message['n']
     a: int = message['a']
@@ -60,7 +79,7 @@ def unlock_message(message: dict, encoded_votes: list) -> None:
     key: int = message['CK']
     message_ciphertext: int = message['CM']
     nonce: int = message['nonce']
-    unlocked_vote: int = unlock(n, a, t, key, message_ciphertext, nonce)
+    unlocked_vote: int = unlock(n, a, t, key, message_ciphertext, nonce, backend, checkpoints)
     encoded_votes.append(unlocked_vote)
 
 
@@ -75,6 +94,10 @@ class NewGenericTallier(GenericTallier):
         lock (threading.Lock): A lock to ensure thread-safe operations on encoded_votes.
         final_verdict (int or None): The final verdict computed after receiving all encoded votes.
         unlocking_processes (list): A list to store processes for unlocking time-locked votes.
+        squaring_backend (str): The backend the time-locked votes are unlocked with.
+        checkpoints (Optional[UnlockCheckpoints]): The state file the election is kept in, or None.
+        restored_votes (int): The number of votes restored from the state file.
+        threshold (Optional[int]): The threshold to query a layered bloom filter at.
 
     Methods:
         process_message(message: dict) -> None:
@@ -89,18 +112,47 @@ class NewGenericTallier(GenericTallier):
             final verdict.
     """
 
-    def __init__(self, number_of_voters: int, port: int) -> None:
+    def __init__(self, number_of_voters: int, port: int, threshold: Optional[int] = None,
+                 squaring_backend: str = AUTO, checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: int = DEFAULT_CHECKPOINT_INTERVAL) -> None:
         """
         Constructs all the necessary attributes for the Tallier object.
 
         Args:
             number_of_voters (int): The total number of voters.
             port (int): The port number for the tallier server.
+            threshold (Optional[int]): The threshold to query a layered bloom filter at, or None
+                                       for the threshold the bloom filter was built for.
+            squaring_backend (str): The backend the time-locked votes are unlocked with, or 'auto'
+                                    for the fastest one available.
+            checkpoint_path (Optional[str]): A state file to keep the election in, resuming the
+                                             unfinished election already in it, or None.
+            checkpoint_interval (int): The number of squarings between checkpoints.
+
+        Raises:
+            ValueError: If the state file holds an unfinished election of another number of
+                        voters.
         """
-        super().__init__(number_of_voters, port)
+        super().__init__(number_of_voters, port, threshold)
         manager: multiprocessing.Manager = multiprocessing.Manager()
         self.encoded_votes = manager.list()
         self.unlocking_processes: list[multiprocessing.Process] = []
+        self.squaring_backend: str = resolve_backend(squaring_backend)
+        self.checkpoints: Optional[UnlockCheckpoints] = (
+            UnlockCheckpoints(checkpoint_path, checkpoint_interval) if checkpoint_path else None)
+        self.restored_votes: int = 0
+        if self.checkpoints is not None:
+            restored: list[dict] = self.checkpoints.restore()
+            if restored and len(restored) != number_of_voters:
+                raise ValueError(f"{checkpoint_path} holds {len(restored)} of the "
+                                 f"{number_of_voters} votes of an unfinished election")
+            # Unlocking restarts from each puzzle's latest checkpoint, skipping solved puzzles
+            for message in restored:
+                self.process_message(message)
+                self.restored_votes += 1
+            if self.restored_votes:
+                print(f"Resumed the unfinished election of {self.restored_votes} votes in "
+                      f"{checkpoint_path}")
 
     def process_message(self, message: dict) -> None:
         """
@@ -113,7 +165,9 @@ class NewGenericTallier(GenericTallier):
         """
         if message['type'] == 'time_locked':
             # Create a process for the time locked vote and start it
-            p = multiprocessing.Process(target=unlock_message, args=(message, self.encoded_votes,))
+            p = multiprocessing.Process(target=unlock_message,
+                                        args=(message, self.encoded_votes, self.squaring_backend,
+                                              self.checkpoints))
             p.start()
             self.unlocking_processes.append(p)
         elif message['type'] == 'not_time_locked':
@@ -121,10 +175,7 @@ class NewGenericTallier(GenericTallier):
         elif message['type'] == 'vote_bf':
             self.encoded_votes.append(message['vote'])
 
-            time1: float = time.perf_counter()
-            self.bloom_filter = BloomFilter.from_dict(message['bf'])
-            time2: float = time.perf_counter()
-            print(f"Time take for Tallier to reproduce Bloom Filter: {time2-time1}")
+            self.store_bloom_filter(message)
 
     def start_server(self) -> None:
         """
@@ -134,13 +185,22 @@ class NewGenericTallier(GenericTallier):
         server_socket.bind(('localhost', self.port))
         server_socket.listen(self.number_of_voters)
 
-        received_votes: int = 0
+        received_votes: int = self.restored_votes
 
         while received_votes < self.number_of_voters:
             client_socket, _ = server_socket.accept()
-            data: bytes = client_socket.recv(131072)
+            time1: float = time.perf_counter()
+            message: dict = receive_message(client_socket)
+            time2: float = time.perf_counter()
+            # A vote_bf message carries no filter when the verdict engine needs none
+            if message['type'] == 'vote_bf' and 'bf' in message:
+                print(f"Time take for Tallier to receive Bloom Filter: {time2-time1}")
+                print(f"Time taken for Tallier to decode Bloom Filter ({message['wire_bytes']} "
+                      f"bytes on the wire): {message['decode_seconds']}")
             with self.lock:
-                message: dict = json.loads(data.decode('utf-8'))
+                if self.checkpoints is not None:
+                    # Kept before it is processed, so a restarted Tallier can unlock it
+                    self.checkpoints.record_message(message)
                 self.process_message(message)
                 received_votes += 1
             client_socket.close()
@@ -152,12 +212,16 @@ class NewGenericTallier(GenericTallier):
         print("Tallier started")
 
         start: float = time.perf_counter()
-        self.start_server()
+        if self.restored_votes < self.number_of_voters:
+            self.start_server()
 
         for process in self.unlocking_processes:
             process.join()
 
         self.gfvd()
+        if self.checkpoints is not None:
+            # The election is over, so its state is not kept
+            self.checkpoints.clear()
 
         end: float = time.perf_counter()
         print(f"Tallier total time: {end - start}")
@@ -8,25 +8,51 @@ to compute the final verdict.
 import secrets
 import threading
 from random import randint
-from typing import List
+from typing import List, Optional
 
+from src.filter_cache import FilterCache
+from src.filter_planner import FilterPlan, plan_filter
 from src.generic_protocols.generic_final_voter import GenericFinalVoter
+from src.helpers import COMPATIBLE
 from src.original_protocol.generic.original_generic_tallier import OriginalGenericTallier
 from src.original_protocol.generic.original_generic_voter import OriginalGenericVoter
+from src.prf_table import PRFTable
 
 
-def original_generic(number_of_voters: int, threshold: int) -> None:
+def original_generic(number_of_voters: int, threshold: int, workers: int = 1,
+                     plan: Optional[FilterPlan] = None, filter_path: Optional[str] = None,
+                     send_path: bool = False, key: Optional[bytes] = None,
+                     cache: Optional[FilterCache] = None, prf_mode: str = COMPATIBLE,
+                     prf_table: Optional[PRFTable] = None) -> None:
     """
     Run the original generic protocol.
 
     Args:
         number_of_voters (int): The total number of voters.
         threshold (int): The threshold for computing the final verdict.
+        workers (int): The number of processes the FinalVoter uses to build the Bloom Filter.
+        plan (Optional[FilterPlan]): The plan of the Bloom Filter the FinalVoter builds, which may
+                                     be layered for thresholds down to its own. Defaults to the
+                                     plan chosen automatically for the election.
+        filter_path (Optional[str]): A file the FinalVoter builds the Bloom Filter in, instead of
+                                     memory.
+        send_path (bool): Whether the FinalVoter sends the Tallier the path of the filter file
+                          instead of the filter itself.
+        key (Optional[bytes]): The shared PRF key. Defaults to a new random key.
+        cache (Optional[FilterCache]): A cache of prebuilt Bloom Filters the FinalVoter loads its
+                                       filter from, or stores it in.
+        prf_mode (str): The PRF mode every party derives its masking values and votes in.
+        prf_table (Optional[PRFTable]): A precomputed table of the PRF outputs every party looks
+                                        its masking values and votes up in, or None.
     """
     print(f"Running Original Generic Protocol with {number_of_voters} voters, with a threshold of {threshold}")
 
+    if plan is None:
+        plan = plan_filter(number_of_voters, threshold, workers=workers,
+                           file_backed=filter_path is not None)
+    print(plan.describe())
 
-    k_0: bytes = secrets.token_bytes(32)  # Random shared key for PRF
+    k_0: bytes = key or secrets.token_bytes(32)  # Shared key for PRF, random unless given
     final_voter_port: int = 65433
     tallier_port: int = 65432
 
@@ -36,11 +62,14 @@ def original_generic(number_of_voters: int, threshold: int) -> None:
     for i in range(number_of_voters - 1):
         vote: int = randint(0, 1)
         votes.append(vote)
-        voter = OriginalGenericVoter(k_0, f"voter{i}", i, vote, 0, final_voter_port, tallier_port)
+        voter = OriginalGenericVoter(k_0, f"voter{i}", i, vote, 0, final_voter_port, tallier_port,
+                                     prf_mode, prf_table)
         voters.append(voter)
 
     # Create the Tallier
-    tallier = OriginalGenericTallier(number_of_voters, tallier_port)
+    # A layered filter is queried at the election's threshold instead of the one it was built for
+    tallier = OriginalGenericTallier(number_of_voters, tallier_port,
+                                     threshold if plan.layered else None)
     tallier_thread = threading.Thread(target=tallier.run)
 
     # Create the FinalVoter
@@ -55,7 +84,14 @@ def original_generic(number_of_voters: int, threshold: int) -> None:
         threshold,
         number_of_voters,
         final_voter_port,
-        tallier_port
+        tallier_port,
+        workers,
+        plan,
+        filter_path,
+        send_path,
+        cache,
+        prf_mode,
+        prf_table
     )
     final_voter_thread = threading.Thread(target=final_voter.run)
 
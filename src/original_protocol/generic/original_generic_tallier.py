@@ -5,10 +5,9 @@ This class represents the tallier and includes methods to start a server,
 receive encoded votes, and compute the final verdict using a bloom filter.
 """
 
-import json
 import socket
 import time
-from src.bloom_filter import BloomFilter
+from src.filter_transfer import receive_message
 from src.generic_protocols.generic_tallier import GenericTallier
 
 
@@ -23,6 +22,7 @@ class OriginalGenericTallier(GenericTallier):
         lock (threading.Lock): A lock to ensure thread-safe operations on encoded votes.
         final_verdict (int or None): The final verdict computed after receiving all encoded votes.
         bloom_filter (BloomFilter): The bloom filter used to check combined votes.
+        threshold (Optional[int]): The threshold to query a layered bloom filter at.
 
     Methods:
         process_message(message: dict) -> None:
@@ -48,10 +48,7 @@ class OriginalGenericTallier(GenericTallier):
         elif message['type'] == 'vote_bf':
             self.encoded_votes.append(message['vote'])
 
-            time1: float = time.perf_counter()
-            self.bloom_filter = BloomFilter.from_dict(message['bf'])
-            time2: float = time.perf_counter()
-            print(f"Time take for Tallier to reproduce Bloom Filter: {time2-time1}")
+            self.store_bloom_filter(message)
 
     def start_server(self) -> None:
         """
@@ -63,9 +60,15 @@ class OriginalGenericTallier(GenericTallier):
 
         while len(self.encoded_votes) < self.number_of_voters:
             client_socket, _ = server_socket.accept()
-            data: bytes = client_socket.recv(131072)
+            time1: float = time.perf_counter()
+            message: dict = receive_message(client_socket)
+            time2: float = time.perf_counter()
+            # A vote_bf message carries no filter when the verdict engine needs none
+            if message['type'] == 'vote_bf' and 'bf' in message:
+                print(f"Time take for Tallier to receive Bloom Filter: {time2-time1}")
+                print(f"Time taken for Tallier to decode Bloom Filter ({message['wire_bytes']} "
+                      f"bytes on the wire): {message['decode_seconds']}")
             with self.lock:
-                message: dict = json.loads(data.decode('utf-8'))
                 self.process_message(message)
             client_socket.close()
 
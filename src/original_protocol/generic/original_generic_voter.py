@@ -23,6 +23,8 @@ class OriginalGenericVoter(GenericVoter):
         offset (int): An offset value used in generating the masking value.
         final_voter_port (int): The port number for connecting to the final voter.
         tallier_port (int): The port number for connecting to the tallier.
+        prf_engine (PRFEngine): The PRF keyed with the key, in the election's PRF mode, or a
+                                precomputed table of its outputs.
 
     Methods:
         run() -> None:
@@ -0,0 +1,361 @@
+"""
+Precomputed table of the PRF outputs of the generic variants of the e-voting protocol.
+
+Every voter derives its masking value from the PRF with tag 1 and its vote from the PRF with tag 2,
+and the FinalVoter derives the vote representation of every voter with tag 2, for the same offsets
+and voter indices on every run. A PRF table derives both for a range of offsets and voter indices in
+one pass, split across worker processes, and stores them in a (offsets, 2, voters, 32) array of
+uint8, so that each output is looked up in constant time.
+
+The table assumes the identifier of voter i is f"voter{i}", as in the protocol scripts, and falls
+back to computing the PRF for any input it does not hold. A table can be written to a file in the
+layout of a filter file, a header page holding its parameters followed by the array, and is
+memory-mapped when it is opened, so its pages are only read as they are looked up. Only a digest of
+the key is stored, and opening the file requires the key, but the outputs are the voters' masking
+values, so only the owner may read the file.
+
+Classes:
+    PRFTable: A PRF engine answering from a precomputed table.
+
+Functions:
+    build_prf_table(key: bytes, mode: str, first_offset: int, offsets: int, voters: int,
+                    workers: int, path: Optional[str]) -> PRFTable:
+        Derives the masking values and vote representations of a range of offsets and voters.
+
+    load_prf_table(path: str, key: bytes, mode: str, offsets: int, voters: int,
+                   workers: int) -> PRFTable:
+        Opens a table file, deriving it again first if it does not cover the election.
+"""
+
+import multiprocessing
+import os
+from hashlib import sha256
+from typing import BinaryIO, Iterable, List, Optional, Union
+import numpy as np
+from src.bloom_filter import FILE_HEADER_BYTES, header_page, parse_header_page
+from src.helpers import COMPATIBLE, PRF_BYTES, PRFEngine
+
+# The tags held in the table, of masking values and of votes
+TAGS: tuple[int, ...] = (1, 2)
+_KIND: str = 'prf_table'
+
+
+def _table_header(key: bytes, mode: str, first_offset: int, offsets: int, voters: int) -> dict:
+    """
+    Return the parameters of a table, as stored in its header page.
+
+    Args:
+        key (bytes): The key the table is derived with.
+        mode (str): The PRF mode.
+        first_offset (int): The first offset held in the table.
+        offsets (int): The number of consecutive offsets held in the table.
+        voters (int): The number of voter indices held in the table.
+
+    Returns:
+        dict: A dictionary containing the kind, a digest of the key, the mode, the offsets and
+              the number of voters.
+    """
+    return {
+        'kind': _KIND,
+        'key': sha256(key).hexdigest(),
+        'mode': mode,
+        'first_offset': first_offset,
+        'offsets': offsets,
+        'voters': voters,
+    }
+
+
+def _derive_rows(key: bytes, mode: str, tag: int, offset: int, start: int, stop: int) -> bytes:
+    """
+    Derive the PRF outputs of a run of voters for one tag and offset.
+
+    Runs in a worker process.
+
+    Args:
+        key (bytes): The key for the PRF.
+        mode (str): The PRF mode.
+        tag (int): The tag of the outputs.
+        offset (int): The offset of the outputs.
+        start (int): The index of the first voter.
+        stop (int): The index after the last voter.
+
+    Returns:
+        bytes: The PRF_BYTES-long output of each voter, concatenated.
+    """
+    indexes: range = range(start, stop)
+    return b''.join(PRFEngine(key, mode).prf_many(tag, offset, indexes,
+                                                  (f"voter{i}" for i in indexes)))
+
+
+class PRFTable(PRFEngine):
+    """
+    PRFTable class answering PRF queries from a table of precomputed outputs.
+
+    Attributes:
+        key (bytes): The key for the PRF.
+        mode (str): The PRF mode the table was derived in.
+        first_offset (int): The first offset held in the table.
+        offsets (int): The number of consecutive offsets held in the table.
+        voters (int): The number of voter indices held in the table, from 0.
+        table (np.ndarray): The (offsets, 2, voters, PRF_BYTES) array of uint8 outputs.
+
+    Methods:
+        covers(offset: int, voters: int) -> bool:
+            Returns whether the table holds every output of an election.
+
+        prf_bytes(tag: Optional[int], offset: int, index: int, identifier: str) -> bytes:
+            Looks the PRF of one input up, or computes it if it is not in the table.
+
+        prf_many(tag: Optional[int], offset: int, indexes: Iterable[int],
+                 identifiers: Iterable[str], as_array: bool) -> Union[List[bytes], np.ndarray]:
+            Looks the PRF of a batch of inputs up, computing any that are not in the table.
+
+        header() -> dict:
+            Returns the parameters of the table without its outputs.
+
+        save(path: str) -> None:
+            Writes the table to a file.
+
+        open(path: str, key: bytes) -> PRFTable:
+            Memory-maps a table file written for the same key.
+    """
+
+    def __init__(self, key: bytes, mode: str, first_offset: int, table: np.ndarray) -> None:
+        """
+        Wrap a PRF engine around a table of its outputs.
+
+        Args:
+            key (bytes): The key the table was derived with.
+            mode (str): The PRF mode the table was derived in.
+            first_offset (int): The first offset held in the table.
+            table (np.ndarray): The (offsets, 2, voters, PRF_BYTES) array of uint8 outputs.
+        """
+        super().__init__(key, mode)
+        self.first_offset: int = first_offset
+        self.offsets: int = table.shape[0]
+        self.voters: int = table.shape[2]
+        self.table: np.ndarray = table
+
+    def covers(self, offset: int, voters: int) -> bool:
+        """
+        Return whether the table holds every output of an election.
+
+        Args:
+            offset (int): The offset of the election.
+            voters (int): The number of voters of the election.
+
+        Returns:
+            bool: True if every masking value and vote of the election is in the table.
+        """
+        return (self.first_offset <= offset < self.first_offset + self.offsets
+                and voters <= self.voters)
+
+    def _row(self, tag: Optional[int], offset: int, index: int,
+             identifier: str) -> Optional[np.ndarray]:
+        """
+        Find the output of an input in the table.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            index (int): The index of the voter.
+            identifier (str): The identifier of the voter.
+
+        Returns:
+            Optional[np.ndarray]: The PRF_BYTES-long output, or None if it is not in the table.
+        """
+        if (tag not in TAGS or not self.first_offset <= offset < self.first_offset + self.offsets
+                or not 0 <= index < self.voters or identifier != f"voter{index}"):
+            return None
+        return self.table[offset - self.first_offset, TAGS.index(tag), index]
+
+    def prf_bytes(self, tag: Optional[int], offset: int, index: int, identifier: str) -> bytes:
+        """
+        Look the PRF of one input up, or compute it if it is not in the table.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            index (int): The index of the voter.
+            identifier (str): The identifier of the voter.
+
+        Returns:
+            bytes: The PRF_BYTES-long big-endian output.
+        """
+        row: Optional[np.ndarray] = self._row(tag, offset, index, identifier)
+        if row is None:
+            return super().prf_bytes(tag, offset, index, identifier)
+        return row.tobytes()
+
+    def prf_many(self, tag: Optional[int], offset: int, indexes: Iterable[int],
+                 identifiers: Iterable[str],
+                 as_array: bool = False) -> Union[List[bytes], np.ndarray]:
+        """
+        Look the PRF of a batch of inputs up, computing any that are not in the table.
+
+        Args:
+            tag (Optional[int]): The domain tag, or None for no tag.
+            offset (int): The offset of the election.
+            indexes (Iterable[int]): The index of each voter.
+            identifiers (Iterable[str]): The identifier of each voter, in the same order.
+            as_array (bool): Whether to return a NumPy array instead of a list of bytes.
+
+        Returns:
+            Union[List[bytes], np.ndarray]: The PRF_BYTES-long big-endian output of each input, or
+                                            a (number of inputs, PRF_BYTES) array of uint8.
+        """
+        indexes = list(indexes)
+        identifiers = list(identifiers)
+        if (tag in TAGS and self.first_offset <= offset < self.first_offset + self.offsets
+                and all(0 <= index < self.voters for index in indexes)
+                and identifiers == [f"voter{index}" for index in indexes]):
+            # Every output is in the table, so they are gathered in one indexing operation
+            rows: np.ndarray = self.table[offset - self.first_offset, TAGS.index(tag)][indexes]
+            return rows if as_array else [row.tobytes() for row in rows]
+        outputs: List[bytes] = [self.prf_bytes(tag, offset, index, identifier)
+                                for index, identifier in zip(indexes, identifiers)]
+        if as_array:
+            return np.frombuffer(b''.join(outputs), dtype=np.uint8).reshape(-1, PRF_BYTES)
+        return outputs
+
+    def header(self) -> dict:
+        """
+        Return the parameters of the table without its outputs.
+
+        Returns:
+            dict: A dictionary containing the kind, a digest of the key, the mode, the offsets and
+                  the number of voters.
+        """
+        return _table_header(self.key, self.mode, self.first_offset, self.offsets, self.voters)
+
+    def save(self, path: str) -> None:
+        """
+        Write the table to a file only its owner may read, a header page followed by the outputs.
+
+        Args:
+            path (str): The path of the file to create.
+        """
+        with _create_table_file(path) as file:
+            file.write(header_page(self.header()))
+            file.write(np.ascontiguousarray(self.table).tobytes())
+
+    @classmethod
+    def open(cls, path: str, key: bytes) -> 'PRFTable':
+        """
+        Memory-map a table file written for the same key, read-only.
+
+        Args:
+            path (str): The path of the table file.
+            key (bytes): The key the table was derived with.
+
+        Returns:
+            PRFTable: The table, whose outputs are read from the file as they are looked up.
+
+        Raises:
+            ValueError: If the file is not a PRF table, or was derived with another key.
+        """
+        with open(path, 'rb') as file:
+            header: dict = parse_header_page(file.read(FILE_HEADER_BYTES))
+        if header.get('kind') != _KIND:
+            raise ValueError(f"{path} is not a PRF table")
+        if header['key'] != sha256(key).hexdigest():
+            raise ValueError(f"{path} was derived with another key")
+        table: np.ndarray = np.memmap(path, dtype=np.uint8, mode='r', offset=FILE_HEADER_BYTES,
+                                      shape=(header['offsets'], len(TAGS), header['voters'],
+                                             PRF_BYTES))
+        return cls(key, header['mode'], header['first_offset'], table)
+
+
+def _create_table_file(path: str) -> BinaryIO:
+    """
+    Create a table file only its owner may read, replacing any file at the path.
+
+    A file already at the path is removed rather than truncated, so a table still memory-mapped
+    from it keeps its pages, and the new file never inherits its permissions.
+
+    Args:
+        path (str): The path of the table file.
+
+    Returns:
+        BinaryIO: The new file, open for writing.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    descriptor: int = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    return os.fdopen(descriptor, 'wb')
+
+
+def build_prf_table(key: bytes, mode: str = COMPATIBLE, first_offset: int = 0, offsets: int = 1,
+                    voters: int = 1, workers: int = 1, path: Optional[str] = None) -> PRFTable:
+    """
+    Derive the masking values and vote representations of a range of offsets and voters.
+
+    The outputs of each offset and tag are split into one run of voters per worker, and the runs
+    are derived in a pool of worker processes.
+
+    Args:
+        key (bytes): The key for the PRF.
+        mode (str): The PRF mode.
+        first_offset (int): The first offset to derive.
+        offsets (int): The number of consecutive offsets to derive.
+        voters (int): The number of voter indices to derive, from 0.
+        workers (int): The number of processes used to derive the outputs.
+        path (Optional[str]): A file to write the table to and memory-map it from, instead of
+                              holding it in memory.
+
+    Returns:
+        PRFTable: The table of the outputs.
+    """
+    shape: tuple[int, ...] = (offsets, len(TAGS), voters, PRF_BYTES)
+    if path is None:
+        table: np.ndarray = np.zeros(shape, dtype=np.uint8)
+    else:
+        with _create_table_file(path) as file:
+            file.write(header_page(_table_header(key, mode, first_offset, offsets, voters)))
+            file.truncate(FILE_HEADER_BYTES + int(np.prod(shape)))
+        table: np.ndarray = np.memmap(path, dtype=np.uint8, mode='r+', offset=FILE_HEADER_BYTES,
+                                      shape=shape)
+
+    step: int = -(-voters // workers) if voters else 1
+    tasks: List[tuple] = [(key, mode, tag, first_offset + offset, start, min(start + step, voters))
+                          for offset in range(offsets) for tag in TAGS
+                          for start in range(0, voters, step)]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results: List[bytes] = pool.starmap(_derive_rows, tasks)
+    else:
+        results: List[bytes] = [_derive_rows(*task) for task in tasks]
+    for (_, _, tag, offset, start, stop), rows in zip(tasks, results):
+        table[offset - first_offset, TAGS.index(tag), start:stop] = (
+            np.frombuffer(rows, dtype=np.uint8).reshape(-1, PRF_BYTES))
+
+    if isinstance(table, np.memmap):
+        table.flush()
+    return PRFTable(key, mode, first_offset, table)
+
+
+def load_prf_table(path: str, key: bytes, mode: str = COMPATIBLE, offsets: int = 1,
+                   voters: int = 1, workers: int = 1) -> PRFTable:
+    """
+    Open a table file, deriving it again first if it does not cover the offsets and voters.
+
+    Args:
+        path (str): The path of the table file.
+        key (bytes): The key for the PRF.
+        mode (str): The PRF mode.
+        offsets (int): The number of consecutive offsets from 0 the table must hold.
+        voters (int): The number of voters the table must hold.
+        workers (int): The number of processes used to derive the table.
+
+    Returns:
+        PRFTable: The table, memory-mapped from its file.
+    """
+    try:
+        table: PRFTable = PRFTable.open(path, key)
+        if table.mode == mode and table.covers(0, voters) and table.covers(offsets - 1, voters):
+            return table
+    except (FileNotFoundError, KeyError, ValueError):
+        pass
+    return build_prf_table(key, mode, 0, offsets, voters, workers, path)
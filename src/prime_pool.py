@@ -0,0 +1,242 @@
+"""
+Pool of primes for the time-lock puzzles of the dropout resilient variants of the e-voting
+protocol.
+
+Every voter of a dropout resilient variant generates a fresh modulus for its time-lock puzzle, the
+product of two random primes. Generating them in every voter thread competes for the GIL, so a pool
+of primes can instead be generated ahead of time by a background process and taken from in
+constant time.
+
+The pool is refilled by a background process whenever it falls below half of its size, and taking
+a prime from an empty pool generates one in place. The primes left over are written to a JSON file
+when the pool is closed and loaded again when it is next opened, so they are never generated in an
+election.
+
+A prime is never used for two moduli, even if the process dies before the pool is closed. Primes
+are reserved from the file in small batches, and every batch is appended to a log of used primes
+next to the file and synced to disk before any prime of it is taken. Opening the pool leaves out
+every prime in the log, and saving the pool empties the log once the file no longer holds them.
+Both files hold the factors of future moduli, so only their owner may read them.
+
+Classes:
+    PrimePool: A pool of primes of one bit length, refilled in the background and kept on disk.
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import threading
+from typing import List, Optional
+from src.helpers import generate_prime
+
+_KIND: str = 'prime_pool'
+# Primes logged as used with each sync of the log
+RESERVE_BATCH: int = 16
+
+
+def _generate_primes(primes: multiprocessing.Queue, bits: int, count: int) -> None:
+    """
+    Generate primes of a bit length and put them on a queue, one at a time.
+
+    Runs in a background process.
+
+    Args:
+        primes (multiprocessing.Queue): The queue the primes are put on.
+        bits (int): The bit length of the primes.
+        count (int): The number of primes to generate.
+    """
+    for _ in range(count):
+        primes.put(generate_prime(bits))
+
+
+class PrimePool:
+    """
+    A pool of primes of one bit length, refilled by a background process and kept in a file.
+
+    Attributes:
+        path (str): The JSON file the pool is kept in.
+        bits (int): The bit length of the primes.
+        size (int): The number of primes the pool is refilled up to.
+        primes (List[int]): The primes ready to be taken, not yet reserved.
+
+    Methods:
+        take() -> int:
+            Takes a prime from the pool, generating one if the pool is empty.
+
+        refill() -> None:
+            Starts generating the primes missing from the pool in a background process.
+
+        save() -> None:
+            Writes the primes in the pool to its file.
+
+        close() -> None:
+            Stops the background process and saves the pool.
+    """
+
+    def __init__(self, path: str, bits: int, size: int) -> None:
+        """
+        Open the pool kept in a file, creating it if it does not exist, and start refilling it.
+
+        Args:
+            path (str): The JSON file the pool is kept in.
+            bits (int): The bit length of the primes.
+            size (int): The number of primes the pool is refilled up to.
+
+        Raises:
+            ValueError: If the size is not positive, or the file is not a prime pool.
+        """
+        if size < 1:
+            raise ValueError("A prime pool must hold at least one prime")
+        self.path: str = path
+        self.bits: int = bits
+        self.size: int = size
+        self.primes: List[int] = self._load()
+        # Primes logged as used but not taken yet
+        self._reserved: List[int] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._queue: multiprocessing.Queue = multiprocessing.Queue()
+        self._process: Optional[multiprocessing.Process] = None
+        self.refill()
+
+    def _load(self) -> List[int]:
+        """
+        Load the primes kept in the pool's file.
+
+        Primes of another bit length are left out, so a pool file outlives a change of modulus
+        size, and so is every prime in the log of used primes.
+
+        Returns:
+            List[int]: The unused primes kept in the file, or an empty list if it does not exist.
+
+        Raises:
+            ValueError: If the file is not a prime pool.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                contents: dict = json.load(file)
+        except FileNotFoundError:
+            return []
+        if contents.get('kind') != _KIND:
+            raise ValueError(f"{self.path} is not a prime pool")
+        if contents['bits'] != self.bits:
+            return []
+        used: set[int] = set()
+        try:
+            with open(self._used_path, 'r', encoding='utf-8') as file:
+                # A line torn by a crash is a prime that was never taken
+                used = {int(line) for line in file if line.endswith('\n')}
+        except FileNotFoundError:
+            pass
+        return [prime for prime in contents['primes'] if prime not in used]
+
+    @property
+    def _used_path(self) -> str:
+        """
+        Return the path of the log of used primes.
+
+        Returns:
+            str: The pool's path with a '.used' suffix.
+        """
+        return f"{self.path}.used"
+
+    def _reserve(self) -> None:
+        """
+        Move a batch of primes from the pool to the reserved primes, appending them to the log of
+        used primes and syncing it to disk first.
+        """
+        batch: List[int] = self.primes[-RESERVE_BATCH:]
+        descriptor: int = os.open(self._used_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(descriptor, ''.join(f"{prime}\n" for prime in batch).encode())
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        del self.primes[-len(batch):]
+        self._reserved.extend(batch)
+
+    def _drain(self) -> None:
+        """
+        Move the primes generated by the background process so far into the pool.
+        """
+        while True:
+            try:
+                self.primes.append(self._queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def refill(self) -> None:
+        """
+        Start generating the primes missing from the pool in a background process, unless one is
+        already running.
+        """
+        if self._process is not None and self._process.is_alive():
+            return
+        missing: int = self.size - len(self.primes)
+        if missing > 0:
+            self._process = multiprocessing.Process(target=_generate_primes,
+                                                    args=(self._queue, self.bits, missing),
+                                                    daemon=True)
+            self._process.start()
+
+    def take(self) -> int:
+        """
+        Take a prime from the pool, generating one if the pool is empty.
+
+        Taking a prime that leaves the pool below half of its size starts refilling it. The prime
+        is logged as used on disk before it is returned.
+
+        Returns:
+            int: A prime of the pool's bit length, never returned again.
+        """
+        with self._lock:
+            if not self._reserved:
+                if not self.primes:
+                    self._drain()
+                if self.primes:
+                    self._reserve()
+            prime: Optional[int] = self._reserved.pop() if self._reserved else None
+            if len(self.primes) < self.size // 2:
+                self._drain()
+                self.refill()
+        return prime if prime is not None else generate_prime(self.bits)
+
+    def save(self) -> None:
+        """
+        Write the primes in the pool to its file.
+
+        The pool is written to a temporary file that is then renamed, so the file always holds a
+        whole pool, and only then is the log of used primes emptied. Reserved primes that were not
+        taken go back into the pool.
+        """
+        with self._lock:
+            self._drain()
+            self.primes.extend(self._reserved)
+            self._reserved = []
+            temporary_path: str = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                # Only the owner may read the factors of future moduli
+                descriptor: int = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL,
+                                          0o600)
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                    json.dump({'kind': _KIND, 'bits': self.bits, 'primes': self.primes}, file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temporary_path, self.path)
+            finally:
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+            if os.path.exists(self._used_path):
+                os.remove(self._used_path)
+
+    def close(self) -> None:
+        """
+        Stop the background process and save the pool, keeping the primes generated so far.
+        """
+        with self._lock:
+            self._drain()
+            if self._process is not None:
+                self._process.terminate()
+                self._process.join()
+                self._process = None
+        self.save()
@@ -0,0 +1,255 @@
+"""
+Repeated squaring modulo n, the work of solving the time-lock puzzles of the dropout resilient
+variants of the e-voting protocol.
+
+Solving a puzzle takes t sequential squarings of a modulo n. Squaring in a Python loop spends most
+of its time in the interpreter, so the squarings are instead done in chunks, each a single modular
+exponentiation by 2^chunk that runs in C, and the result is identical to squaring one at a time.
+
+The squaring backend is pluggable:
+
+    'python'        squares one at a time in a Python loop, as a reference
+    'pow'           raises to 2^chunk with the built-in pow
+    'pycryptodome'  raises to 2^chunk with the Integer of pycryptodome, backed by GMP when it is
+                    found or by its own Montgomery multiplication otherwise
+    'gmpy2'         raises to 2^chunk with gmpy2.powmod, when the gmpy2 package is installed
+
+and 'auto' picks the fastest backend available on the host.
+
+Functions:
+    available_backends() -> list[str]:
+        Returns the names of the squaring backends that can be used on this host.
+
+    resolve_backend(backend: str) -> str:
+        Resolves 'auto' to the fastest backend available, checking that a backend can be used.
+
+    square_chunks(x: int, t: int, n: int, backend: str, chunk: int,
+                  done: int) -> Iterator[tuple[int, int]]:
+        Squares x modulo n up to t times, yielding the value and squarings done after each chunk.
+
+    repeated_squaring(x: int, t: int, n: int, backend: str, chunk: int) -> int:
+        Squares x modulo n t times.
+
+    measure_squarings_per_second(backend: str, bits: int, seconds: float) -> float:
+        Measures the squarings per second a backend achieves on a random modulus.
+"""
+
+import secrets
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterator
+from Crypto.Math.Numbers import Integer
+from src.helpers import generate_modulus
+
+try:
+    import gmpy2
+except ImportError:  # gmpy2 squaring is optional
+    gmpy2 = None
+
+AUTO: str = 'auto'
+PYTHON: str = 'python'
+POW: str = 'pow'
+PYCRYPTODOME: str = 'pycryptodome'
+GMPY2: str = 'gmpy2'
+# Preferred first, as gmpy2 always uses GMP while pycryptodome only does when it finds the library
+SQUARING_BACKENDS: tuple[str, ...] = (GMPY2, PYCRYPTODOME, POW, PYTHON)
+# Squarings per modular exponentiation, as pycryptodome slows down sharply on longer exponents
+DEFAULT_CHUNK: int = 1 << 16
+
+
+def _square_python(x: int, squarings: int, n: int) -> int:
+    """
+    Square x modulo n one squaring at a time in a Python loop.
+
+    Args:
+        x (int): The value to square.
+        squarings (int): The number of squarings.
+        n (int): The modulus.
+
+    Returns:
+        int: x^(2^squarings) mod n.
+    """
+    for _ in range(squarings):
+        x = (x ** 2) % n
+    return x
+
+
+def _square_pow(x: int, squarings: int, n: int) -> int:
+    """
+    Square x modulo n with a single built-in modular exponentiation by 2^squarings.
+
+    Args:
+        x (int): The value to square.
+        squarings (int): The number of squarings.
+        n (int): The modulus.
+
+    Returns:
+        int: x^(2^squarings) mod n.
+    """
+    return pow(x, 1 << squarings, n)
+
+
+@lru_cache(maxsize=4)
+def _pycryptodome_exponent(squarings: int) -> Integer:
+    """
+    Return 2^squarings as an Integer of pycryptodome.
+
+    Converting the exponent takes longer than the exponentiation itself, and every chunk but the
+    last has the same size, so the conversion is cached.
+
+    Args:
+        squarings (int): The number of squarings.
+
+    Returns:
+        Integer: 2^squarings.
+    """
+    return Integer(1 << squarings)
+
+
+def _square_pycryptodome(x: int, squarings: int, n: int) -> int:
+    """
+    Square x modulo n with a single modular exponentiation of pycryptodome's Integer.
+
+    Args:
+        x (int): The value to square.
+        squarings (int): The number of squarings.
+        n (int): The modulus.
+
+    Returns:
+        int: x^(2^squarings) mod n.
+    """
+    return int(pow(Integer(x), _pycryptodome_exponent(squarings), Integer(n)))
+
+
+def _square_gmpy2(x: int, squarings: int, n: int) -> int:
+    """
+    Square x modulo n with a single gmpy2.powmod.
+
+    Args:
+        x (int): The value to square.
+        squarings (int): The number of squarings.
+        n (int): The modulus.
+
+    Returns:
+        int: x^(2^squarings) mod n.
+    """
+    return int(gmpy2.powmod(x, gmpy2.mpz(1) << squarings, n))
+
+
+_SQUARERS: Dict[str, Callable[[int, int, int], int]] = {
+    PYTHON: _square_python,
+    POW: _square_pow,
+    PYCRYPTODOME: _square_pycryptodome,
+    GMPY2: _square_gmpy2,
+}
+
+
+def available_backends() -> list[str]:
+    """
+    Return the names of the squaring backends that can be used on this host.
+
+    Returns:
+        list[str]: The backends, preferred first, always including 'pycryptodome', 'pow' and
+                   'python'.
+    """
+    return [backend for backend in SQUARING_BACKENDS if backend != GMPY2 or gmpy2 is not None]
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    Resolve 'auto' to the fastest backend available, checking that a backend can be used.
+
+    Args:
+        backend (str): The backend name, or 'auto'.
+
+    Returns:
+        str: The name of a backend available on this host.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    if backend == AUTO:
+        return available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError(f"Unsupported squaring backend: {backend}")
+    return backend
+
+
+def square_chunks(x: int, t: int, n: int, backend: str = AUTO, chunk: int = DEFAULT_CHUNK,
+                  done: int = 0) -> Iterator[tuple[int, int]]:
+    """
+    Square x modulo n until t squarings are done, yielding after each chunk.
+
+    Squaring can resume from a value yielded earlier by passing it as x with the squarings done so
+    far.
+
+    Args:
+        x (int): The value after the squarings done so far.
+        t (int): The total number of squarings.
+        n (int): The modulus.
+        backend (str): The squaring backend, or 'auto'.
+        chunk (int): The number of squarings per chunk.
+        done (int): The number of squarings already done.
+
+    Yields:
+        tuple[int, int]: The value and the number of squarings done after each chunk, ending with
+                         x^(2^(t - done)) mod n and t.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    square: Callable[[int, int, int], int] = _SQUARERS[resolve_backend(backend)]
+    while done < t:
+        squarings: int = min(chunk, t - done)
+        x = square(x, squarings, n)
+        done += squarings
+        yield x, done
+
+
+def repeated_squaring(x: int, t: int, n: int, backend: str = AUTO,
+                      chunk: int = DEFAULT_CHUNK) -> int:
+    """
+    Square x modulo n t times.
+
+    Args:
+        x (int): The value to square.
+        t (int): The number of squarings.
+        n (int): The modulus.
+        backend (str): The squaring backend, or 'auto'.
+        chunk (int): The number of squarings per chunk.
+
+    Returns:
+        int: x^(2^t) mod n, or x itself if t is 0.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    for x, _ in square_chunks(x, t, n, backend, chunk):
+        pass
+    return x
+
+
+def measure_squarings_per_second(backend: str = AUTO, bits: int = 128,
+                                 seconds: float = 1.0) -> float:
+    """
+    Measure the squarings per second a backend achieves on a random modulus.
+
+    Args:
+        backend (str): The squaring backend, or 'auto'.
+        bits (int): The bit length of the modulus.
+        seconds (float): The least time to square for.
+
+    Returns:
+        float: The squarings per second.
+
+    Raises:
+        ValueError: If the backend is unknown or not installed.
+    """
+    n, _ = generate_modulus(bits)
+    x: int = secrets.randbelow(n - 2) + 2
+    done: int = 0
+    start: float = time.perf_counter()
+    for x, done in square_chunks(x, 1 << 62, n, backend, DEFAULT_CHUNK):
+        if time.perf_counter() - start >= seconds:
+            break
+    return done / (time.perf_counter() - start)
@@ -0,0 +1,230 @@
+"""
+Minimal-change subset enumeration for building the generic variants' vote-combination filters.
+
+The FinalVoter needs the XOR of every subset of vote representations whose size is at least the
+threshold, or, when there are fewer of them, of every subset whose size is below it. Rather than
+rebuilding every subset from scratch, the subsets of each size are visited in revolving-door order
+(Knuth, TAOCP Algorithm 7.2.1.3R), where consecutive subsets differ by exactly one element leaving
+and one element joining. The running XOR can therefore be updated with two XOR operations per
+subset, independently of the subset size.
+
+Functions:
+    revolving_door(n: int, k: int) -> Iterator[tuple[int, int]]:
+        Yields the (removed, added) index swaps that walk through every k-subset of range(n).
+
+    subset_xors(values: Sequence[int], k: int) -> Iterator[int]:
+        Yields the XOR of every k-subset of values.
+
+    subset_sizes(n: int, threshold: int, inverted: bool) -> range:
+        Returns the subset sizes on one side of the threshold.
+
+    threshold_subset_xors(values: Sequence[int], threshold: int, inverted: bool) -> Iterator[int]:
+        Yields the XOR of every subset of values with at least threshold members, or with fewer.
+
+    prefix_shards(n: int, threshold: int, inverted: bool) -> list[tuple[int, int]]:
+        Splits the subsets on one side of the threshold into disjoint shards.
+
+    shard_size(n: int, shard: tuple[int, int]) -> int:
+        Returns the number of subsets in a shard.
+
+    shard_xors(values: Sequence[int], shard: tuple[int, int]) -> Iterator[int]:
+        Yields the XOR of every subset in a shard.
+"""
+
+import math
+from typing import Iterator, Sequence
+
+
+def revolving_door(n: int, k: int) -> Iterator[tuple[int, int]]:
+    """
+    Walk through every k-subset of range(n) in revolving-door order.
+
+    The walk starts from the subset {0, ..., k-1}. Each yielded pair describes how to get from
+    the current subset to the next one, so the number of pairs is comb(n, k) - 1.
+
+    Args:
+        n (int): The number of elements to choose from.
+        k (int): The size of the subsets, with 0 < k < n.
+
+    Yields:
+        tuple[int, int]: The index that leaves the subset and the index that joins it.
+    """
+    if k == 1:
+        for i in range(1, n):
+            yield i - 1, i
+        return
+
+    # c[1..k] holds the current subset in increasing order, c[k + 1] is a sentinel
+    c: list[int] = [0] + list(range(k)) + [n]
+    odd: bool = k % 2 == 1
+
+    while True:
+        # Easy case: move the smallest element
+        if odd:
+            if c[1] + 1 < c[2]:
+                c[1] += 1
+                yield c[1] - 1, c[1]
+                continue
+            j: int = 2
+            decrease: bool = True
+        else:
+            if c[1] > 0:
+                c[1] -= 1
+                yield c[1] + 1, c[1]
+                continue
+            j: int = 2
+            decrease: bool = False
+
+        while j <= k:
+            if decrease:
+                # Here c[j] == c[j - 1] + 1
+                if c[j] >= j:
+                    removed: int = c[j]
+                    c[j] = c[j - 1]
+                    c[j - 1] = j - 2
+                    yield removed, j - 2
+                    break
+                j += 1
+            else:
+                # Here c[j - 1] == j - 2
+                if c[j] + 1 < c[j + 1]:
+                    removed: int = c[j - 1]
+                    c[j - 1] = c[j]
+                    c[j] += 1
+                    yield removed, c[j]
+                    break
+                j += 1
+            decrease = not decrease
+        else:
+            return
+
+
+def subset_xors(values: Sequence[int], k: int) -> Iterator[int]:
+    """
+    Yield the XOR of every k-subset of values.
+
+    Produces the same multiset of results as XORing each tuple from
+    itertools.combinations(values, k), but in revolving-door order and at a cost of two XORs per
+    subset.
+
+    Args:
+        values (Sequence[int]): The values to combine.
+        k (int): The size of the subsets.
+
+    Yields:
+        int: The XOR of the members of each subset.
+    """
+    n: int = len(values)
+    if k < 0 or k > n:
+        return
+
+    xor: int = 0
+    for value in values[:k]:
+        xor ^= value
+    yield xor
+
+    if k == 0 or k == n:
+        return
+
+    for removed, added in revolving_door(n, k):
+        xor ^= values[removed] ^ values[added]
+        yield xor
+
+
+def subset_sizes(n: int, threshold: int, inverted: bool = False) -> range:
+    """
+    Return the subset sizes on one side of the threshold.
+
+    Args:
+        n (int): The number of elements to choose from.
+        threshold (int): The minimum subset size that reaches the threshold.
+        inverted (bool): Whether to return the sizes below the threshold instead, from the empty
+                         subset up.
+
+    Returns:
+        range: The subset sizes.
+    """
+    if inverted:
+        return range(0, min(max(threshold, 0), n + 1))
+    return range(max(threshold, 0), n + 1)
+
+
+def threshold_subset_xors(values: Sequence[int], threshold: int,
+                          inverted: bool = False) -> Iterator[int]:
+    """
+    Yield the XOR of every subset of values with at least threshold members, or with fewer.
+
+    Args:
+        values (Sequence[int]): The values to combine.
+        threshold (int): The minimum subset size.
+        inverted (bool): Whether to yield the subsets below the threshold instead, including the
+                         empty subset, whose XOR is 0.
+
+    Yields:
+        int: The XOR of the members of each subset.
+    """
+    for k in subset_sizes(len(values), threshold, inverted):
+        yield from subset_xors(values, k)
+
+
+def prefix_shards(n: int, threshold: int, inverted: bool = False) -> list[tuple[int, int]]:
+    """
+    Split the subsets of range(n) on one side of the threshold into disjoint shards.
+
+    A shard (k, prefix) holds the subsets of size k whose smallest member is prefix, so together
+    the shards cover every subset exactly once and can be enumerated independently.
+
+    Args:
+        n (int): The number of elements to choose from.
+        threshold (int): The minimum subset size.
+        inverted (bool): Whether to split the subsets below the threshold instead.
+
+    Returns:
+        list[tuple[int, int]]: The (subset size, smallest member) pair of each shard.
+    """
+    shards: list[tuple[int, int]] = []
+    for k in subset_sizes(n, threshold, inverted):
+        if k == 0:
+            shards.append((0, 0))
+            continue
+        for prefix in range(n - k + 1):
+            shards.append((k, prefix))
+    return shards
+
+
+def shard_size(n: int, shard: tuple[int, int]) -> int:
+    """
+    Return the number of subsets in a shard.
+
+    Args:
+        n (int): The number of elements to choose from.
+        shard (tuple[int, int]): The (subset size, smallest member) pair of the shard.
+
+    Returns:
+        int: The number of subsets in the shard.
+    """
+    k, prefix = shard
+    if k == 0:
+        return 1
+    return math.comb(n - prefix - 1, k - 1)
+
+
+def shard_xors(values: Sequence[int], shard: tuple[int, int]) -> Iterator[int]:
+    """
+    Yield the XOR of every subset of values in a shard.
+
+    Args:
+        values (Sequence[int]): The values to combine.
+        shard (tuple[int, int]): The (subset size, smallest member) pair of the shard.
+
+    Yields:
+        int: The XOR of the members of each subset.
+    """
+    k, prefix = shard
+    if k == 0:
+        yield 0
+        return
+
+    base: int = values[prefix]
+    for xor in subset_xors(values[prefix + 1:], k - 1):
+        yield base ^ xor
@@ -0,0 +1,377 @@
+"""
+State file of the election the Tallier of the dropout resilient variants is unlocking.
+
+Solving a time-lock puzzle takes t sequential squarings, so a Tallier that dies partway through
+would otherwise lose every vote it received and the work spent unlocking them. The Tallier instead
+keeps the state of its election in a state file: every message it receives, written before the
+message is processed, and each puzzle's value x and number of squarings done, every checkpoint
+interval. A restarted Tallier restores every message, resumes each puzzle from its latest
+checkpoint, and finishes the puzzles already solved without squaring. Once the Tallier has computed
+the final verdict the election is over, and the state file is emptied.
+
+Every line of the state file is a JSON record, appended with a single write so that the lines of
+the processes unlocking each vote never interleave, and a record survives the death of the process
+as soon as it is written. Received messages are synced to disk at once, while checkpoints are only
+synced every few checkpoints and when a puzzle is solved, which bounds the work lost to a crash of
+the host without syncing on every checkpoint. When the state file is opened it is compacted to one
+record per message, holding the latest checkpoint of each puzzle, and a torn last line left by a
+crash is dropped. The filter of valid vote combinations a generic FinalVoter sends is kept in a
+filter file next to the state file.
+
+Puzzles are identified by a digest of their modulus, base and number of squarings. The state file
+holds the key material of every vote received, and a solved puzzle unlocks its vote, so only the
+owner may read the state file or the filter file.
+
+Classes:
+    UnlockCheckpoints: A state file of the messages and puzzle checkpoints of an election.
+
+Functions:
+    puzzle_id(n: int, a: int, t: int) -> str:
+        Computes the identifier a puzzle is checkpointed under.
+
+    unfinished_votes(path: str) -> int:
+        Counts the votes of an unfinished election held in a state file.
+"""
+
+import json
+import os
+import time
+from hashlib import sha256
+from typing import Dict, List, Optional
+from src.filters import open_filter_file, save_filter
+from src.squaring import AUTO, DEFAULT_CHUNK, resolve_backend, square_chunks
+
+# Under a second of squaring with the fastest backends on 128-bit moduli
+DEFAULT_CHECKPOINT_INTERVAL: int = 1 << 24
+DEFAULT_FSYNC_BATCH: int = 8
+_TIME_LOCKED: str = 'time_locked'
+
+
+def puzzle_id(n: int, a: int, t: int) -> str:
+    """
+    Compute the identifier a puzzle is checkpointed under.
+
+    Args:
+        n (int): The modulus of the puzzle.
+        a (int): The base of the puzzle.
+        t (int): The number of squarings of the puzzle.
+
+    Returns:
+        str: A hex digest of the puzzle's parameters.
+    """
+    return sha256(json.dumps([n, a, t]).encode()).hexdigest()[:32]
+
+
+def _read_state(path: str) -> tuple[Dict[str, dict], Dict[str, tuple[int, int]], List[dict]]:
+    """
+    Read the records of a state file.
+
+    Args:
+        path (str): The state file.
+
+    Returns:
+        tuple[Dict[str, dict], Dict[str, tuple[int, int]], List[dict]]: The time-locked messages
+            by puzzle, the latest value and squarings done of every puzzle, and the other messages
+            in the order they were received. All are empty if the file does not exist.
+    """
+    messages: Dict[str, dict] = {}
+    checkpoints: Dict[str, tuple[int, int]] = {}
+    received: List[dict] = []
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record: dict = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may have been torn by a crash
+                    continue
+                if 'received' in record:
+                    received.append(record['received'])
+                    continue
+                if 'message' in record:
+                    messages[record['puzzle']] = record['message']
+                if 'done' in record:
+                    latest: Optional[tuple[int, int]] = checkpoints.get(record['puzzle'])
+                    if latest is None or record['done'] > latest[1]:
+                        checkpoints[record['puzzle']] = (record['x'], record['done'])
+    except FileNotFoundError:
+        pass
+    return messages, checkpoints, received
+
+
+def unfinished_votes(path: str) -> int:
+    """
+    Count the votes of an unfinished election held in a state file, without changing it.
+
+    Args:
+        path (str): The state file.
+
+    Returns:
+        int: The number of messages received in the election, 0 if the file does not exist or the
+             election is over.
+    """
+    messages, _, received = _read_state(path)
+    return len(messages) + len(received)
+
+
+def _append(path: str, records: List[dict]) -> int:
+    """
+    Open a state file for appending and append records to it with a single write.
+
+    Args:
+        path (str): The state file.
+        records (List[dict]): The records to append.
+
+    Returns:
+        int: The descriptor of the file, open for appending.
+    """
+    descriptor: int = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    os.write(descriptor, ''.join(json.dumps(record) + '\n' for record in records).encode())
+    return descriptor
+
+
+class UnlockCheckpoints:
+    """
+    A state file holding the messages received in an election and the latest checkpoint of every
+    time-lock puzzle.
+
+    Attributes:
+        path (str): The state file.
+        filter_path (str): The file the filter of valid vote combinations is kept in.
+        interval (int): The number of squarings between checkpoints.
+        fsync_batch (int): The number of checkpoints written between syncs of the file to disk.
+        messages (Dict[str, dict]): The time-locked messages in the file when it was opened, by
+                                    puzzle.
+        checkpoints (Dict[str, tuple[int, int]]): The latest value and squarings done of every
+                                                  puzzle in the file when it was opened.
+        received (List[dict]): The other messages in the file when it was opened.
+
+    Methods:
+        restore() -> List[dict]:
+            Returns the messages received in the unfinished election, in a form to process again.
+
+        record_message(message: dict) -> None:
+            Appends a received message to the state file and syncs it to disk.
+
+        solve(n: int, a: int, t: int, backend: str) -> int:
+            Squares a modulo n t times, resuming from and recording checkpoints.
+
+        resume(puzzle: str) -> Optional[tuple[int, int]]:
+            Returns the latest checkpoint of a puzzle.
+
+        record(puzzle: str, x: int, done: int, solved: bool) -> None:
+            Appends a checkpoint of a puzzle to the state file.
+
+        sync() -> None:
+            Syncs the checkpoints written so far to disk.
+
+        close() -> None:
+            Syncs the checkpoints written so far and closes the state file.
+
+        clear() -> None:
+            Empties the state file once the election is over.
+    """
+
+    def __init__(self, path: str, interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+                 fsync_batch: int = DEFAULT_FSYNC_BATCH) -> None:
+        """
+        Open a state file, creating it if it does not exist, and compact it to one record per
+        message.
+
+        Args:
+            path (str): The state file.
+            interval (int): The number of squarings between checkpoints.
+            fsync_batch (int): The number of checkpoints written between syncs of the file to disk.
+
+        Raises:
+            ValueError: If the interval or the batch is not positive.
+        """
+        if interval < 1 or fsync_batch < 1:
+            raise ValueError("The checkpoint interval and fsync batch must be positive")
+        self.path: str = path
+        self.filter_path: str = f"{path}.filter"
+        self.interval: int = interval
+        self.fsync_batch: int = fsync_batch
+        self.messages: Dict[str, dict]
+        self.checkpoints: Dict[str, tuple[int, int]]
+        self.received: List[dict]
+        self.messages, self.checkpoints, self.received = _read_state(path)
+        self._compact()
+        # Opened in each unlocking process on its first checkpoint
+        self._descriptor: Optional[int] = None
+        self._unsynced: int = 0
+
+    def _compact(self) -> None:
+        """
+        Rewrite the state file with one record per message, holding the latest checkpoint of each
+        puzzle. Checkpoints of puzzles whose message was never recorded are dropped.
+
+        The file is written to a temporary file that is then renamed, so it always holds every
+        record.
+        """
+        temporary_path: str = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            descriptor: int = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                for puzzle, message in self.messages.items():
+                    record: dict = {'puzzle': puzzle, 'message': message}
+                    if puzzle in self.checkpoints:
+                        record['x'], record['done'] = self.checkpoints[puzzle]
+                    file.write(json.dumps(record) + '\n')
+                for message in self.received:
+                    file.write(json.dumps({'received': message}) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary_path, self.path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    def restore(self) -> List[dict]:
+        """
+        Return the messages received in the unfinished election held in the state file.
+
+        The filter of a message that carried one is opened from the filter file.
+
+        Returns:
+            List[dict]: The time-locked messages, followed by the other messages in the order they
+                        were received.
+        """
+        restored: List[dict] = list(self.messages.values())
+        for message in self.received:
+            message = dict(message)
+            if message.pop('filter', False):
+                message['bf'] = open_filter_file(self.filter_path)
+            restored.append(message)
+        return restored
+
+    def record_message(self, message: dict) -> None:
+        """
+        Append a received message to the state file and sync it to disk.
+
+        A time-locked message is recorded under its puzzle. The filter a message carries is saved
+        to the filter file, as it is not JSON.
+
+        Args:
+            message (dict): The message received by the Tallier.
+        """
+        if message['type'] == _TIME_LOCKED:
+            record: dict = {'puzzle': puzzle_id(message['n'], message['a'], message['t']),
+                            'message': message}
+        else:
+            stored: dict = {key: value for key, value in message.items() if key != 'bf'}
+            if 'bf' in message:
+                # Created owner-only before the filter is written to it
+                os.close(os.open(self.filter_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600))
+                os.chmod(self.filter_path, 0o600)
+                save_filter(message['bf'], self.filter_path)
+                stored['filter'] = True
+            record = {'received': stored}
+        descriptor: int = _append(self.path, [record])
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+
+    def solve(self, n: int, a: int, t: int, backend: str = AUTO) -> int:
+        """
+        Square a modulo n t times, resuming from the puzzle's latest checkpoint and recording one
+        every interval squarings.
+
+        A puzzle already solved is not squared again. The progress and the estimated time left
+        are printed at every checkpoint, and the squarings per second once the puzzle is solved.
+
+        Args:
+            n (int): The modulus of the puzzle.
+            a (int): The base of the puzzle.
+            t (int): The number of squarings of the puzzle.
+            backend (str): The squaring backend, or 'auto'.
+
+        Returns:
+            int: a^(2^t) mod n.
+        """
+        puzzle: str = puzzle_id(n, a, t)
+        checkpoint: Optional[tuple[int, int]] = self.resume(puzzle)
+        x, done = checkpoint or (a, 0)
+        if checkpoint is not None and done == t:
+            print(f"Puzzle {puzzle[:8]} already solved, skipping its {t} squarings")
+            return x
+        if done:
+            print(f"Puzzle {puzzle[:8]} resumed from checkpoint at {done}/{t} squarings")
+
+        resumed: int = done
+        recorded: int = done
+        start: float = time.perf_counter()
+        # Squared in the default chunks, as some backends slow down on longer ones
+        for x, done in square_chunks(x, t, n, backend, min(self.interval, DEFAULT_CHUNK), done):
+            if done - recorded < self.interval and done < t:
+                continue
+            self.record(puzzle, x, done, done == t)
+            recorded = done
+            elapsed: float = time.perf_counter() - start
+            eta: float = (t - done) * elapsed / (done - resumed)
+            print(f"Puzzle {puzzle[:8]}: {done}/{t} squarings ({done / t:.0%}), ETA {eta:.1f}s")
+        elapsed = time.perf_counter() - start
+        print(f"Squarings per second to solve puzzle {puzzle[:8]} with {resolve_backend(backend)}: "
+              f"{(t - resumed) / elapsed:.0f}")
+        return x
+
+    def resume(self, puzzle: str) -> Optional[tuple[int, int]]:
+        """
+        Return the latest checkpoint of a puzzle when the state file was opened.
+
+        Args:
+            puzzle (str): The identifier of the puzzle.
+
+        Returns:
+            Optional[tuple[int, int]]: The value and squarings done, or None if the puzzle has no
+                                       checkpoint.
+        """
+        return self.checkpoints.get(puzzle)
+
+    def record(self, puzzle: str, x: int, done: int, solved: bool = False) -> None:
+        """
+        Append a checkpoint of a puzzle to the state file, syncing it to disk every fsync_batch
+        checkpoints and whenever the puzzle is solved.
+
+        Args:
+            puzzle (str): The identifier of the puzzle.
+            x (int): The value after the squarings done.
+            done (int): The number of squarings done.
+            solved (bool): Whether every squaring of the puzzle is done.
+        """
+        record: dict = {'puzzle': puzzle, 'x': x, 'done': done}
+        if self._descriptor is None:
+            self._descriptor = _append(self.path, [record])
+        else:
+            os.write(self._descriptor, (json.dumps(record) + '\n').encode())
+        self._unsynced += 1
+        if solved or self._unsynced >= self.fsync_batch:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        Sync the checkpoints written so far to disk.
+        """
+        if self._descriptor is not None and self._unsynced:
+            os.fsync(self._descriptor)
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """
+        Sync the checkpoints written so far and close the state file.
+        """
+        if self._descriptor is not None:
+            self.sync()
+            os.close(self._descriptor)
+            self._descriptor = None
+
+    def clear(self) -> None:
+        """
+        Empty the state file and remove the filter file once the election is over, so the state
+        of a finished election is never kept.
+        """
+        self.messages, self.checkpoints, self.received = {}, {}, []
+        self._compact()
+        if os.path.exists(self.filter_path):
+            os.remove(self.filter_path)